@@ -0,0 +1,65 @@
+"""One send of head and body against two, by body size: the trade-off
+behind Response.COALESCE_LIMIT.
+
+A server thread answers each one-line request on a loopback connection,
+TCP_NODELAY on both ends as the server sets it, with a 200-byte head and
+a body of SIZE bytes -- either joined into one bytes object and sent
+once, or sent as two sendall() calls. The client waits for the whole
+response before the next request, so each round is one request/response
+round trip.
+
+    python benchmarks/bench_coalesce.py
+"""
+import socket
+import threading
+import time
+
+HEAD = b'HTTP/1.1 200 OK\r\n' + b'x-header: value\r\n' * 10
+
+
+def serve(listener: socket.socket, joined: bool, size: int, rounds: int) -> None:
+    conn, _ = listener.accept()
+    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    head = HEAD + b'content-length: %d\r\n\r\n' % size
+    body = b'b' * size
+    with conn:
+        for _ in range(rounds):
+            conn.recv(128)
+            if joined:
+                conn.sendall(head + body)
+            else:
+                conn.sendall(head)
+                conn.sendall(body)
+
+
+def round_trip(joined: bool, size: int, rounds: int = 3000) -> float:
+    """Microseconds per request and response."""
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        listener.listen()
+        server = threading.Thread(target=serve, args=(listener, joined, size, rounds))
+        server.start()
+        with socket.create_connection(listener.getsockname()) as sock:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            buffer = bytearray(1 << 20)
+            expected = len(HEAD + b'content-length: %d\r\n\r\n' % size) + size
+            started = time.perf_counter()
+            for _ in range(rounds):
+                sock.sendall(b'GET / HTTP/1.1\r\n\r\n')
+                received = 0
+                while received < expected:
+                    received += sock.recv_into(buffer)
+            elapsed = time.perf_counter() - started
+        server.join()
+    return elapsed / rounds * 1e6
+
+
+def main() -> None:
+    for size in (1024, 4096, 16384, 32768, 65536, 131072):
+        joined = min(round_trip(True, size) for _ in range(3))
+        split = min(round_trip(False, size) for _ in range(3))
+        print(f'{size:7} bytes   one send {joined:6.1f} us   two sends {split:6.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""HeaderMap against the CaseInsensitiveDict it replaced on the request
+path, for the same 13 browser headers.
+
+The old dict is copied here as it was: MutableMapping's get, items and
+update, which go through __getitem__ and lower() once per key. Parsing is
+what Request does with each: the old one split the decoded head into
+lines, the new one is handed the raw header bytes; both drop the cookie.
+Memory is tracemalloc's, per map, over a thousand of them.
+
+    python benchmarks/bench_headers.py
+"""
+import os
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Iterator, Mapping, MutableMapping, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from PandaHttpd.utils import HeaderMap
+
+
+class OldCaseInsensitiveDict(MutableMapping[str, str]):
+
+    def __init__(self, data: Optional[Mapping[str, str]] = None, **kwargs: str) -> None:
+        self._store: dict[str, str] = {}
+        self.update(data or {}, **kwargs)
+
+    def __setitem__(self, key: str, value: str) -> None:
+        self._store[key.lower()] = value
+
+    def __getitem__(self, key: str) -> str:
+        return self._store[key.lower()]
+
+    def __delitem__(self, key: str) -> None:
+        del self._store[key.lower()]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store)
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __contains__(self, key: object) -> bool:
+        if isinstance(key, str):
+            return key.lower() in self._store
+        return False
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._store.get(key.lower(), default)
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        return self._store.pop(key.lower(), default)
+
+
+RAW_HEADERS = (
+    b'\r\nHost: example.com'
+    b'\r\nUser-Agent: Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0'
+    b'\r\nAccept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+    b'\r\nAccept-Language: en-US,en;q=0.5'
+    b'\r\nAccept-Encoding: gzip, deflate, br'
+    b'\r\nReferer: https://example.com/articles/'
+    b'\r\nConnection: keep-alive'
+    b'\r\nCookie: session=8f14e45fceea167a5a36dedd4bea2543; theme=dark'
+    b'\r\nUpgrade-Insecure-Requests: 1'
+    b'\r\nSec-Fetch-Dest: document'
+    b'\r\nSec-Fetch-Mode: navigate'
+    b'\r\nSec-Fetch-Site: same-origin'
+    b'\r\nPriority: u=0, i'
+    b'\r\n'
+)
+
+
+def old_parse(raw: bytes) -> OldCaseInsensitiveDict:
+    headers = OldCaseInsensitiveDict()
+    for line in raw.decode('utf-8').split('\r\n'):
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip()] = value.strip()
+    headers.pop('cookie', None)
+    return headers
+
+
+def new_parse(raw: bytes) -> HeaderMap:
+    headers = HeaderMap.parse(raw)
+    headers.pop('cookie', None)
+    return headers
+
+
+def lookups(headers) -> None:
+    headers.get('Content-Length')
+    headers.get('Content-Type')
+    headers.get('Host')
+    'Transfer-Encoding' in headers
+    'Expect' in headers
+    headers.get('Connection')
+
+
+def per_map(parse) -> float:
+    tracemalloc.start()
+    maps = [parse(RAW_HEADERS) for _ in range(1000)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del maps
+    return size / 1000
+
+
+def main() -> None:
+    number = 20000
+    old, new = old_parse(RAW_HEADERS), new_parse(RAW_HEADERS)
+    assert dict(old.items()) == dict(new.items())
+    for label, fn_old, fn_new in (
+        ('parse + drop cookie', lambda: old_parse(RAW_HEADERS), lambda: new_parse(RAW_HEADERS)),
+        ('6 get()/in lookups', lambda: lookups(old), lambda: lookups(new)),
+        ('items()', lambda: list(old.items()), lambda: list(new.items())),
+    ):
+        t_old = min(timeit.repeat(fn_old, number=number, repeat=5)) / number * 1e6
+        t_new = min(timeit.repeat(fn_new, number=number, repeat=5)) / number * 1e6
+        print(f'{label:20} CaseInsensitiveDict {t_old:6.2f} us   HeaderMap {t_new:6.2f} us')
+    print(f'{"memory per map":20} CaseInsensitiveDict {per_map(old_parse):6.0f} B    HeaderMap {per_map(new_parse):6.0f} B')
+
+
+if __name__ == '__main__':
+    main()
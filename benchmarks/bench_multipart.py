@@ -0,0 +1,88 @@
+"""MultipartParser against reading the body whole and splitting it on the
+boundary, for a body spooled to a temporary file, as a large upload is.
+
+Two forms: a 50 MiB file with three small fields, and twenty small fields
+of 8 KiB in all. The parser is fed the file in Request.BODY_CHUNK_SIZE
+chunks, as request.multipart() feeds it from stream(); its file parts go
+to temporary files of their own past Request.SPOOL_THRESHOLD. Peak is
+tracemalloc's, for one parse.
+
+    python benchmarks/bench_multipart.py
+"""
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from PandaHttpd.http import Request
+from PandaHttpd.utils import MultipartParser
+
+BOUNDARY = b'----WebKitFormBoundary7MA4YWxkTrZu0gW'
+
+
+def form(fields, files=()) -> bytes:
+    parts = [
+        b'Content-Disposition: form-data; name="%s"\r\n\r\n%s' % (name, value)
+        for name, value in fields
+    ] + [
+        b'Content-Disposition: form-data; name="%s"; filename="%s"\r\n'
+        b'Content-Type: application/octet-stream\r\n\r\n%s' % (name, name + b'.bin', value)
+        for name, value in files
+    ]
+    return b''.join(b'--' + BOUNDARY + b'\r\n' + part + b'\r\n' for part in parts) + b'--' + BOUNDARY + b'--\r\n'
+
+
+CASES = {
+    '50 MiB file + 3 fields': form(
+        [(b'title', b'holiday'), (b'album', b'2024'), (b'public', b'on')],
+        [(b'upload', os.urandom(50 * 1024 * 1024))],
+    ),
+    '20 fields, 8 KiB in all': form([(b'field%d' % i, b'v' * 400) for i in range(20)]),
+}
+
+
+def split_whole(body_file) -> dict:
+    body_file.seek(0)
+    data = body_file.read()
+    parts = {}
+    for part in data.split(b'--' + BOUNDARY)[1:-1]:
+        head, _, value = part[2:-2].partition(b'\r\n\r\n')
+        name = head.split(b'name="', 1)[1].split(b'"', 1)[0]
+        parts[name.decode()] = value
+    return parts
+
+
+def parse_streaming(body_file) -> dict:
+    body_file.seek(0)
+    parser = MultipartParser(BOUNDARY, spool_threshold=Request.SPOOL_THRESHOLD)
+    while chunk := body_file.read(Request.BODY_CHUNK_SIZE):
+        parser.feed(chunk)
+    multipart = parser.finish()
+    multipart.close()
+    return multipart
+
+
+def peak(fn, *args) -> int:
+    tracemalloc.start()
+    fn(*args)
+    result = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+
+def main() -> None:
+    for label, body in CASES.items():
+        with tempfile.TemporaryFile() as body_file:
+            body_file.write(body)
+            assert sorted(split_whole(body_file)) == sorted(parse_streaming(body_file)), label
+            number = 3 if len(body) > 1 << 20 else 2000
+            for name, fn in (('split', split_whole), ('parser', parse_streaming)):
+                per_parse = min(timeit.repeat(lambda: fn(body_file), number=number, repeat=3)) / number * 1e3
+                print(f'{label:24} {name:7} {per_parse:9.3f} ms   peak {peak(fn, body_file) / 1024:9.1f} KiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Router.resolve against the linear scan it replaced, at 10, 100 and 1000
+routes.
+
+Each app has, per resource, a literal route and one with a parameter --
+`/r{i}/items` and `/r{i}/items/{id:int}` -- and every lookup is for the
+last resource registered, the worst case for the scan. For the literal
+path, the scan compares paths as the old BaseRoute.match did; the old
+router had no parameters, so for the other it calls today's match().
+
+    python benchmarks/bench_router.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from PandaHttpd.route import Router
+
+
+def endpoint(**params):
+    return params
+
+
+def old_match(route, path: str, method: str) -> bool:
+    requested = method.upper()
+    if route.path != path:
+        return False
+    return route.method == requested or (requested == 'HEAD' and route.method == 'GET')
+
+
+def linear_scan(router: Router, path: str, method: str, match=None):
+    for route in router.routes:
+        if match(route, path, method) if match else route.match(path, method):
+            return route
+    return None
+
+
+def main() -> None:
+    number = 20000
+    for count in (10, 100, 1000):
+        router = Router()
+        for i in range(count // 2):
+            router.add_route(f'/r{i}/items', 'GET', endpoint)
+            router.add_route(f'/r{i}/items/{{id:int}}', 'GET', endpoint)
+        last = count // 2 - 1
+        for label, path, match in (('literal', f'/r{last}/items', old_match), ('param', f'/r{last}/items/42', None)):
+            assert router.resolve(path, 'GET')[0] is linear_scan(router, path, 'GET', match), path
+            scans = max(number // count, 10)
+            old = timeit.timeit(lambda: linear_scan(router, path, 'GET', match), number=scans) / scans * 1e6
+            new = timeit.timeit(lambda: router.resolve(path, 'GET'), number=number) / number * 1e6
+            print(f'{count:5} routes  {label:8} scan {old:9.2f} us   tree {new:6.2f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Throughput and server CPU time serving a large file, with FileResponse's
+sendfile() path and with the chunked read-and-send loop it replaced.
+
+The server runs in a child process, so that its CPU time is its own, and
+serves a temporary file of SIZE_MB; the client downloads it ROUNDS times
+over one keep-alive connection into a reused buffer, checking the first
+download against the file and only counting bytes after that.
+
+    python benchmarks/bench_sendfile.py [run|run_async] [SIZE_MB] [ROUNDS]
+"""
+import hashlib
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import psutil
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+SERVER = '''
+import logging, sys
+sys.path.insert(0, {src!r})
+from PandaHttpd import PandaHttpd, PandaLogger, StaticFiles
+from PandaHttpd.http import FileResponse
+FileResponse.use_sendfile = {use_sendfile}
+app = PandaHttpd(config={{'ip': '127.0.0.1', 'port': {port}}}, logger=PandaLogger(save_dir={logs!r}, level=logging.WARNING))
+app.mount('/files', StaticFiles({directory!r}))
+getattr(app, {runner!r})()
+'''
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def download(sock: socket.socket, request: bytes, buffer: memoryview, check: bool = False) -> bytes:
+    """Read one response; return a digest of its body if check."""
+    sock.sendall(request)
+    head = b''
+    while b'\r\n\r\n' not in head:
+        head += sock.recv(4096)
+    head, _, body = head.partition(b'\r\n\r\n')
+    length = int([line.split(b':', 1)[1] for line in head.split(b'\r\n') if line.lower().startswith(b'content-length:')][0])
+    digest = hashlib.md5(body)
+    remaining = length - len(body)
+    while remaining:
+        n = sock.recv_into(buffer, min(len(buffer), remaining))
+        if not n:
+            raise ConnectionError('closed early')
+        if check:
+            digest.update(buffer[:n])
+        remaining -= n
+    return digest.digest() if check else b''
+
+
+def measure(use_sendfile: bool, runner: str, path: str, rounds: int) -> tuple:
+    port = free_port()
+    directory = os.path.dirname(path)
+    script = SERVER.format(
+        src=SRC, use_sendfile=use_sendfile, port=port, runner=runner,
+        directory=directory, logs=os.path.join(directory, 'logs'),
+    )
+    server = subprocess.Popen([sys.executable, '-c', script])
+    try:
+        for _ in range(100):
+            try:
+                sock = socket.create_connection(('127.0.0.1', port))
+                break
+            except OSError:
+                time.sleep(0.05)
+        request = f'GET /files/{os.path.basename(path)} HTTP/1.1\r\nHost: x\r\n\r\n'.encode()
+        buffer = memoryview(bytearray(1 << 20))
+        # Also warms the page cache.
+        digest = download(sock, request, buffer, check=True)
+        process = psutil.Process(server.pid)
+        cpu_before = sum(process.cpu_times()[:2])
+        started = time.perf_counter()
+        for _ in range(rounds):
+            download(sock, request, buffer)
+        elapsed = time.perf_counter() - started
+        cpu = sum(process.cpu_times()[:2]) - cpu_before
+        sock.close()
+        return elapsed, cpu, digest
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    runner = sys.argv[1] if len(sys.argv) > 1 else 'run'
+    size_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'large.bin')
+        with open(path, 'wb') as f:
+            for _ in range(size_mb):
+                f.write(os.urandom(1 << 20))
+        expected = hashlib.md5(open(path, 'rb').read()).digest()
+        total_gb = size_mb * rounds / 1024
+        for label, use_sendfile in (('chunked loop', False), ('sendfile', True)):
+            elapsed, cpu, digest = measure(use_sendfile, runner, path, rounds)
+            assert digest == expected, label
+            print(f'{runner:9} {label:12}  {total_gb / elapsed:6.2f} GB/s   server CPU {cpu / total_gb:6.2f} s/GB')
+
+
+if __name__ == '__main__':
+    main()
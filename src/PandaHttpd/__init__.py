@@ -3,7 +3,7 @@ from . import utils
 from . import _typing
 
 from .app import PandaHttpd
-from .filehandler import FileHandler, StaticFiles
+from .filehandler import FileHandler, StaticCache, StaticFiles
 from .route import Router, BaseRoute, Route, Mount
 from .utils import PandaLogger
 
@@ -15,6 +15,7 @@ __all__ = [
     'PandaHttpd',
     'FileHandler',
     'StaticFiles',
+    'StaticCache',
     'BaseRoute',
     'Route',
     'Mount',
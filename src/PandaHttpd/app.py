@@ -1,20 +1,79 @@
-from .filehandler import FileHandler
-from .http import JsonResponse, Response, Request
+from .filehandler import FileHandler, StaticCache
+from .http import HttpStatus, JsonResponse, PlainTextResponse, Response, Request, RequestError
 from .middleware import Middleware, BaseMiddleware, DefaultMiddleware
 from .route import Router, BaseRoute
-from .utils import CaseInsensitiveDict, PandaLogger, lgreen, lred
-from ._typing import Socket, GenericHandler, HeaderHandler, UserFunc, HasPrefix
+from .utils import BodyDecoder, CaseInsensitiveDict, MappingStr, PandaLogger, lgreen, lred
+from .server import Admission, ConcurrencyLimiter, HttpProtocol, Intake, Metrics, SocketOptions, Supervisor, TimerHeap, handover, listeners
+from .server.intake import refuse, reject
+from .server.listeners import Address
+from ._typing import Socket, GenericHandler, UserFunc, HasPrefix
 
+import asyncio
+import itertools
+import os
 import psutil
+import signal
 import socket
+import threading
+import time
 import traceback
 from concurrent.futures import ThreadPoolExecutor
 
-from typing import Any, Callable, Dict, Type, Tuple, Optional, Sequence
+from typing import Any, Callable, Dict, Iterable, List, Set, Type, Tuple, Optional, Sequence
 from nguyenpanda.swan import green, blue
 
 
 class PandaHttpd:
+
+    #: How long a persistent connection may sit between requests. Short on
+    #: purpose: an idle connection still holds a worker thread.
+    KEEP_ALIVE_TIMEOUT_SECONDS: float = 5.0
+    #: Requests served on one connection before it is closed anyway, so a
+    #: single busy client cannot hold a worker indefinitely.
+    KEEP_ALIVE_MAX_REQUESTS: int = 100
+    #: Longest the serving loop goes without checking whether to stop.
+    ACCEPT_POLL_SECONDS: float = 0.5
+    #: Bodies up to this size are buffered by the intake before a worker sees
+    #: the request; larger ones are read by the worker itself.
+    INTAKE_BODY_LIMIT: int = 1024 * 1024
+    #: Default ceiling for adaptive concurrency, per physical core; the floor
+    #: is one per core. Room for endpoints that mostly wait on I/O, which the
+    #: limiter only grows into while latency shows it helps.
+    MAX_WORKERS_PER_CORE: int = 8
+    #: Connections allowed to wait for a worker, per worker thread, before
+    #: more are turned away with a 503.
+    QUEUED_PER_WORKER: int = 16
+    #: Longest a connection may wait for a worker before it is answered with a
+    #: 503 instead: by then its client has most likely stopped waiting.
+    MAX_QUEUE_WAIT_SECONDS: float = 5.0
+    #: How long a stopping server gives requests already accepted to finish.
+    GRACEFUL_TIMEOUT_SECONDS: float = 30.0
+    #: From a request's first byte to the end of its head. Not extended by
+    #: progress: a client trickling a header a byte at a time gets no longer.
+    HEADER_TIMEOUT_SECONDS: float = 10.0
+    #: To receive a body, plus a second for every MIN_TRANSFER_RATE bytes.
+    BODY_TIMEOUT_SECONDS: float = 20.0
+    #: To send a response, plus a second for every MIN_TRANSFER_RATE bytes.
+    WRITE_TIMEOUT_SECONDS: float = 30.0
+    #: Bytes per second below which a body or response transfer times out.
+    MIN_TRANSFER_RATE: int = 500
+    #: Request bodies larger than this go to a temporary file, not memory.
+    BODY_SPOOL_THRESHOLD: int = Request.SPOOL_THRESHOLD
+    #: The largest request body accepted, unless a route sets its own limit.
+    MAX_BODY_SIZE: int = Request.MAX_BODY_SIZE
+    #: The largest request head accepted; at most Request.MAX_HEADER_SIZE.
+    MAX_HEADER_SIZE: int = Request.MAX_HEADER_SIZE
+    #: The longest request target accepted.
+    MAX_URL_LENGTH: int = Request.MAX_URL_LENGTH
+    #: The most a compressed request body may decompress to, in all and per
+    #: byte received.
+    MAX_DECODED_SIZE: int = Request.MAX_DECODED_SIZE
+    MAX_DECODED_RATIO: float = Request.MAX_DECODED_RATIO
+    #: Memory for the static files every mount shares, compressed copies
+    #: included; 0 reads them from disk on every request.
+    STATIC_CACHE_SIZE: int = 32 * 1024 * 1024
+    #: How stale a cached static file may get before it is statted again.
+    STATIC_CACHE_REVALIDATE_SECONDS: float = 1.0
     
     def __init__(self, 
         config: Dict[str, Any],
@@ -31,6 +90,56 @@ class PandaHttpd:
         self._config: Dict[str, Any] = config
         self._ip: str = str(config.get('ip', '0.0.0.0'))
         self._port: int = int(config.get('port', 80))
+        self._keep_alive_timeout: float = float(config.get('keep_alive_timeout', self.KEEP_ALIVE_TIMEOUT_SECONDS))
+        self._keep_alive_max_requests: int = int(config.get('keep_alive_max_requests', self.KEEP_ALIVE_MAX_REQUESTS))
+        self._workers: int = int(config.get('workers', 1))
+
+        self._graceful_timeout: float = float(config.get('graceful_timeout', self.GRACEFUL_TIMEOUT_SECONDS))
+        self._header_timeout: float = float(config.get('header_timeout', self.HEADER_TIMEOUT_SECONDS))
+        self._body_timeout: float = float(config.get('body_timeout', self.BODY_TIMEOUT_SECONDS))
+        self._write_timeout: float = float(config.get('write_timeout', self.WRITE_TIMEOUT_SECONDS))
+        self._min_transfer_rate: int = int(config.get('min_transfer_rate', self.MIN_TRANSFER_RATE))
+        self._body_spool_threshold: int = int(config.get('body_spool_threshold', self.BODY_SPOOL_THRESHOLD))
+        self._max_body_size: int = int(config.get('max_body_size', self.MAX_BODY_SIZE))
+        self._max_header_size: int = int(config.get('max_header_size', self.MAX_HEADER_SIZE))
+        self._max_url_length: int = int(config.get('max_url_length', self.MAX_URL_LENGTH))
+        self._max_decoded_size: int = int(config.get('max_decoded_size', self.MAX_DECODED_SIZE))
+        self._max_decoded_ratio: float = float(config.get('max_decoded_ratio', self.MAX_DECODED_RATIO))
+        if not 0 < self._max_header_size <= Request.MAX_HEADER_SIZE:
+            raise ValueError(f'max_header_size must be between 1 and {Request.MAX_HEADER_SIZE}')
+        self.socket_options: SocketOptions = SocketOptions(config.get('socket_options'))
+        static_cache_size = int(config.get('static_cache_size', self.STATIC_CACHE_SIZE))
+        self.static_cache: Optional[StaticCache] = StaticCache(
+            max_bytes=static_cache_size,
+            revalidate_after=float(config.get('static_cache_revalidate', self.STATIC_CACHE_REVALIDATE_SECONDS)),
+            compress=bool(config.get('static_cache_gzip', True)),
+        ) if static_cache_size > 0 else None
+
+        # Where to listen: `bind` -- one address or several -- or else ip:port.
+        bind = config.get('bind')
+        if bind is None:
+            self._addresses: List[Address] = [Address('tcp', host=self._ip, port=self._port)]
+        else:
+            self._addresses = [Address.parse(address) for address in ([bind] if isinstance(bind, str) else bind)]
+        self._unix_socket_mode: Optional[int] = listeners.parse_mode(config.get('unix_socket_mode'))
+
+        # Set, through stop(), to make the serving loop stop accepting, drain
+        # and return: on SIGTERM, or in a pre-forked worker that has served
+        # its request budget, see retire_after().
+        self._stopping = threading.Event()
+        self._stop_deadline: float = 0.0
+        self._listeners: List[Socket] = []
+        self._shared_listeners: Optional[List[Socket]] = None
+        # Socket files this process created, with their inodes, to remove on
+        # the way out -- unless a successor has been handed them.
+        self._unix_paths: List[Tuple[str, int]] = []
+        self._handed_over: bool = False
+        self._predecessor: Optional[int] = None
+        self._request_budget: int = 0
+        self._request_counter = itertools.count(1)
+        self._retire_announce: Optional[Callable[[], None]] = None
+        self._intake: Optional[Intake] = None
+        self.metrics: Metrics = Metrics()
         
         self.router: Router = Router(routes=routes, default_handler=default_handler)
         self.middle_ware: Middleware = Middleware(
@@ -41,10 +150,15 @@ class PandaHttpd:
             if isinstance(logger, PandaLogger) \
             else PandaLogger().setup()
         self.logger.debug(f'PandaHttpd Initialized with IP: {self.ip}, Port: {self.port}')
+        if self.socket_options.unsupported:
+            self.logger.warning(f'Socket options not available on this platform, ignored: {", ".join(self.socket_options.unsupported)}')
 
     def route(self, 
         path: str, method: str = 'GET',
         response_class: Type[Response] = JsonResponse,
+        body_limit: Optional[int] = None,
+        content_types: Optional[Iterable[str]] = None,
+        middleware: Optional[Sequence[BaseMiddleware]] = None,
     ) -> Callable[[UserFunc], UserFunc]:
         
         path = self.prefix + path if self.prefix != '/' else path
@@ -54,6 +168,9 @@ class PandaHttpd:
                 method=method, 
                 endpoint=endpoint,
                 response_class=response_class,
+                body_limit=body_limit,
+                content_types=content_types,
+                middleware=middleware,
             )
             self.logger.debug(f'[Registered]: [{method.upper():^6}] `{blue(endpoint.__name__)}` -> `{green(path)}`')
             return endpoint
@@ -63,6 +180,7 @@ class PandaHttpd:
         path: str, 
         handler: HasPrefix, 
         file_handler: FileHandler | None = None,
+        middleware: Optional[Sequence[BaseMiddleware]] = None,
     ) -> None:
         
         path = self.prefix + path if self.prefix != '/' else path
@@ -70,11 +188,14 @@ class PandaHttpd:
             path=path,
             handler=handler,
             file_handler=file_handler,
+            middleware=middleware,
+            cache=self.static_cache,
         )
         self.logger.debug(f'[Mounted]: `{blue(path)}` -> `{green(handler.prefix)}`')
     
-    def middleware(self):
-        pass
+    def middleware(self, middleware: BaseMiddleware) -> None:
+        """Add a middleware to the app's stack, innermost so far."""
+        self.middle_ware.add_middleware(middleware)
     
     def set_default_handler(self, handler: GenericHandler) -> None:
         self.router.set_default_handler(handler)
@@ -95,76 +216,561 @@ class PandaHttpd:
     @property
     def prefix(self) -> str:
         return self._prefix
+
+    @property
+    def stopping(self) -> bool:
+        """Whether the server has been told to stop taking new work."""
+        return self._stopping.is_set()
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @property
+    def max_workers(self) -> int:
+        """The ceiling for adaptive concurrency, and the size of the pool:
+        MAX_WORKERS_PER_CORE per physical core unless configured."""
+        return int(self.config.get('max_workers', self._cores() * self.MAX_WORKERS_PER_CORE))
+
+    @property
+    def min_workers(self) -> int:
+        """The floor for adaptive concurrency: one per physical core unless
+        configured. Set it to max_workers for a pool of a fixed size."""
+        return min(self.max_workers, int(self.config.get('min_workers', self._cores())))
+
+    @staticmethod
+    def _cores() -> int:
+        return psutil.cpu_count(False) or 1
+
+    @property
+    def graceful_timeout(self) -> float:
+        return self._graceful_timeout
+
+    @property
+    def keep_alive_timeout(self) -> float:
+        return self._keep_alive_timeout
+
+    @property
+    def keep_alive_max_requests(self) -> int:
+        return self._keep_alive_max_requests
+
+    @property
+    def header_timeout(self) -> float:
+        return self._header_timeout
+
+    @property
+    def body_timeout(self) -> float:
+        return self._body_timeout
+
+    @property
+    def write_timeout(self) -> float:
+        return self._write_timeout
+
+    @property
+    def min_transfer_rate(self) -> int:
+        return self._min_transfer_rate
+
+    @property
+    def body_spool_threshold(self) -> int:
+        return self._body_spool_threshold
+
+    @property
+    def max_body_size(self) -> int:
+        return self._max_body_size
+
+    @property
+    def max_header_size(self) -> int:
+        return self._max_header_size
+
+    @property
+    def max_url_length(self) -> int:
+        return self._max_url_length
+
+    def new_request(self, client_connection: Optional[Socket], buffer: bytes | bytearray = b'') -> Request:
+        """A Request with this app's limits, for either engine to parse into."""
+        return Request(
+            client_connection,
+            buffer=buffer,
+            spool_threshold=self._body_spool_threshold,
+            max_header_size=self._max_header_size,
+            max_url_length=self._max_url_length,
+            max_decoded_size=self._max_decoded_size,
+            max_decoded_ratio=self._max_decoded_ratio,
+        )
+
+    def count_rejection(self, error: RequestError, client_address: Tuple[str, int]) -> None:
+        """Log a request refused with a RequestError, and count it: `rejected`
+        and `rejected_<status>` in metrics."""
+        self.metrics.incr('rejected')
+        self.metrics.incr(f'rejected_{error.status.code}')
+        self.logger.warning(f'[Rejected] {error.status.code} {error.status.phrase}: {client_address} -> {error}')
+
+    def body_limit(self, request: Request) -> int:
+        """The most body a request may carry: its route's body_limit, or
+        max_body_size. Asked once the head is in, before the body is read."""
+        route, _ = self.match(request)
+        if route is not None and route.body_limit is not None:
+            return route.body_limit
+        return self._max_body_size
+
+    def match(self, request: Request) -> Tuple[Optional[BaseRoute], Dict[str, Any]]:
+        """The route for a request and its path parameters, resolved on the
+        first call and kept on the request for the rest: body_limit(),
+        expect_continue() and routing all ask."""
+        if request.route_match is None:
+            request.route_match = self.router.resolve(request.path, request.method)
+        return request.route_match
+
+    def _refusal_of(self, request: Request) -> Optional[HttpStatus]:
+        """refusal() for the request's own route, worked out once."""
+        if request.route_refusal is None:
+            request.route_refusal = (self.refusal(request, self.match(request)[0]),)
+        return request.route_refusal[0]
+
+    def refusal(self, request: Request, route: Optional[BaseRoute]) -> Optional[HttpStatus]:
+        """Why the body of a request would be refused without being looked
+        at -- no route takes it, it is over the route's body_limit, or of a
+        media type or Content-Encoding the route cannot take -- or None."""
+        if route is None:
+            return HttpStatus.NOT_FOUND
+        if not request.chunked and request.content_length <= 0:
+            return None
+        limit = route.body_limit if route.body_limit is not None else self._max_body_size
+        if request.content_length > limit:
+            return HttpStatus.PAYLOAD_TOO_LARGE
+        if not route.accepts(request.header('content-type')):
+            return HttpStatus.UNSUPPORTED_MEDIA_TYPE
+        encoding = request.content_encoding
+        if encoding and encoding not in BodyDecoder.ENCODINGS:
+            return HttpStatus.UNSUPPORTED_MEDIA_TYPE
+        return None
+
+    def expect_continue(self, request: Request) -> bool:
+        """Whether a request that sent `Expect: 100-continue` is to be told
+        to go ahead and send its body.
+
+        A client that asks waits, for a second or so, before sending a body
+        it may be about to upload for nothing. Answering 100 Continue only if
+        the body would be taken, and the final 404, 413 or 415 straight away
+        otherwise -- from dispatch(), with the body left unread and the
+        connection closed after -- saves the client the upload and the
+        server the reading.
+        """
+        return self._refusal_of(request) is None
     
-    def handle_client(self, client_connection: Socket, client_address: Tuple[str, int]) -> None:
+    def handle_client(self,
+        client_connection: Socket,
+        client_address: Tuple[str, int],
+        buffer: bytes | bytearray = b'',
+        served: int = 0,
+    ) -> None:
+        """Serve the requests a connection carries, then close it.
+
+        The connection is kept for as long as the client asks for it, each
+        request was read to its end, and each response said where it ends --
+        within keep_alive_max_requests, and never idle for longer than
+        keep_alive_timeout between requests.
+
+        Under serve(), the wait for the next request is not spent here: the
+        connection goes back to the intake, and comes round again -- as buffer,
+        already read -- once that request is whole.
+        """
+        intake = self._intake
+        leftover = buffer
+        resumed = False
         try:
-            # Handle Request
-            request = Request(client_connection)
-            request.handle()
-            
-            real_ip: str = request.headers.get('cf-connecting-ip', client_address[0])
-            self.logger.info(f'[Requested] IP=`{real_ip}` | Method=`{request.method}` | Path=`{request.path}`')
-            
-            # TODO: Pre-Middleware (This part is not implemented yet)
-            dict_headers = self.middle_ware.pre(CaseInsensitiveDict(), request)
-            
-            # Find Route
-            route: Optional[BaseRoute] = self.router.find_route(request.path, request.method)
-            if not route:
-                self.logger.error(f'[Response] 404 Not Found: No route for {request.method} {request.path}, using default handler.')
-                response_func: HeaderHandler = self.router.default_handler
-            else:
-                response_func: HeaderHandler = route.handle
-            
-            # Generate Response
-            # TODO: MUST USE `request.headers` to custom the header passed in response
-            args, kwargs = [], {}
-            response: Response = response_func(dict_headers=dict_headers, *args, **kwargs)
-            
-            # TODO: Post-Middleware (This part is not implemented yet)
-            response: Response = self.middle_ware.post(dict_headers, response)
-
-            # HEAD was routed to the GET handler, so the response is fully
-            # built -- headers, Content-Length and all. Only the body is
-            # withheld, and only at the last moment, so HEAD and GET cannot
-            # report different things about the same resource.
-            if request.method.upper() == 'HEAD':
-                response.suppress_body = True
-
-            # Send Response
-            response(client_connection, None)
-            
+            while True:
+                # Handle Request
+                request = self.new_request(client_connection, buffer=leftover)
+                body_deadline = intake.body_deadline(client_connection) if intake is not None else None
+                try:
+                    request.handle(
+                        idle_timeout=self.keep_alive_timeout if served else None,
+                        on_receive=body_deadline,
+                        body_limit=self.body_limit,
+                        on_continue=self.expect_continue,
+                    )
+                except TimeoutError:
+                    # The socket's own timeout, mid-head or mid-body: answered
+                    # and counted as the intake answers its deadlines.
+                    phase = 'body' if request.method else 'header'
+                    self.metrics.incr('timeout')
+                    self.metrics.incr(f'timeout_{phase}')
+                    reject(client_connection)
+                    return
+                finally:
+                    # Whatever happened to the read: left armed, the timer
+                    # would cut off -- and count -- a connection already gone.
+                    if body_deadline is not None:
+                        body_deadline.cancel()
+                if body_deadline is not None and body_deadline.expired:
+                    intake.reject(client_connection)
+                    break
+                if not request.method:
+                    # Closed by the client, or idle past the timeout.
+                    break
+                served += 1
+
+                response = self.dispatch(request, client_address)
+
+                keep_alive = (
+                    request.keep_alive
+                    and request.complete
+                    and response.has_framed_body
+                    and served < self.keep_alive_max_requests
+                    and not self._stopping.is_set()
+                )
+                response.declare_connection(
+                    keep_alive,
+                    timeout=self.keep_alive_timeout,
+                    max_requests=self.keep_alive_max_requests - served,
+                )
+
+                # Send Response
+                write_deadline = None
+                if intake is not None:
+                    size = 0 if response.suppress_body else int(response.header.get(b'content-length', 0))
+                    write_deadline = intake.write_deadline(client_connection, size)
+                try:
+                    response(client_connection, None)
+                finally:
+                    if write_deadline is not None:
+                        write_deadline.cancel()
+                    request.close()
+                if not keep_alive:
+                    break
+                leftover = request.leftover
+                if intake is not None:
+                    intake.resume(client_connection, client_address, leftover, served)
+                    resumed = True
+                    return
+
             try:
                 client_connection.shutdown(socket.SHUT_WR)
             except OSError:
                 pass
-            self.logger.debug(f'Success handling client {client_address}')
+            self.logger.debug(f'Success handling client {client_address} ({served} requests)')
+        except RequestError as e:
+            self.count_rejection(e, client_address)
+            refuse(client_connection, e)
         except Exception as e:
             tb_list = traceback.extract_tb(e.__traceback__)
             filename, line, func, text = tb_list[-1]
             self.logger.error(f'Error handling client {client_address} in {filename}:{line} \n\t {text} -> {e}')
         finally:
-            client_connection.close()
+            if not resumed:
+                client_connection.close()
+
+    def retire_after(self, requests: int, announce: Optional[Callable[[], None]] = None) -> None:
+        """Stop serving once this many requests have been dispatched.
+
+        Meant for a pre-forked worker: the supervisor replaces it with a fresh
+        process, which is what bounds the memory a long-lived one accumulates.
+        Connections already accepted are finished first.
+
+        With announce, reaching the budget calls it instead of stopping: the
+        caller -- the supervisor -- gets to start the replacement first, and
+        stops this process, with SIGTERM, once that one is listening.
+        """
+        self._request_budget = requests
+        self._retire_announce = announce
+
+    def dispatch(self, request: Request, client_address: Tuple[str, int]) -> Response:
+        """Turn one parsed request into the response to send for it."""
+        real_ip: str = request.header('cf-connecting-ip', client_address[0])
+        self.logger.info(f'[Requested] IP=`{real_ip}` | Method=`{request.method}` | Path=`{request.path}`')
+        
+        # The app's middleware around routing, and the route's own, if it
+        # has any, around its endpoint. Either can answer before the end.
+        response: Response = self.middle_ware.run(CaseInsensitiveDict(), request, self._route)
+
+        if self._request_budget and next(self._request_counter) == self._request_budget:
+            if self._retire_announce is not None:
+                self._retire_announce()
+            else:
+                self.stop()
+
+        # HEAD was routed to the GET handler, so the response is fully
+        # built -- headers, Content-Length and all. Only the body is
+        # withheld, and only at the last moment, so HEAD and GET cannot
+        # report different things about the same resource.
+        if request.method.upper() == 'HEAD':
+            response.suppress_body = True
+        return response
             
+    def _route(self, dict_headers: MappingStr, request: Request) -> Response:
+        route, path_params = self.match(request)
+        refusal = self._refusal_of(request)
+        if not route:
+            self.logger.error(f'[Response] 404 Not Found: No route for {request.method} {request.path}, using default handler.')
+            return self.router.default_handler(dict_headers=dict_headers)
+        if refusal is not None:
+            self.logger.error(f'[Response] {refusal.code} {refusal.phrase}: {request.method} {request.path}')
+            return PlainTextResponse(
+                status_code=refusal.code,
+                body=f'{refusal.code} {refusal.phrase}'.encode(),
+            )
+        if route.middleware is None:
+            return self._call_endpoint(route, path_params, dict_headers, request)
+        return route.middleware.run(
+            dict_headers, request,
+            lambda dict_headers, request: self._call_endpoint(route, path_params, dict_headers, request),
+        )
+
+    def _call_endpoint(self,
+        route: BaseRoute,
+        path_params: Dict[str, Any],
+        dict_headers: MappingStr,
+        request: Request,
+    ) -> Response:
+        try:
+            # What the endpoint's signature asks for: path and query
+            # parameters, the request, the body. See route.binder.
+            kwargs = route.bind(request, path_params)
+        except RequestError as e:
+            self.logger.error(f'[Response] {e.status.code} {e.status.phrase}: {request.method} {request.path} -> {e}')
+            return PlainTextResponse(
+                status_code=e.status.code,
+                body=f'{e.status.code} {e.status.phrase}: {e}'.encode(),
+            )
+        return route.handle(dict_headers, **kwargs)
+
+    def listen(self, reuse_port: bool = False) -> List[Socket]:
+        """Open every listener this process serves on, and return them.
+
+        Those of listen_shared() come first. TCP addresses that are not among
+        them are bound here -- with reuse_port, by each process for itself,
+        and the kernel spreads new connections between the processes.
+        """
+        shared = self.listen_shared()
+        backlog = int(self.config.get('listen', 1000))
+        own = [
+            listeners.bind_tcp(address, backlog, reuse_port, prepare=self.socket_options.apply_listener)
+            for address in self._addresses
+            if address.kind == 'tcp' and not any(listeners.same_address(sock, address) for sock in shared)
+        ]
+        self._listeners = shared + own
+        for sock in self._listeners:
+            effective = self.socket_options.effective(sock)
+            self.logger.info(f'Listening on {listeners.describe(sock)} with ' + ', '.join(f'{k}={v}' for k, v in effective.items()))
+        return self._listeners
+
+    def listen_shared(self) -> List[Socket]:
+        """Open the listeners every process of the server accepts on alike.
+
+        Those are what the process manager passed in by socket activation,
+        which take the place of `bind` entirely; else whatever a predecessor
+        handed over, then the Unix sockets and fd:// descriptors of `bind`.
+        Opened once, before any worker is forked, and never per process: a
+        Unix socket path can only be bound by one.
+        """
+        if self._shared_listeners is not None:
+            return self._shared_listeners
+
+        backlog = int(self.config.get('listen', 1000))
+        shared = listeners.take_activated_listeners()
+        if shared:
+            addresses: List[Address] = []
+            self.logger.info(f'Serving on {len(shared)} socket-activated listeners')
+        else:
+            shared = handover.take_inherited_listeners()
+            addresses = self._addresses
+            if shared:
+                self.logger.info(f'Serving on {len(shared)} listeners inherited from predecessor')
+        for sock in shared:
+            self.socket_options.apply_listener(sock)
+
+        for address in addresses:
+            if address.kind == 'fd' and not any(sock.fileno() == address.fd for sock in shared):
+                sock = listeners.adopt_fd(address.fd)
+                self.socket_options.apply_listener(sock)
+                shared.append(sock)
+            elif address.kind == 'unix':
+                # The file is this process's to remove on exit even if the
+                # socket was handed over: the predecessor leaves it alone.
+                if not any(listeners.same_address(sock, address) for sock in shared):
+                    shared.append(listeners.bind_unix(
+                        address, backlog, self._unix_socket_mode, prepare=self.socket_options.apply_listener,
+                    ))
+                self._unix_paths.append((address.path, os.stat(address.path).st_ino))
+
+        self._shared_listeners = shared
+        self._listeners = list(shared)
+        return shared
+
+    def _close_listeners(self) -> None:
+        for sock in self._listeners:
+            sock.close()
+        if not self._handed_over:
+            for path, inode in self._unix_paths:
+                listeners.unlink_if_ours(path, inode)
+        self._unix_paths = []
+
+    def stop(self) -> None:
+        """Stop accepting, and finish what was accepted within graceful_timeout.
+
+        Safe to call from a signal handler or any thread; SIGTERM does.
+        """
+        if not self._stopping.is_set():
+            self._stop_deadline = time.monotonic() + self.graceful_timeout
+            self._stopping.set()
+
+    def restart(self) -> None:
+        """Hand over to a fresh copy of this process, refusing no connections.
+
+        The successor inherits the listening socket, starts serving on it, and
+        only then tells this process to stop -- see `server.handover`. SIGHUP
+        and SIGUSR2 do this.
+        """
+        pid = handover.spawn_successor(self._listeners)
+        self._handed_over = True
+        self.logger.warning(f'Restarting: successor {pid} takes over once it is serving')
+
+    def _drain_time_left(self) -> float:
+        if not self._stop_deadline:
+            return self.graceful_timeout
+        return max(0.0, self._stop_deadline - time.monotonic())
+
+    def _install_signal_handlers(self) -> None:
+        # Python only delivers signals to the main thread, and only lets it
+        # install handlers; run() on another thread leaves them alone.
+        if threading.current_thread() is not threading.main_thread():
+            return
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        for signum in (signal.SIGHUP, signal.SIGUSR2):
+            signal.signal(signum, lambda signum, frame: self.restart())
+
+    def _retire_predecessor(self) -> None:
+        """Tell the process this one replaced, if any, that it can go."""
+        handover.retire(self._predecessor)
+        self._predecessor = None
+
     def run(self) -> None:
-        self.logger.info(f'Server running at {lgreen(f'http://{self.ip}:{self.port}')}')
+        self.logger.info(f'Server running at {lgreen(self._describe_addresses())}')
+        self._install_signal_handlers()
+        self._predecessor = handover.take_predecessor()
+        try:
+            if self.workers > 1:
+                Supervisor(self, self.serve).run()
+            else:
+                self.serve(self.listen())
+        finally:
+            self._close_listeners()
 
-        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        server_socket.bind((self.ip, self.port))
-        server_socket.listen(self.config.get('listen', 1000))
-        
+    def _describe_addresses(self) -> str:
+        return ', '.join(
+            f'http://{address}' if address.kind == 'tcp' else str(address)
+            for address in self._addresses
+        )
+
+    def serve(self, server_listeners: Sequence[Socket]) -> None:
+        """Accept connections on server_listeners until told to stop.
+
+        The accepting thread also reads: connections wait in its Intake until
+        a whole request has arrived, and only then go to the pool.
+        """
         try:
-            mw: int = int(self.config.get('max_workers', psutil.cpu_count(False)))
-            self.logger.info(f'Using `ThreadPoolExecutor` with max_workers={mw}')
+            mw: int = self.max_workers
+            limiter = ConcurrencyLimiter(
+                initial=min(mw, max(self.min_workers, self._cores())),
+                min_limit=self.min_workers,
+                max_limit=mw,
+            )
+            self.logger.info(f'Using `ThreadPoolExecutor` with max_workers={mw}'
+                + (f', concurrency adapting from {limiter.limit} within [{limiter.min_limit}, {mw}]' if limiter.adaptive else ''))
             with ThreadPoolExecutor(max_workers=mw) as pool:
-                while True:
-                    client_connection: Socket
-                    client_address: Tuple[str, int]
-                    client_connection, client_address = server_socket.accept()
-                    
-                    pool.submit(self.handle_client, client_connection, client_address)
+                timers = TimerHeap()
+                admission = Admission(
+                    pool,
+                    self.metrics,
+                    limiter,
+                    max_queued=int(self.config.get('max_queued', mw * self.QUEUED_PER_WORKER)),
+                    max_wait=float(self.config.get('max_queue_wait', self.MAX_QUEUE_WAIT_SECONDS)),
+                    retry_after=int(self.config.get('retry_after', 1)),
+                    timers=timers,
+                )
+                self._intake = Intake(
+                    self,
+                    server_listeners,
+                    lambda *args: admission.submit(self.handle_client, *args),
+                    body_limit=int(self.config.get('intake_body_limit', self.INTAKE_BODY_LIMIT)),
+                    timers=timers,
+                )
+                self._retire_predecessor()
+                try:
+                    # The loop wakes up this often to notice a request to stop,
+                    # the way socketserver's poll_interval does.
+                    self._intake.run(self._stopping, self.ACCEPT_POLL_SECONDS, self.graceful_timeout)
+                finally:
+                    self._intake.close()
+                    if not admission.drain(self._drain_time_left()):
+                        self.logger.warning(f'Drain deadline passed with {admission.in_flight} requests in flight, cutting them off')
+                        admission.abort()
+                        admission.drain()
         except KeyboardInterrupt:
             self.logger.warning('Stopping server by user request...')
         finally:
-            server_socket.close()
+            for sock in server_listeners:
+                sock.close()
+
+    def run_async(self) -> None:
+        """Serve on an asyncio event loop instead of a thread per connection.
+
+        Connections cost the loop nothing while they are idle or slow to send;
+        a worker thread is only taken once a request has fully arrived. Routes,
+        middleware and responses are the same objects run() uses.
+        """
+        self.logger.info(f'Server running at {lgreen(self._describe_addresses())} (asyncio)')
+        self._install_signal_handlers()
+        self._predecessor = handover.take_predecessor()
+        try:
+            if self.workers > 1:
+                Supervisor(self, self._serve_async_blocking).run()
+            else:
+                self._serve_async_blocking(self.listen())
+        finally:
+            self._close_listeners()
+
+    def _serve_async_blocking(self, server_listeners: Sequence[Socket]) -> None:
+        try:
+            asyncio.run(self.serve_async(server_listeners))
+        except KeyboardInterrupt:
+            self.logger.warning('Stopping server by user request...')
+        finally:
+            for sock in server_listeners:
+                sock.close()
+
+    async def serve_async(self, server_listeners: Sequence[Socket]) -> None:
+        loop = asyncio.get_running_loop()
+        mw: int = self.max_workers
+        self.logger.info(f'Using `asyncio` with a `ThreadPoolExecutor` of max_workers={mw}')
+        connections: Set[HttpProtocol] = set()
+        with ThreadPoolExecutor(max_workers=mw) as pool:
+            servers = [
+                await loop.create_server(lambda: HttpProtocol(self, pool, connections), sock=sock)
+                for sock in server_listeners
+            ]
+            self._retire_predecessor()
+            try:
+                while not self._stopping.is_set():
+                    await asyncio.sleep(self.ACCEPT_POLL_SECONDS)
+
+                # Drain: stop listening, close connections between requests,
+                # and give the rest until the deadline to finish theirs -- a
+                # busy one closes itself after its response, since the server
+                # is stopping.
+                for server in servers:
+                    server.close()
+                deadline = time.monotonic() + self._drain_time_left()
+                while connections and time.monotonic() < deadline:
+                    for protocol in [p for p in connections if p.idle]:
+                        protocol.close()
+                    await asyncio.sleep(0.05)
+                if connections:
+                    self.logger.warning(f'Drain deadline passed with {len(connections)} connections open, cutting them off')
+                    for protocol in list(connections):
+                        protocol.abort()
+            finally:
+                for server in servers:
+                    server.close()
+                    await server.wait_closed()
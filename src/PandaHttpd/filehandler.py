@@ -1,10 +1,16 @@
 from .http import Response, PlainTextResponse
+from .middleware import GZipMiddleware
 from ._typing import HeaderHandler
 from .utils import CaseInsensitiveDict
 
+import gzip
 import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate
 from pathlib import Path
-from typing import Callable, MutableMapping
+from typing import Callable, Dict, Hashable, List, MutableMapping, Optional, Tuple
 
 
 class FileHandler:
@@ -50,4 +56,194 @@ class StaticFiles:
     @property
     def prefix(self) -> Path:
         return self._directory
-        
\ No newline at end of file
+
+
+#: A body and the headers that describe it, ready to make a Response of.
+Variant = Tuple[bytes, Dict[str, str]]
+
+
+class StaticEntry:
+    """One file as StaticCache holds it: its bytes, and gzipped if that is
+    worth it, each with the headers to send them with."""
+
+    __slots__ = ('path', 'mtime_ns', 'size', 'checked_at', 'media_type', 'last_modified', 'identity', 'gzip', 'cost', 'aliases')
+
+    def __init__(self,
+        path: str,
+        stat: os.stat_result,
+        media_type: str,
+        identity: Variant,
+        gzipped: Optional[Variant],
+    ):
+        self.path: str = path
+        # What the file is checked against when revalidated.
+        self.mtime_ns: int = stat.st_mtime_ns
+        self.size: int = stat.st_size
+        self.checked_at: float = time.monotonic()
+        self.media_type: str = media_type
+        self.last_modified: str = identity[1]['Last-Modified']
+        self.identity: Variant = identity
+        self.gzip: Optional[Variant] = gzipped
+        self.cost: int = len(identity[0]) + (len(gzipped[0]) if gzipped else 0)
+        # The lookup keys that lead here; dropped with the entry.
+        self.aliases: List[Hashable] = []
+
+    def variant(self, accept_encoding: Optional[str]) -> Variant:
+        """The body and headers to answer a request with this Accept-Encoding."""
+        if self.gzip is not None and GZipMiddleware.accepts(accept_encoding):
+            return self.gzip
+        return self.identity
+
+
+class StaticCache:
+    """
+    Small static files held in memory, with everything a response needs
+    worked out once: the bytes, ETag, Last-Modified and content type, and a
+    gzipped copy of the ones worth compressing.
+
+    Entries are filed by resolved path, so two mounts of one directory
+    share them, and looked up by a key of the caller's -- for a Mount, its
+    directory and the request path -- so that a hit needs no resolve(), no
+    stat() and no read. At most every `revalidate_after` seconds, a hit is
+    instead a miss: the caller resolves and stats the file again, and put()
+    keeps the entry if its mtime and size are unchanged, or reads it anew.
+    A file edited in place is therefore served stale for up to that long.
+
+    What the entries hold, compressed copies included, is kept to
+    `max_bytes` by dropping the least recently used. Safe to share between
+    threads; files are read and compressed outside the lock.
+    """
+
+    #: Lookup keys kept per entry. Past this, another spelling of the same
+    #: path -- `/static/./a.css` -- is resolved and statted on every request
+    #: instead, so that it cannot be used to grow the cache.
+    MAX_ALIASES: int = 8
+
+    def __init__(self,
+        max_bytes: int = 32 * 1024 * 1024,
+        revalidate_after: float = 1.0,
+        compress: bool = True,
+        compress_level: int = 6,
+        compress_min_size: int = GZipMiddleware.GZIP_MIN_SIZE,
+    ):
+        self.max_bytes: int = max_bytes
+        self.revalidate_after: float = revalidate_after
+        self.compress: bool = compress
+        self.compress_level: int = compress_level
+        self.compress_min_size: int = compress_min_size
+        # Resolved path -> entry, least recently used first.
+        self._entries: OrderedDict[str, StaticEntry] = OrderedDict()
+        # Lookup key -> resolved path.
+        self._aliases: Dict[Hashable, str] = {}
+        self._bytes: int = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Bytes held, compressed copies included."""
+        return self._bytes
+
+    def get(self, key: Hashable) -> Optional[StaticEntry]:
+        """The entry key leads to, if it was checked recently enough."""
+        with self._lock:
+            path = self._aliases.get(key)
+            if path is None:
+                return None
+            entry = self._entries[path]
+            self._entries.move_to_end(path)
+        if time.monotonic() - entry.checked_at >= self.revalidate_after:
+            return None
+        return entry
+
+    def put(self, key: Hashable, path: Path, stat: os.stat_result, media_type: str) -> Optional[StaticEntry]:
+        """The entry for the file at resolved path, now statted, under key:
+        the one held if the file is unchanged, else read anew. None if it
+        does not fit, or changed while being read."""
+        resolved = str(path)
+        with self._lock:
+            entry = self._entries.get(resolved)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                entry.checked_at = time.monotonic()
+                self._entries.move_to_end(resolved)
+                self._alias(key, entry)
+                return entry
+        if stat.st_size > self.max_bytes:
+            return None
+
+        with path.open('rb') as f:
+            body = f.read()
+        if len(body) != stat.st_size:
+            return None
+        entry = self._load(resolved, stat, media_type, body)
+        if entry.cost > self.max_bytes:
+            return None
+
+        with self._lock:
+            previous = self._entries.pop(resolved, None)
+            if previous is not None:
+                self._bytes -= previous.cost
+                entry.aliases = previous.aliases
+            self._entries[resolved] = entry
+            self._bytes += entry.cost
+            self._alias(key, entry)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.cost
+                for alias in evicted.aliases:
+                    if self._aliases.get(alias) == evicted.path:
+                        del self._aliases[alias]
+        return entry
+
+    def forget(self, key: Hashable) -> None:
+        """Stop key leading anywhere: its file is gone, or is not one to
+        serve. The entry itself is left to be evicted."""
+        with self._lock:
+            self._aliases.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._aliases.clear()
+            self._bytes = 0
+
+    def _alias(self, key: Hashable, entry: StaticEntry) -> None:
+        # Under the lock.
+        if self._aliases.get(key) == entry.path:
+            return
+        if len(entry.aliases) >= self.MAX_ALIASES:
+            self._aliases.pop(key, None)
+            return
+        self._aliases[key] = entry.path
+        entry.aliases.append(key)
+
+    def _load(self, path: str, stat: os.stat_result, media_type: str, body: bytes) -> StaticEntry:
+        etag = f'{stat.st_size:x}-{int(stat.st_mtime):x}'
+        headers = {
+            'ETag': f'"{etag}"',
+            'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+            'Accept-Ranges': 'bytes',
+        }
+        gzipped: Optional[Variant] = None
+        if self.compress and self._compressible(media_type, body):
+            # Whichever is sent, a cache between here and the client has to
+            # know that the other exists.
+            headers['Vary'] = 'Accept-Encoding'
+            compressed = gzip.compress(body, compresslevel=self.compress_level, mtime=0)
+            if len(compressed) < len(body):
+                gzipped = (compressed, {
+                    **headers,
+                    # Another representation, so another entity tag: a
+                    # client holding one must not be told it has the other.
+                    'ETag': f'"{etag}-gzip"',
+                    'Content-Encoding': 'gzip',
+                })
+        return StaticEntry(path, stat, media_type, (body, headers), gzipped)
+
+    def _compressible(self, media_type: str, body: bytes) -> bool:
+        if len(body) < self.compress_min_size:
+            return False
+        media_type = media_type.lower()
+        return any(media_type.startswith(t) for t in GZipMiddleware.GZIP_CONTENT_TYPES)
@@ -1,6 +1,7 @@
 from .request import (
     HttpConnection, 
     Request,
+    RequestError,
 )
 from .response import (
     Response,
@@ -27,6 +28,7 @@ from .status import HttpStatus
 __all__ = [
     'HttpStatus',
     'Request',
+    'RequestError',
     'Response',
     'FileResponse',
     'PlainTextResponse',
@@ -1,15 +1,95 @@
 from ..utils import (
-    CaseInsensitiveDict, 
     CookieDict,
+    HeaderMap,
+    BufferPool,
+    MultiDict,
     UrlParser,
     RequestBodyParser,
+    ChunkedDecoder,
+    BodyDecoder,
+    MultipartParser,
+    MultipartForm,
 )
 
 
-from typing import Any, Tuple, Dict, Optional
+from .status import HttpStatus
+
+import re
+import tempfile
+from typing import IO, Any, Callable, Iterator, List, Tuple, Dict, Optional
 from .._typing import Socket
 
 
+#: Stands in for a value not worked out yet, where None is a value.
+_UNPARSED: Any = object()
+
+# What a request line may hold, the usual values first, so that checking
+# them costs a set lookup.
+_COMMON_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+_COMMON_VERSIONS = frozenset(('HTTP/1.1', 'HTTP/1.0'))
+_METHOD = re.compile(r"[!#$%&'*+\-.^_`|~0-9A-Za-z]+")
+_VERSION = re.compile(r'HTTP/\d\.\d')
+
+
+def _decode(raw: bytes | bytearray | memoryview) -> str:
+    try:
+        return str(raw, 'utf-8')
+    except UnicodeDecodeError:
+        return str(raw, 'iso-8859-1')
+
+
+#: Sent to a client waiting, after `Expect: 100-continue`, to send its body.
+CONTINUE_RESPONSE: bytes = b'HTTP/1.1 100 Continue\r\n\r\n'
+
+
+class RequestError(ValueError):
+    """A request refused before it could be handled, with the status that
+    says why: a ValueError like any other parsing error, and one that can be
+    answered rather than only dropped."""
+
+    def __init__(self, status: HttpStatus, reason: str) -> None:
+        super().__init__(reason)
+        self.status: HttpStatus = status
+
+
+def head_too_large(buffer: bytes | bytearray, limit: int) -> RequestError:
+    """What to refuse a head that has outgrown limit with: 414 if not even
+    its request line has ended -- it is all target -- and 431 otherwise."""
+    if buffer.find(b'\r\n', 0, limit) < 0:
+        return RequestError(HttpStatus.URI_TOO_LONG, 'Request URI too long')
+    return RequestError(HttpStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, 'Request header too large')
+
+
+class BodyBuffer:
+    """A body of no known length, as it is received: in memory up to the
+    threshold, and from there on in a temporary file."""
+
+    __slots__ = ('threshold', '_memory', '_spool')
+
+    def __init__(self, threshold: int) -> None:
+        self.threshold: int = threshold
+        self._memory = bytearray()
+        self._spool: Optional[IO[bytes]] = None
+
+    def write(self, data: bytes | bytearray | memoryview) -> None:
+        if self._spool is None:
+            if len(self._memory) + len(data) <= self.threshold:
+                self._memory += data
+                return
+            self._spool = tempfile.SpooledTemporaryFile(max_size=self.threshold)
+            self._spool.write(self._memory)
+            self._memory = bytearray()
+        self._spool.write(data)
+
+    def result(self) -> bytearray | IO[bytes]:
+        """What Request.load_body takes."""
+        return self._memory if self._spool is None else self._spool
+
+    def close(self) -> None:
+        if self._spool is not None:
+            self._spool.close()
+
+
 class HttpConnection:
     pass
 
@@ -17,45 +97,314 @@ class HttpConnection:
 class Request(HttpConnection):
 
     SOCKET_TIMEOUT_SECONDS: float = 30.0
+    #: Also the size of the buffers heads are received into, so a smaller
+    #: limit can be set per request and a larger one cannot.
     MAX_HEADER_SIZE: int = 64 * 1024
+    #: The request target, path and query together.
+    MAX_URL_LENGTH: int = 8 * 1024
     MAX_BODY_SIZE: int = 256 * 1024 * 1024
+    #: The most read at once while looking for the end of a head. Whatever
+    #: comes in past it -- a pipelined request -- is copied out as leftover,
+    #: so this stays near the size of a typical head.
+    HEADER_RECV_SIZE: int = 4096
+    #: Bodies larger than this are received into a temporary file rather than
+    #: memory, so that what an upload costs in memory does not depend on its
+    #: size. Smaller ones are allocated in full as soon as the head is in.
+    SPOOL_THRESHOLD: int = 1024 * 1024
+    #: The size of the reads a spooled body is received in, and of the chunks
+    #: stream() yields unless asked otherwise.
+    BODY_CHUNK_SIZE: int = 64 * 1024
+    #: The most a compressed body may decompress to, and to per byte sent.
+    MAX_DECODED_SIZE: int = 64 * 1024 * 1024
+    MAX_DECODED_RATIO: float = 100.0
 
-    def __init__(self, client_connection: Socket) -> None:
+    #: Where heads read off a socket are received; a buffer goes back to the
+    #: pool as soon as the head in it is parsed.
+    _head_buffers: BufferPool = BufferPool(MAX_HEADER_SIZE)
+    #: Where a spooled body is received on its way to the file.
+    _body_chunks: BufferPool = BufferPool(BODY_CHUNK_SIZE)
+
+    def __init__(self,
+        client_connection: Optional[Socket],
+        buffer: bytes | bytearray = b'',
+        spool_threshold: Optional[int] = None,
+        max_header_size: Optional[int] = None,
+        max_url_length: Optional[int] = None,
+        max_decoded_size: Optional[int] = None,
+        max_decoded_ratio: Optional[float] = None,
+    ) -> None:
         super().__init__()
-        self._client_connection: Socket = client_connection
+        self._client_connection: Optional[Socket] = client_connection
+        # Bytes already read off this connection that belong to this request:
+        # on a persistent connection, whatever arrived after the previous one.
+        self._buffer: bytes | bytearray = buffer
+        self._spool_threshold: int = self.SPOOL_THRESHOLD if spool_threshold is None else spool_threshold
+        self._max_header_size: int = min(max_header_size or self.MAX_HEADER_SIZE, self.MAX_HEADER_SIZE)
+        self._max_url_length: int = self.MAX_URL_LENGTH if max_url_length is None else max_url_length
+        self._max_decoded_size: int = self.MAX_DECODED_SIZE if max_decoded_size is None else max_decoded_size
+        self._max_decoded_ratio: float = self.MAX_DECODED_RATIO if max_decoded_ratio is None else max_decoded_ratio
+        self._leftover: bytes = b''
+        self._complete: bool = False
         self._method: str = ''
         self._path: str = ''
         self._protocol: str = ''
-        self._headers: CaseInsensitiveDict = CaseInsensitiveDict()
-        self._cookie: CookieDict = CookieDict()
-        self._body: bytes | Dict[str, Any] = b''
-        self._raw_data: bytearray | None = None
-        self._query_params: Dict[str, str] = {}
-
-    def handle(self):
-        self._client_connection.settimeout(self.SOCKET_TIMEOUT_SECONDS)
-        self._raw_data = self._recv_header()
-        if self._raw_data is None:
+        # The head past the request line, as it arrived: from the CRLF ending
+        # the request line to the one ending the last header.
+        self._raw_headers: bytes = b''
+        self._lowered_headers: Optional[bytes] = None
+        self._raw_query: str = ''
+        self._raw_body: bytes | bytearray = b''
+        # A body over the spool threshold, in its temporary file, instead.
+        self._spool: Optional[IO[bytes]] = None
+        self._content_length: Optional[int] = None
+        self._chunked: Optional[bool] = None
+        # Those that ended a chunked body, once it has ended.
+        self._trailers: Optional[Dict[str, str]] = None
+        # Worked out from the raw parts above on first access; see load_head.
+        self._headers: Optional[HeaderMap] = None
+        self._cookie: Optional[CookieDict] = None
+        self._query_params: Optional[MultiDict] = None
+        self._body: Any = _UNPARSED
+        self._json: Any = _UNPARSED
+        self._form: Any = _UNPARSED
+        self._multipart: Any = _UNPARSED
+        # Filled in by the app the first time a step needs them, and reused
+        # by every step after: the route for this request with its path
+        # parameters, and why its body would be refused -- in a tuple, so
+        # that no reason is told apart from not yet asked.
+        self.route_match: Optional[Tuple[Any, Dict[str, Any]]] = None
+        self.route_refusal: Optional[Tuple[Optional[HttpStatus]]] = None
+
+    def handle(self,
+        idle_timeout: Optional[float] = None,
+        on_receive: Optional[Callable[[int], None]] = None,
+        body_limit: Optional[Callable[['Request'], int]] = None,
+        on_continue: Optional[Callable[['Request'], bool]] = None,
+    ):
+        """Read and parse one request off the connection.
+
+        idle_timeout bounds the wait for the first byte only, and is what a
+        persistent connection uses between requests: a client that has gone
+        quiet is released quickly, while one that has started sending gets the
+        full SOCKET_TIMEOUT_SECONDS. Either way, a connection that closes or
+        stays silent leaves the request empty -- method is '' -- rather than
+        raising.
+
+        on_receive, if given, is called with the body bytes received so far
+        before each wait for more of the body: it is how a server keeping its
+        own deadlines learns that a transfer has started, and how fast it goes.
+
+        body_limit, if given, is asked for the most body this request may
+        carry -- once its head is parsed, and only if it has a body at all;
+        otherwise the limit is MAX_BODY_SIZE. A request over it is refused
+        before any more of its body is read.
+
+        on_continue, if given, decides for a client that sent `Expect:
+        100-continue` and is waiting to be told to send its body: True has
+        it told, with 100 Continue, and the body read; False leaves the body
+        unsent and unread, and the request incomplete, for the final answer
+        to say why.
+
+        Nothing read is copied more than once. The head is received into a
+        pooled buffer and decoded straight out of it; the body is received
+        into the buffer it is handed on in, where only the part that came in
+        along with the head has to be moved -- or, past the spool threshold,
+        a pooled chunk at a time into its temporary file. A chunked body is
+        decoded as it arrives, into memory up to the spool threshold and into
+        a temporary file past it, against the same limit.
+        """
+        self._client_connection.settimeout(
+            idle_timeout if idle_timeout is not None and not self._buffer
+            else self.SOCKET_TIMEOUT_SECONDS
+        )
+        received = self._recv_header()
+        if received is None:
             return
-        
-        self._method, raw_url_path, self._protocol, self._headers \
-            = self._parse_header(self._raw_data)
-            
-        self._path, self._query_params = UrlParser.parse_url(raw_url_path)
-        
-        body = self._recv_body(self._raw_data)
-        self._raw_data.extend(body)
-        
-        content_length = int(self._headers.get('content-length', 0))
-        if content_length > 0:
-            ct = self._headers.get('content-type', '')
-            if self._method == 'POST' or self._method == 'PUT':
-                self._body = RequestBodyParser.parse(ct, body)
-            else:
-                self._body = body
-                
-        self._cookie = self._parse_cookie(self._headers.pop('cookie', None))
-        
+
+        buffer, filled, head_length = received
+        try:
+            self.load_head(buffer, head_length)
+            if on_continue is not None and filled == head_length and self.expects_continue:
+                # Nothing of the body has come yet, so the client is waiting.
+                if not on_continue(self):
+                    return
+                self._client_connection.sendall(CONTINUE_RESPONSE)
+            body = self._recv_body(buffer, filled, head_length, on_receive, body_limit)
+            self.load_body(body, self._trailers)
+        finally:
+            if buffer is not self._buffer:
+                self._head_buffers.release(buffer)
+
+    def load_head(self, raw_data: bytes | bytearray, head_length: Optional[int] = None) -> None:
+        """Parse a request line and headers that have already been read.
+
+        raw_data may run on past the head, and head_length -- up to and
+        including the blank line -- saves looking for its end again when the
+        caller already has.
+
+        Only the request line is parsed here. The headers are kept as the
+        bytes they arrived as, and headers, cookie, query_params and body are
+        each worked out the first time something asks for them, then kept: a
+        request for a static file, which needs its method, its path and a
+        header or two, pays for nothing else. header() finds a single value
+        without parsing the others.
+
+        Together with load_body this is the whole of parsing, with no socket
+        involved: handle() is one way of getting the bytes, and the asyncio
+        engine, which is handed them by its transport, is another.
+
+        A request line that is not one is a RequestError (400), and so are a
+        target longer than max_url_length (414) and a head longer than
+        max_header_size (431).
+        """
+        if head_length is None:
+            head_length = raw_data.find(b'\r\n\r\n') + 4
+        if head_length > self._max_header_size:
+            raise head_too_large(raw_data, self._max_header_size)
+        head_end = max(head_length - 4, 0)
+        line_end = raw_data.find(b'\r\n', 0, head_end)
+        if line_end < 0:
+            line_end = head_end
+
+        with memoryview(raw_data) as view:
+            self._method, raw_url_path, self._protocol = self._parse_request_line(view[:line_end])
+            self._raw_headers = bytes(view[line_end:head_end + 2])
+        if len(raw_url_path) > self._max_url_length:
+            raise RequestError(HttpStatus.URI_TOO_LONG, 'Request URI too long')
+        self._path, self._raw_query = UrlParser.split_url(raw_url_path)
+
+    def load_body(self,
+        body: bytes | bytearray | IO[bytes],
+        trailers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Take the body of a request whose head load_head has parsed: its
+        bytes, or a file it was spooled to, positioned at its end.
+
+        A chunked body is complete once its last chunk has been read, and
+        trailers -- the fields after it, if any -- are passed to say so.
+        """
+        if isinstance(body, (bytes, bytearray)):
+            self._raw_body = body
+            size = len(body)
+        else:
+            self._spool = body
+            size = body.tell()
+        if self.chunked:
+            self._trailers = trailers
+            self._complete = trailers is not None
+        else:
+            self._complete = size >= self.content_length
+
+    def stream(self, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+        """The body, a chunk at a time. A spooled body is read from its file
+        as it is consumed, and is never held in memory whole.
+
+        A body sent with `Content-Encoding: gzip` or `deflate` comes out
+        decompressed, as it is read, within max_decoded_size and
+        max_decoded_ratio -- see BodyDecoder. Going over either is a
+        RequestError (413), and so is a body that does not decompress (400).
+        """
+        size = chunk_size or self.BODY_CHUNK_SIZE
+        encoding = self.content_encoding
+        if not encoding:
+            yield from self._stream_raw(size)
+            return
+        try:
+            decoder = BodyDecoder(encoding, self._max_decoded_size, self._max_decoded_ratio)
+        except ValueError as e:
+            raise RequestError(HttpStatus.UNSUPPORTED_MEDIA_TYPE, str(e)) from None
+        try:
+            for chunk in self._stream_raw(size):
+                yield from decoder.decompress(chunk)
+            decoder.finish()
+        except ValueError as e:
+            status = HttpStatus.PAYLOAD_TOO_LARGE if decoder.over_limit else HttpStatus.BAD_REQUEST
+            raise RequestError(status, str(e)) from None
+
+    def _stream_raw(self, size: int) -> Iterator[bytes]:
+        if self._spool is not None:
+            self._spool.seek(0)
+            while chunk := self._spool.read(size):
+                yield chunk
+            return
+        raw = self._raw_body
+        for start in range(0, len(raw), size):
+            yield raw[start:start + size]
+
+    def close(self) -> None:
+        """Let go of the temporary files of a spooled body and of uploaded
+        files, if there are any."""
+        if self._spool is not None:
+            self._spool.close()
+        if self._multipart is not _UNPARSED:
+            self._multipart.close()
+
+    def header(self, name: str, default: Any = None) -> Any:
+        """The value of one header, found in the raw head without parsing the
+        rest of it. The last one wins, as in headers."""
+        lowered = self._lowered_headers
+        if lowered is None:
+            lowered = self._lowered_headers = self._raw_headers.lower()
+        needle = b'\r\n' + name.lower().encode('utf-8') + b':'
+        idx = lowered.rfind(needle)
+        if idx < 0:
+            return default
+        start = idx + len(needle)
+        return _decode(self._raw_headers[start:lowered.index(b'\r\n', start)]).strip()
+
+    def _header_values(self, name: str) -> List[str]:
+        """Every value of one header, in order, from the raw head."""
+        lowered = self._lowered_headers
+        if lowered is None:
+            lowered = self._lowered_headers = self._raw_headers.lower()
+        needle = b'\r\n' + name.lower().encode('utf-8') + b':'
+        values = []
+        idx = lowered.find(needle)
+        while idx >= 0:
+            start = idx + len(needle)
+            end = lowered.index(b'\r\n', start)
+            values.append(_decode(self._raw_headers[start:end]).strip())
+            idx = lowered.find(needle, end)
+        return values
+
+    def json(self) -> Any:
+        """The body, parsed as JSON whatever the method or Content-Type."""
+        if self._json is _UNPARSED:
+            self._json = RequestBodyParser.parse_json(self.content)
+        return self._json
+
+    def multipart(self) -> MultipartForm:
+        """The parts of a multipart/form-data body, parsed from stream() in
+        one pass: files go to temporary files of their own as they are
+        found, and the body is never held in memory whole. A RequestError if
+        the body is not multipart (415), or is malformed (400), as stream()
+        raises for a body that does not decompress."""
+        if self._multipart is _UNPARSED:
+            try:
+                boundary = MultipartParser.boundary(self.header('content-type', ''))
+            except ValueError as e:
+                raise RequestError(HttpStatus.UNSUPPORTED_MEDIA_TYPE, str(e)) from None
+            parser = MultipartParser(boundary, spool_threshold=self._spool_threshold)
+            try:
+                for chunk in self.stream():
+                    parser.feed(chunk)
+                self._multipart = parser.finish()
+            except RequestError:
+                # From stream(), between two feeds: nothing has closed the
+                # parts read so far.
+                parser.close()
+                raise
+            except ValueError as e:
+                raise RequestError(HttpStatus.BAD_REQUEST, str(e)) from None
+        return self._multipart
+
+    def form(self) -> MultiDict:
+        """The body, parsed as a urlencoded form whatever the method or
+        Content-Type."""
+        if self._form is _UNPARSED:
+            self._form = RequestBodyParser.parse_form(self.content.decode('utf-8', 'ignore'))
+        return self._form
+
     @property
     def method(self) -> str:
         return self._method
@@ -65,59 +414,182 @@ class Request(HttpConnection):
         return self._path
     
     @property
-    def query_params(self) -> Dict[str, str]:
+    def query_params(self) -> MultiDict:
+        if self._query_params is None:
+            self._query_params = UrlParser.parse_qs(self._raw_query)
         return self._query_params
 
     @property
-    def headers(self) -> CaseInsensitiveDict:
+    def headers(self) -> HeaderMap:
+        if self._headers is None:
+            self._headers = self._parse_headers(self._raw_headers)
         return self._headers
 
     @property
     def cookie(self) -> CookieDict:
+        if self._cookie is None:
+            self._cookie = self._parse_cookie(self.header('cookie'))
         return self._cookie
     
     @property
-    def body(self) -> bytes | Dict[str, Any]:
+    def body(self) -> bytes | bytearray | Dict[str, Any]:
+        """The body of a POST or PUT, parsed according to its Content-Type;
+        of anything else, the bytes as they came."""
+        if self._body is _UNPARSED:
+            # A body cut short is left as it arrived: parsing it could only fail.
+            if self.content_length <= 0 and not self.chunked:
+                self._body = b''
+            elif (self._method == 'POST' or self._method == 'PUT') and self._complete:
+                content_type = self.header('content-type', '')
+                if content_type.startswith(RequestBodyParser.Type.MULTIPART):
+                    # Straight from stream(), not a copy of the whole body.
+                    self._body = self.multipart()
+                else:
+                    self._body = RequestBodyParser.parse(content_type, self.content)
+            else:
+                self._body = self.content
         return self._body
+
+    @property
+    def content(self) -> bytes | bytearray:
+        """The body, decompressed if it was sent compressed: what json(),
+        form() and body parse. Built up from stream() a chunk at a time, so
+        a compressed body is refused as soon as it grows past its limits."""
+        if not self.content_encoding:
+            return self.raw_body
+        return b''.join(self.stream())
+
+    @property
+    def content_encoding(self) -> str:
+        """The Content-Encoding of the body, lower-cased; '' for none."""
+        encoding = self.header('content-encoding', '').strip().lower()
+        return '' if encoding == 'identity' else encoding
+
+    @property
+    def raw_body(self) -> bytes | bytearray:
+        """The body as it came. A spooled body is read back into memory for
+        this, on every access; stream() is the way to read it in pieces."""
+        if self._spool is not None:
+            self._spool.seek(0)
+            return self._spool.read()
+        return self._raw_body
     
+    @property
+    def content_length(self) -> int:
+        if self._content_length is None:
+            lengths = set()
+            for value in self._header_values('content-length') or ['0']:
+                if not value.isdigit() or not value.isascii():
+                    raise RequestError(HttpStatus.BAD_REQUEST, f'Invalid Content-Length: {value!r}')
+                lengths.add(int(value))
+            if len(lengths) > 1:
+                # RFC 9112 6.3: a proxy in front may have framed the body by
+                # another of them, and then what is left of it here would be
+                # read as the next request.
+                raise RequestError(HttpStatus.BAD_REQUEST, 'Conflicting Content-Length values')
+            self._content_length = lengths.pop()
+        return self._content_length
+
+    @property
+    def chunked(self) -> bool:
+        """Whether the body is framed by `Transfer-Encoding: chunked` rather
+        than by Content-Length, which it then overrides. Any other transfer
+        coding is a RequestError (501): there would be no telling where the
+        body ends, nor where the next request begins."""
+        if self._chunked is None:
+            coding = self.header('transfer-encoding')
+            if coding is not None and coding.strip().lower() != 'chunked':
+                raise RequestError(HttpStatus.NOT_IMPLEMENTED, f'Unsupported Transfer-Encoding: {coding}')
+            self._chunked = coding is not None
+        return self._chunked
+
+    @property
+    def expects_continue(self) -> bool:
+        """Whether the client sent `Expect: 100-continue` with a body it
+        holds back until told to send it. HTTP/1.0 clients are not
+        supposed to, and are not answered if they do (RFC 9110, 10.1.1)."""
+        return (
+            self._protocol == 'HTTP/1.1'
+            and (self.chunked or self.content_length > 0)
+            and self.header('expect', '').strip().lower() == '100-continue'
+        )
+
+    @property
+    def trailers(self) -> Dict[str, str]:
+        """The trailer fields of a chunked body, with lower-cased names."""
+        return self._trailers or {}
+
     @property
     def protocol(self) -> str:
         return self._protocol
     
     @property
-    def client_connection(self) -> Socket:
+    def client_connection(self) -> Optional[Socket]:
         return self._client_connection
+
+    @property
+    def leftover(self) -> bytes:
+        """Bytes read past the end of this request: the start of the next one."""
+        return self._leftover
+
+    @property
+    def complete(self) -> bool:
+        """Whether the whole request, body included, was read off the wire.
+
+        Only a complete request leaves the connection at a request boundary,
+        and so only a complete request may be followed by another on it.
+        """
+        return self._complete
+
+    @property
+    def keep_alive(self) -> bool:
+        """Whether the client asked for the connection to stay open.
+
+        HTTP/1.1 connections are persistent unless the client says `close`;
+        HTTP/1.0 ones close unless it says `keep-alive`.
+        """
+        if self.chunked and self.header('content-length') is not None:
+            # Framed two ways at once, which is how requests are smuggled
+            # past a proxy that reads the other one. RFC 9112 (6.3) has the
+            # body read as chunked and the connection closed after it.
+            return False
+        tokens = {
+            token.strip().lower()
+            for token in self.header('connection', '').split(',')
+        }
+        if self._protocol.upper() == 'HTTP/1.0':
+            return 'keep-alive' in tokens
+        return 'close' not in tokens
     
-    def _parse_header(self, raw_data: bytearray) -> Tuple[str, str, str, CaseInsensitiveDict]:
-        idx = raw_data.find(b'\r\n\r\n')
-        header_bytes = raw_data[:idx]
-            
-        try:
-            header_str = header_bytes.decode('utf-8')
-        except UnicodeDecodeError:
-            header_str = header_bytes.decode('iso-8859-1')
-         
-        lines = header_str.split('\r\n')
-        
-        if not lines or not lines[0]:
-            return '', '', '', CaseInsensitiveDict()
+    def _parse_request_line(self, raw_line: memoryview) -> Tuple[str, str, str]:
+        # Decoded in place, through a view: the line is not copied out of the
+        # receive buffer first. The view is released at once, so that an
+        # error raised below does not keep the buffer from being resized.
+        with raw_line:
+            line = _decode(raw_line)
+        if not line:
+            return '', '', ''
 
-        parts = lines[0].split(None)
+        parts = line.split(None)
         if len(parts) == 3:
             method, path, protocol = parts
         elif len(parts) == 2:
             method, path = parts
             protocol = "HTTP/1.1"
         else:
-            method, path, protocol = "GET", "/", "HTTP/1.1"
-        
-        headers = CaseInsensitiveDict()
-        for line in lines[1:]:
-            if ':' in line:
-                key, value = line.split(':', 1)
-                headers[key.strip()] = value.strip()
-        
-        return method.upper(), path, protocol, headers
+            raise RequestError(HttpStatus.BAD_REQUEST, f'Malformed request line: {line[:64]!r}')
+        if (
+            (method not in _COMMON_METHODS and not _METHOD.fullmatch(method))
+            or (protocol not in _COMMON_VERSIONS and not _VERSION.fullmatch(protocol))
+        ):
+            raise RequestError(HttpStatus.BAD_REQUEST, f'Malformed request line: {line[:64]!r}')
+        return method.upper(), path, protocol
+
+    def _parse_headers(self, raw_headers: bytes) -> HeaderMap:
+        headers = HeaderMap.parse(raw_headers)
+        # Cookies have a view of their own.
+        headers.pop('cookie', None)
+        return headers
         
     def _parse_cookie(self, cookie_str: Optional[str]) -> CookieDict:
         if cookie_str is None:
@@ -131,40 +603,166 @@ class Request(HttpConnection):
         
         return cookie
 
-    def _recv_header(self) -> Optional[bytearray]:
-        buffer = bytearray()
-        while True:
-            chunk = self._client_connection.recv(4096)
-            if not chunk:
-                return None
-            buffer.extend(chunk)
-            if len(buffer) > self.MAX_HEADER_SIZE:
-                raise ValueError('Request header too large')
-
-            if b'\r\n\r\n' in buffer:
-                break
-        return buffer
-
-    def _recv_body(self, header_buffer: bytearray) -> bytearray:
-        idx = header_buffer.find(b'\r\n\r\n')
-        body_start = header_buffer[idx+4:]
-
-        content_length = int(self._headers.get('content-length', 0))
-        if content_length > self.MAX_BODY_SIZE:
-            raise ValueError('Request body too large')
-        already = len(body_start)
-
-        if already >= content_length:
-            return body_start[:content_length]
-        
-        body = bytearray(body_start)
-        remaining = content_length - already
-
-        while remaining > 0:
-            chunk = self._client_connection.recv(min(4096, remaining))
-            if not chunk:
-                break
-            body.extend(chunk)
-            remaining -= len(chunk)
+    def _recv_header(self) -> Optional[Tuple[bytes | bytearray, int, int]]:
+        """Receive until the end of the head; return the buffer holding it, how
+        much of the buffer is filled, and the head's length.
+
+        A head already in self._buffer is used where it is. Otherwise reads go
+        straight into a buffer from the pool, and each one is searched for the
+        end of the head from where the last search stopped.
+        """
+        buffer = self._buffer
+        filled = len(buffer)
+        idx = buffer.find(b'\r\n\r\n')
+        if idx >= 0:
+            return buffer, filled, idx + 4
+        if filled >= self._max_header_size:
+            raise head_too_large(buffer, self._max_header_size)
+
+        pooled = self._head_buffers.acquire()
+        pooled[:filled] = buffer
+        try:
+            with memoryview(pooled) as view:
+                while True:
+                    try:
+                        n = self._client_connection.recv_into(
+                            view[filled:min(filled + self.HEADER_RECV_SIZE, self._max_header_size)]
+                        )
+                    except TimeoutError:
+                        if filled:
+                            raise
+                        # Nothing at all arrived: an idle connection, not a
+                        # broken request. Treated exactly like the client
+                        # hanging up.
+                        break
+                    if not n:
+                        break
+                    if not filled:
+                        self._client_connection.settimeout(self.SOCKET_TIMEOUT_SECONDS)
+                    idx = pooled.find(b'\r\n\r\n', max(0, filled - 3), filled + n)
+                    filled += n
+                    if idx >= 0:
+                        return pooled, filled, idx + 4
+                    if filled >= self._max_header_size:
+                        raise head_too_large(pooled, self._max_header_size)
+        except BaseException:
+            self._head_buffers.release(pooled)
+            raise
+        self._head_buffers.release(pooled)
+        return None
+
+    def _recv_body(self,
+        buffer: bytes | bytearray,
+        filled: int,
+        head_length: int,
+        on_receive: Optional[Callable[[int], None]] = None,
+        body_limit: Optional[Callable[['Request'], int]] = None,
+    ) -> bytes | bytearray | IO[bytes]:
+        if self.chunked:
+            limit = body_limit(self) if body_limit is not None else self.MAX_BODY_SIZE
+            return self._recv_chunked(buffer, filled, head_length, limit, on_receive)
+
+        content_length = self.content_length
+        limit = body_limit(self) if body_limit is not None and content_length else self.MAX_BODY_SIZE
+        if content_length > limit:
+            raise RequestError(HttpStatus.PAYLOAD_TOO_LARGE, 'Request body too large')
+        end = head_length + content_length
+
+        with memoryview(buffer) as view:
+            if filled >= end:
+                self._leftover = bytes(view[end:filled])
+                return bytes(view[head_length:end]) if content_length else b''
+
+            already = filled - head_length
+            if content_length > self._spool_threshold:
+                spool = tempfile.SpooledTemporaryFile(max_size=self._spool_threshold)
+                spool.write(view[head_length:filled])
+            else:
+                body = bytearray(content_length)
+                body[:already] = view[head_length:filled]
+
+        if content_length > self._spool_threshold:
+            return self._recv_into_spool(spool, already, content_length, on_receive)
+        return self._recv_into_memory(body, already, on_receive)
+
+    def _recv_chunked(self,
+        buffer: bytes | bytearray,
+        filled: int,
+        head_length: int,
+        limit: int,
+        on_receive: Optional[Callable[[int], None]] = None,
+    ) -> bytearray | IO[bytes]:
+        decoder = ChunkedDecoder(limit)
+        body = BodyBuffer(self._spool_threshold)
+        with memoryview(buffer) as view:
+            # Received, not decoded yet: never more than one read and the
+            # start of a line the decoder is waiting to see the end of.
+            data = bytearray(view[head_length:filled])
+        chunk = self._body_chunks.acquire()
+        try:
+            with memoryview(chunk) as view:
+                while True:
+                    try:
+                        consumed = decoder.feed(data, body.write)
+                    except ValueError as e:
+                        status = HttpStatus.PAYLOAD_TOO_LARGE if decoder.over_limit else HttpStatus.BAD_REQUEST
+                        raise RequestError(status, str(e)) from None
+                    del data[:consumed]
+                    if decoder.done:
+                        break
+                    if on_receive is not None:
+                        on_receive(decoder.size)
+                    n = self._client_connection.recv_into(view)
+                    if not n:
+                        break
+                    data += view[:n]
+        except BaseException:
+            body.close()
+            raise
+        finally:
+            self._body_chunks.release(chunk)
+        if decoder.done:
+            self._trailers = decoder.trailers
+            self._leftover = bytes(data)
+        return body.result()
+
+    def _recv_into_memory(self,
+        body: bytearray,
+        received: int,
+        on_receive: Optional[Callable[[int], None]] = None,
+    ) -> bytearray:
+        with memoryview(body) as target:
+            while received < len(body):
+                if on_receive is not None:
+                    on_receive(received)
+                n = self._client_connection.recv_into(target[received:])
+                if not n:
+                    break
+                received += n
+        if received < len(body):
+            del body[received:]
         return body
-    
\ No newline at end of file
+
+    def _recv_into_spool(self,
+        spool: IO[bytes],
+        received: int,
+        content_length: int,
+        on_receive: Optional[Callable[[int], None]] = None,
+    ) -> IO[bytes]:
+        chunk = self._body_chunks.acquire()
+        try:
+            with memoryview(chunk) as view:
+                while received < content_length:
+                    if on_receive is not None:
+                        on_receive(received)
+                    n = self._client_connection.recv_into(view[:min(len(chunk), content_length - received)])
+                    if not n:
+                        break
+                    spool.write(view[:n])
+                    received += n
+        except BaseException:
+            spool.close()
+            raise
+        finally:
+            self._body_chunks.release(chunk)
+        return spool
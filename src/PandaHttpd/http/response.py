@@ -5,9 +5,10 @@ from ..utils import MappingStr, CaseInsensitiveDict, CookieDict
 import json
 import os
 import re
+import socket
 from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
-from typing_extensions import Any, Dict, List, Optional, Self, Tuple
+from typing_extensions import Any, Dict, Iterator, List, Optional, Self, Tuple
 
 
 class Response:
@@ -18,6 +19,14 @@ class Response:
     # they would be for GET and only the transfer is skipped. Off by default:
     # nothing that does not set it behaves any differently.
     suppress_body: bool = False
+    #: A first body chunk up to this size goes out in the same send as the
+    #: head, at the cost of copying it once. A send is a system call and,
+    #: with TCP_NODELAY, a segment of its own, and costs more than the copy
+    #: up to about this size: benchmarks/bench_coalesce.py, over loopback,
+    #: has one send ~5 us ahead of two at 1-32 KiB, ~1.5 us at 64 KiB and
+    #: ~2 us at 128 KiB. The gain levels off, and the copy keeps growing,
+    #: past this point.
+    COALESCE_LIMIT: int = 64 * 1024
     
     def __init__(self, 
 		status_code: int | HttpStatus = 200, 
@@ -75,14 +84,15 @@ class Response:
 
     @classmethod
     def declare_connection_close(cls, list_headers: List[tuple[bytes, bytes]]) -> None:
-        """Tell the client this connection is finished after one response.
+        """Tell the client this connection is finished after this response.
 
-        This server handles exactly one request per connection -- handle_client
-        shuts the socket down and closes it in a finally block, always. HTTP/1.1
-        defaults the other way: a connection is persistent unless a response
-        says `Connection: close`. Closing silently therefore tells a client the
-        socket is reusable when it is not, and a pooling client (requests,
-        urllib3, any browser) caches it and hands it to the next request.
+        This is the default every response is built with, and the app replaces
+        it via declare_connection() once it knows the connection will be kept.
+        HTTP/1.1 defaults the other way: a connection is persistent unless a
+        response says `Connection: close`. Closing silently therefore tells a
+        client the socket is reusable when it is not, and a pooling client
+        (requests, urllib3, any browser) caches it and hands it to the next
+        request.
 
         Measured before this existed: one request left ten connections in
         urllib3's pool, every one already closed by this server. Reusing one
@@ -91,13 +101,45 @@ class Response:
         like flakiness that only ever appeared on a loaded CI runner, never on
         a developer's loopback.
 
-        Announcing the close is the whole fix. Implementing real keep-alive
-        would be the other answer, and a much larger change: it needs per-
-        connection request framing, read timeouts and a socket budget, none of
-        which exist here.
+        So a response that nobody has explicitly promised a persistent
+        connection for announces the close, always.
         """
         if not any(k == b'connection' for k, _ in list_headers):
             list_headers.append((b'connection', b'close'))
+
+    def declare_connection(self,
+        keep_alive: bool,
+        timeout: Optional[float] = None,
+        max_requests: Optional[int] = None,
+    ) -> None:
+        """Say whether the connection outlives this response, replacing any
+        earlier `Connection` and `Keep-Alive` headers.
+
+        `Connection: keep-alive` is spelled out even though HTTP/1.1 implies
+        it, because an HTTP/1.0 client assumes the opposite without it.
+        """
+        self.remove_header('connection')
+        self.remove_header('keep-alive')
+        if not keep_alive:
+            self.update_header('Connection', 'close')
+            return
+
+        self.update_header('Connection', 'keep-alive')
+        params = []
+        if timeout is not None:
+            params.append(f'timeout={int(timeout)}')
+        if max_requests is not None:
+            params.append(f'max={max_requests}')
+        if params:
+            self.update_header('Keep-Alive', ', '.join(params))
+
+    @property
+    def has_framed_body(self) -> bool:
+        """Whether the client can tell where this response ends without the
+        connection closing: it has a Content-Length, or cannot have a body."""
+        if self.status_code < 200 or self.status_code in (204, 304):
+            return True
+        return b'content-length' in self.header
     
     @property
     def header(self) -> Dict[bytes, bytes]:
@@ -114,8 +156,17 @@ class Response:
     def update_header(self, key: str, value: str) -> None:
         k = key.lower().encode(self.charset)
         v = value.encode(self.charset)
+        # Materialise the mapping before the first write: otherwise it holds
+        # only this one header, and `header` -- which builds from the list only
+        # when empty -- would never show the rest.
+        self.header
         self._list_headers.append((k, v))
         self._header[k] = v
+
+    def remove_header(self, key: str) -> None:
+        k = key.lower().encode(self.charset)
+        self._list_headers = [(name, value) for name, value in self._list_headers if name != k]
+        self.header.pop(k, None)
     
     def set_cookies(self,
         key: str,
@@ -133,25 +184,72 @@ class Response:
     ):
         raise NotImplementedError()
     
-    def __call__(self, 
-        sender: Socket, 
-        receiver: Optional[Socket], 
-    ) -> None:
+    def encode_head(self) -> bytes:
+        """The status line and header block, ready for the wire."""
         header_block = bytearray()
         for k, v in self.header.items():
             header_block += k + b': ' + v + b'\r\n'
         header_block += b'\r\n'
-        
-        sender.sendall(self.status_line + header_block)
+        return self.status_line + header_block
+
+    def iter_body(self) -> Iterator[bytes]:
+        """The body, in the pieces it should be written in.
 
+        Kept apart from __call__ so a transport that is not a blocking socket
+        -- the asyncio engine -- can write the same bytes at its own pace.
+        """
         if self.suppress_body:
             return
-
         if self.body:
-            sender.sendall(self.body)
+            yield self.body
+
+    def sendfile_range(self) -> Optional[Tuple[Path, int, int]]:
+        """(path, offset, count) if the body is that part of a file, to be
+        handed to the kernel with sendfile() rather than through iter_body();
+        None otherwise."""
+        return None
+
+    def __call__(self, 
+        sender: Socket, 
+        receiver: Optional[Socket], 
+    ) -> None:
+        head = self.encode_head()
+        for chunk in self.iter_body():
+            if head and len(chunk) <= self.COALESCE_LIMIT:
+                chunk = head + chunk
+            elif head:
+                sender.sendall(head)
+            head = b''
+            sender.sendall(chunk)
+        if head:
+            sender.sendall(head)
             
 
+def not_modified(asked: MappingStr, etag: str, last_modified: str) -> bool:
+    """Whether the copy a client holds, going by the lowercase-keyed request
+    headers asked, is still the one with this ETag and Last-Modified.
+
+    If-None-Match wins outright when present, as the specification
+    requires: an entity tag is exact where a timestamp is only to the
+    second.
+    """
+    if 'if-none-match' in asked:
+        offered = [tag.strip() for tag in str(asked['if-none-match']).split(',')]
+        return '*' in offered or etag in offered
+
+    since = asked.get('if-modified-since')
+    if not since:
+        return False
+    try:
+        return parsedate_to_datetime(since) >= parsedate_to_datetime(last_modified)
+    except (TypeError, ValueError):
+        # An unparseable date is no evidence that anything is unchanged.
+        return False
+
+
 _RANGE_HEADER = re.compile(r'^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*(?:,.*)?$', re.IGNORECASE)
+#: Holds a head back to go out in one segment with the start of the body.
+_MSG_MORE: int = getattr(socket, 'MSG_MORE', 0)
 
 
 class FileResponse(Response):
@@ -178,6 +276,11 @@ class FileResponse(Response):
 
     media_type: str = 'application/octet-stream'
     chunk_size: int = 64 * 1024
+    #: Send the file with sendfile(): from the page cache to the socket in
+    #: the kernel, with no copy through Python and no chunk allocated per
+    #: 64 KiB. Off, or for a subclass that changes iter_body(), the file is
+    #: read and written in chunks instead.
+    use_sendfile: bool = True
 
     def __init__(self,
         path: str | os.PathLike,
@@ -238,24 +341,8 @@ class FileResponse(Response):
         return {str(k).lower(): v for k, v in request_headers.items()}
 
     def _is_unchanged(self, asked: Dict[str, str]) -> bool:
-        """Whether the copy the client already holds is still current.
-
-        If-None-Match wins outright when present, as the specification
-        requires: an entity tag is exact where a timestamp is only to the
-        second.
-        """
-        if 'if-none-match' in asked:
-            offered = [tag.strip() for tag in str(asked['if-none-match']).split(',')]
-            return '*' in offered or self.etag in offered
-
-        since = asked.get('if-modified-since')
-        if not since:
-            return False
-        try:
-            return parsedate_to_datetime(since) >= parsedate_to_datetime(self.last_modified)
-        except (TypeError, ValueError):
-            # An unparseable date is no evidence that anything is unchanged.
-            return False
+        """Whether the copy the client already holds is still current."""
+        return not_modified(asked, self.etag, self.last_modified)
 
     def _parse_range(self, header: Optional[str]) -> Optional[Tuple[int, int]]:
         """The first byte range asked for, or None if there is not a usable one.
@@ -313,17 +400,7 @@ class FileResponse(Response):
         self.declare_connection_close(list_headers)
         return list_headers
 
-    def __call__(self,
-        sender: Socket,
-        receiver: Optional[Socket],
-    ) -> None:
-        header_block = bytearray()
-        for k, v in self.header.items():
-            header_block += k + b': ' + v + b'\r\n'
-        header_block += b'\r\n'
-
-        sender.sendall(self.status_line + header_block)
-
+    def iter_body(self) -> Iterator[bytes]:
         if self.suppress_body:
             return
 
@@ -340,9 +417,37 @@ class FileResponse(Response):
                     # The file shrank under us. Stopping short is the only
                     # honest option; the declared length is already sent.
                     break
-                sender.sendall(chunk)
+                yield chunk
                 remaining -= len(chunk)
 
+    def sendfile_range(self) -> Optional[Tuple[Path, int, int]]:
+        if (
+            not self.use_sendfile
+            or self.suppress_body
+            # Small enough to go out with the head in one send, as it does
+            # through iter_body(); sendfile would take two.
+            or self._length <= self.COALESCE_LIMIT
+            or type(self).iter_body is not FileResponse.iter_body
+        ):
+            return None
+        return self.path, self._start, self._length
+
+    def __call__(self,
+        sender: Socket,
+        receiver: Optional[Socket],
+    ) -> None:
+        file_range = self.sendfile_range()
+        if file_range is None:
+            return super().__call__(sender, receiver)
+        path, offset, count = file_range
+        # socket.sendfile() falls back to reading and sending by itself where
+        # os.sendfile is missing. A file that shrank under us ends the body
+        # short, as in iter_body().
+        flags = _MSG_MORE if sender.family != socket.AF_UNIX else 0
+        sender.sendall(self.encode_head(), flags)
+        with path.open('rb') as handle:
+            sender.sendfile(handle, offset, count)
+
 
 class PlainTextResponse(Response):
     media_type: str = 'text/plain'
@@ -2,6 +2,7 @@ from enum import IntEnum, Enum
 
 
 class HttpStatus(IntEnum):
+	CONTINUE = (100, 'Continue')
 	OK = (200, 'OK')
 	CREATED = (201, 'Created')
 	ACCEPTED = (202, 'Accepted')
@@ -38,6 +39,7 @@ class HttpStatus(IntEnum):
 	UNSUPPORTED_MEDIA_TYPE = (415, 'Unsupported Media Type')
 	RANGE_NOT_SATISFIABLE = (416, 'Range Not Satisfiable')
 	EXPECTATION_FAILED = (417, 'Expectation Failed')
+	UNPROCESSABLE_ENTITY = (422, 'Unprocessable Entity')
 	UPGRADE_REQUIRED = (426, 'Upgrade Required')
 	PRECONDITION_REQUIRED = (428, 'Precondition Required')
 	TOO_MANY_REQUESTS = (429, 'Too Many Requests')
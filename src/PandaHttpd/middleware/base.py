@@ -7,7 +7,9 @@ class BaseMiddleware:
     def __init__(self, *args, **kwargs):
         pass
     
-    def pre(self, dict_headers: MappingStr, request: Request) -> MappingStr:
+    def pre(self, dict_headers: MappingStr, request: Request) -> MappingStr | Response:
+        """dict_headers, for what runs next; or a Response, to answer the
+        request here and now."""
         return dict_headers
     
     def post(self, dict_headers: MappingStr, response: Response) -> Response:
@@ -23,17 +25,19 @@ class BaseMiddleware:
 class DefaultMiddleware(BaseMiddleware):
 
     #: Request headers a static file needs in order to answer correctly: which
-    #: bytes were asked for, and whether the copy the client holds is current.
-    #: Nothing else in dict_headers carries them, and a route is handed
-    #: dict_headers rather than the Request itself.
-    FORWARDED_REQUEST_HEADERS = ('range', 'if-none-match', 'if-modified-since')
+    #: bytes were asked for, whether the copy the client holds is current, and
+    #: whether it takes a compressed one. Nothing else in dict_headers carries
+    #: them, and a route is handed dict_headers rather than the Request itself.
+    #: They are for reading only: a route's response leaves them out of the
+    #: headers it makes of dict_headers.
+    FORWARDED_REQUEST_HEADERS = ('range', 'if-none-match', 'if-modified-since', 'accept-encoding')
 
     def pre(self, dict_headers: MappingStr, request: Request) -> MappingStr:
         dict_headers['method'] = request.method
         dict_headers['path'] = request.path
         dict_headers['protocol'] = request._protocol
         for name in self.FORWARDED_REQUEST_HEADERS:
-            value = request.headers.get(name)
+            value = request.header(name)
             if value:
                 dict_headers[name] = value
         return dict_headers
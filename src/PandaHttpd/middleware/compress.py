@@ -1,5 +1,7 @@
 import gzip
 
+from typing import Optional
+
 from .base import BaseMiddleware
 from ..http import Request, Response
 from ..utils import MappingStr
@@ -10,7 +12,8 @@ class GZipMiddleware(BaseMiddleware):
     Middleware that compresses response bodies using gzip encoding.
     
     This middleware:
-    1. Checks if the client accepts gzip encoding via the Accept-Encoding header
+    1. Checks if the client accepts gzip encoding via the Accept-Encoding header,
+       q-values and all: see accepts()
     2. Compresses the response body if:
        - The client accepts gzip
        - The response body is large enough (>= GZIP_MIN_SIZE bytes)
@@ -90,13 +93,50 @@ class GZipMiddleware(BaseMiddleware):
         self.compress_level = compress_level
         self.compress_type = self.COMPRESS_TYPE
         
+    @staticmethod
+    def accepts(accept_encoding: Optional[str]) -> bool:
+        """Whether an Accept-Encoding value takes gzip: listed, or else covered
+        by `*`, and not with q=0. `*;q=0, gzip` takes it: a coding named
+        outright wins over the wildcard, wherever either appears.
+
+        The static file cache asks the same question, of the same function,
+        so a file and a route's response are negotiated alike."""
+        if not accept_encoding:
+            return False
+        named: Optional[float] = None
+        wildcard: Optional[float] = None
+        for part in accept_encoding.lower().split(','):
+            coding, *params = part.split(';')
+            coding = coding.strip()
+            if coding not in ('gzip', 'x-gzip', '*'):
+                continue
+            q = 1.0
+            for param in params:
+                name, _, value = param.partition('=')
+                if name.strip() == 'q':
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            if coding == '*':
+                wildcard = q
+            else:
+                named = q if named is None else max(named, q)
+        q = named if named is not None else wildcard
+        return q is not None and q > 0
+
     def post(self, dict_headers: MappingStr, response: Response) -> Response:
-        accept_encoding = str(response.header.get(b'accept-encoding', b''))
-        if self.compress_type not in accept_encoding.lower():
+        # The request's, as DefaultMiddleware forwards it.
+        if not self.accepts(dict_headers.get('accept-encoding')):
             return response
 
         if response.header.get(b'content-encoding'):
             return response
+
+        # Already chosen by encoding -- a cached static file that was not
+        # worth compressing -- so compressing it again would only be undone.
+        if b'accept-encoding' in response.header.get(b'vary', b'').lower():
+            return response
         
         if not response.body or len(response.body) < self.min_size:
             return response
@@ -2,26 +2,87 @@ from .base import BaseMiddleware
 from ..http import Request, Response
 from ..utils import MappingStr
 
-from typing import List, Sequence
+from typing import Callable, List, Sequence, Tuple
+
+
+#: What a pipeline wraps: routing and the endpoint, or for a route's own
+#: pipeline, the endpoint alone.
+Handler = Callable[[MappingStr, Request], Response]
 
 
 class Middleware:
+    """
+    A stack of middlewares, run around a handler: every `pre` in the order
+    they were added, the handler, then every `post` in reverse.
+
+    What runs is worked out when a middleware is added, not per request:
+    one that keeps BaseMiddleware's `pre` or `post` -- which do nothing --
+    is left out of that half of the stack.
+
+    A `pre` may answer the request itself by returning a Response instead
+    of dict_headers -- a cache hit, a rate limit, a health check. Nothing
+    after it runs, the handler included; the response goes back out
+    through the `post` of the middlewares added before it.
+
+    Example:
+        class Health(BaseMiddleware):
+            def pre(self, dict_headers, request):
+                if request.path == '/healthz':
+                    return PlainTextResponse(body=b'ok')
+                return dict_headers
+    """
     
     def __init__(self, middlewares: Sequence[BaseMiddleware] | None = None) -> None:
         self.middlewares: List[BaseMiddleware] = list(middlewares) if middlewares else []
+        # (position in middlewares, bound method), in the order they run.
+        self._pre: Tuple[Tuple[int, Callable], ...] = ()
+        self._post: Tuple[Tuple[int, Callable], ...] = ()
+        self.compile()
         
     def add_middleware(self, middleware: BaseMiddleware) -> None:
         assert isinstance(middleware, BaseMiddleware), 'Middleware must be an instance of BaseMiddleware'
         self.middlewares.append(middleware)
+        self.compile()
+
+    def compile(self) -> None:
+        """Work out which methods run; again whenever middlewares change."""
+        self._pre = tuple(
+            (position, middleware.pre)
+            for position, middleware in enumerate(self.middlewares)
+            if type(middleware).pre is not BaseMiddleware.pre
+        )
+        self._post = tuple(
+            (position, middleware.post)
+            for position, middleware in reversed(list(enumerate(self.middlewares)))
+            if type(middleware).post is not BaseMiddleware.post
+        )
+
+    def run(self, dict_headers: MappingStr, request: Request, handler: Handler) -> Response:
+        """The response to request: the handler's, or a `pre`'s, after `post`."""
+        answered_at = len(self.middlewares)
+        for position, pre in self._pre:
+            result = pre(dict_headers, request)
+            if isinstance(result, Response):
+                response, answered_at = result, position
+                break
+            dict_headers = result
+        else:
+            response = handler(dict_headers, request)
+        for position, post in self._post:
+            if position < answered_at:
+                response = post(dict_headers, response)
+        return response
         
-    def pre(self, dict_headers: MappingStr, request: Request) -> MappingStr:
-        for middleware in self.middlewares:
-            dict_headers = middleware.pre(dict_headers, request)
+    def pre(self, dict_headers: MappingStr, request: Request) -> MappingStr | Response:
+        for _, pre in self._pre:
+            dict_headers = pre(dict_headers, request)
+            if isinstance(dict_headers, Response):
+                break
         return dict_headers
         
     def post(self, dict_headers: MappingStr, response: Response) -> Response:
-        for middleware in reversed(self.middlewares):
-            response = middleware.post(dict_headers, response)
+        for _, post in self._post:
+            response = post(dict_headers, response)
         return response
         
     def __repr__(self) -> str:
@@ -29,4 +90,4 @@ class Middleware:
     
     def __str__(self) -> str:
         return f'Middleware(middlewares={self.middlewares})'
-    
\ No newline at end of file
+    
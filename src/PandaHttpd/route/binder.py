@@ -0,0 +1,213 @@
+from ..http import HttpStatus, Request, RequestError
+from ..utils import RequestBodyParser
+from .params import Param, Segment
+
+import dataclasses
+import inspect
+import types
+import typing
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+#: request, path parameters -> keyword arguments for the endpoint.
+Binder = Callable[[Request, Dict[str, Any]], Dict[str, Any]]
+Extractor = Callable[[Request, Dict[str, Any]], Any]
+
+_EMPTY = inspect.Parameter.empty
+
+
+def _to_bool(value: str) -> bool:
+    lowered = value.lower()
+    if lowered in ('1', 'true', 'yes', 'on'):
+        return True
+    if lowered in ('0', 'false', 'no', 'off', ''):
+        return False
+    raise ValueError(f'not a boolean: {value!r}')
+
+
+#: What a query or path value can be converted to, by annotation.
+_SCALARS: Dict[Any, Callable[[str], Any]] = {
+    str: str,
+    int: int,
+    float: float,
+    bool: _to_bool,
+    uuid.UUID: uuid.UUID,
+}
+
+
+def compile_binder(endpoint: Callable[..., Any], segments: List[Segment]) -> Optional[Binder]:
+    """
+    Work out once, from an endpoint's signature and type hints, where each of
+    its arguments comes from, and return the function that fetches them all
+    for a request -- or None for an endpoint that takes none.
+
+    By parameter, first match wins:
+
+      annotated Request, or
+      named `request` and not annotated   -- the request itself
+      named after a path parameter        -- its value, converted to the
+                                             annotation if the path type
+                                             was not already it
+      annotated with a dataclass          -- the body, JSON or a urlencoded
+                                             form, as that dataclass
+      anything else                       -- the query parameter of that
+                                             name: str, int, float, bool or
+                                             UUID, or a list of one of them
+                                             for every value it was given
+
+    Nothing is inspected per request: the binder runs a list of extractors
+    made here, one per parameter. A value that is missing, with no default,
+    or cannot be converted raises RequestError -- 400, or 422 for a body
+    that does not fit its dataclass. An annotation that cannot be taken from
+    a query string is a ValueError here, when the route is added.
+
+    Example:
+        @app.route('/posts/{id:int}', method='PUT')
+        def update(id: int, post: Post, request: Request, notify: bool = False): ...
+    """
+    try:
+        signature = inspect.signature(endpoint)
+    except (TypeError, ValueError):
+        return None
+    try:
+        hints = typing.get_type_hints(endpoint)
+    except Exception:
+        # Annotations naming something not importable where the endpoint
+        # lives: take them as written.
+        hints = {}
+
+    path_names = [segment.name for segment in segments if isinstance(segment, Param)]
+    extractors: List[Tuple[str, Extractor]] = []
+    for name, parameter in signature.parameters.items():
+        if parameter.kind is inspect.Parameter.VAR_POSITIONAL:
+            continue
+        if parameter.kind is inspect.Parameter.VAR_KEYWORD:
+            # **kwargs takes the path parameters no other argument did.
+            extractors.extend(
+                (path_name, _path_param(path_name, _EMPTY))
+                for path_name in path_names if path_name not in signature.parameters
+            )
+            continue
+        if parameter.kind is inspect.Parameter.POSITIONAL_ONLY:
+            raise ValueError(f'Endpoint `{endpoint.__qualname__}` cannot take `{name}` positionally; it is passed by name')
+
+        annotation, optional = _unwrap_optional(hints.get(name, parameter.annotation))
+        if (isinstance(annotation, type) and issubclass(annotation, Request)) or (annotation is _EMPTY and name == 'request'):
+            extractor: Extractor = _request
+        elif name in path_names:
+            extractor = _path_param(name, annotation)
+        elif isinstance(annotation, type) and dataclasses.is_dataclass(annotation):
+            extractor = _body(annotation, parameter.default)
+        else:
+            extractor = _query_param(name, annotation, parameter.default, optional)
+        extractors.append((name, extractor))
+
+    if not extractors:
+        return None
+
+    def bind(request: Request, path_params: Dict[str, Any]) -> Dict[str, Any]:
+        return {name: extract(request, path_params) for name, extract in extractors}
+    return bind
+
+
+def _unwrap_optional(annotation: Any) -> Tuple[Any, bool]:
+    """Optional[int] -> (int, True); int -> (int, False)"""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union or origin is types.UnionType:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0], True
+    return annotation, False
+
+
+def _scalar(name: str, annotation: Any) -> Optional[Callable[[str], Any]]:
+    """The conversion for annotation; None for a str, or no annotation."""
+    if annotation is _EMPTY or annotation is Any or annotation is str:
+        return None
+    if annotation in _SCALARS:
+        return _SCALARS[annotation]
+    raise ValueError(f'Cannot take `{name}` as {annotation!r} from a URL; expected one of str, int, float, bool, UUID')
+
+
+def _request(request: Request, path_params: Dict[str, Any]) -> Request:
+    return request
+
+
+def _path_param(name: str, annotation: Any) -> Extractor:
+    convert = _scalar(name, annotation)
+    if convert is None:
+        return lambda request, path_params: path_params[name]
+
+    def extract(request: Request, path_params: Dict[str, Any]) -> Any:
+        value = path_params[name]
+        if type(value) is annotation:
+            return value
+        try:
+            return convert(str(value))
+        except ValueError:
+            raise RequestError(HttpStatus.BAD_REQUEST, f'Invalid value for path parameter `{name}`: {value!r}') from None
+    return extract
+
+
+def _query_param(name: str, annotation: Any, default: Any, optional: bool) -> Extractor:
+    if typing.get_origin(annotation) is list or annotation is list:
+        args = typing.get_args(annotation)
+        convert_each = _scalar(name, args[0] if args else _EMPTY)
+
+        def extract_list(request: Request, path_params: Dict[str, Any]) -> Any:
+            values = request.query_params.getlist(name)
+            if not values and default is not _EMPTY:
+                return default
+            if convert_each is None:
+                return values
+            try:
+                return [convert_each(value) for value in values]
+            except ValueError:
+                raise RequestError(HttpStatus.BAD_REQUEST, f'Invalid value for query parameter `{name}`') from None
+        return extract_list
+
+    convert = _scalar(name, annotation)
+
+    def extract(request: Request, path_params: Dict[str, Any]) -> Any:
+        value = request.query_params.get(name)
+        if value is None:
+            if default is not _EMPTY:
+                return default
+            if optional:
+                return None
+            raise RequestError(HttpStatus.BAD_REQUEST, f'Missing query parameter `{name}`')
+        if convert is None:
+            return value
+        try:
+            return convert(value)
+        except ValueError:
+            raise RequestError(HttpStatus.BAD_REQUEST, f'Invalid value for query parameter `{name}`: {value!r}') from None
+    return extract
+
+
+def _body(cls: type, default: Any) -> Extractor:
+    names = frozenset(field.name for field in dataclasses.fields(cls) if field.init)
+
+    def extract(request: Request, path_params: Dict[str, Any]) -> Any:
+        if request.content_length <= 0 and not request.chunked:
+            if default is not _EMPTY:
+                return default
+            raise RequestError(HttpStatus.UNPROCESSABLE_ENTITY, f'Missing request body for {cls.__name__}')
+        if request.header('content-type', '').startswith(RequestBodyParser.Type.FORM):
+            data: Any = request.form().to_dict()
+        else:
+            try:
+                data = request.json()
+            except RequestError:
+                raise
+            except ValueError:
+                raise RequestError(HttpStatus.BAD_REQUEST, 'Invalid JSON body') from None
+        if not isinstance(data, dict):
+            raise RequestError(HttpStatus.UNPROCESSABLE_ENTITY, f'Expected an object for {cls.__name__}')
+        try:
+            # Keys the dataclass has no field for are left out.
+            return cls(**{key: value for key, value in data.items() if key in names})
+        except TypeError as e:
+            raise RequestError(HttpStatus.UNPROCESSABLE_ENTITY, f'Invalid body for {cls.__name__}: {e}') from None
+    return extract
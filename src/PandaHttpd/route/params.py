@@ -0,0 +1,154 @@
+import re
+import urllib.parse
+import uuid
+
+from typing import Any, Callable, Dict, List, Optional, Union
+
+
+class Converter:
+    """What a `{name:type}` path parameter takes, and what it turns it into.
+
+    convert() raises ValueError for a segment that is not of the type, so
+    that the router can go on to the next candidate. A converter with
+    `rest` set takes every segment left, slashes and all; it is always the
+    last part of a path.
+    """
+
+    __slots__ = ('name', 'convert', 'rest', 'priority')
+
+    def __init__(self, name: str, convert: Callable[[str], Any], rest: bool = False, priority: int = 0) -> None:
+        self.name: str = name
+        self.convert: Callable[[str], Any] = convert
+        self.rest: bool = rest
+        #: Tried in this order where several parameters could take a segment:
+        #: the narrow types before `str`, and `path` last of all.
+        self.priority: int = priority
+
+    def __repr__(self) -> str:
+        return f'Converter({self.name})'
+
+
+_FLOAT = re.compile(r'[0-9]+(?:\.[0-9]+)?')
+
+
+def _str(segment: str) -> str:
+    if not segment:
+        raise ValueError('empty segment')
+    return segment
+
+
+def _int(segment: str) -> int:
+    # Digits only: int() would also take ' 1', '+1' and '1_000'.
+    if not (segment.isascii() and segment.isdigit()):
+        raise ValueError(f'not an integer: {segment!r}')
+    return int(segment)
+
+
+def _float(segment: str) -> float:
+    if not _FLOAT.fullmatch(segment):
+        raise ValueError(f'not a number: {segment!r}')
+    return float(segment)
+
+
+def _uuid(segment: str) -> uuid.UUID:
+    if len(segment) != 36:
+        raise ValueError(f'not a UUID: {segment!r}')
+    return uuid.UUID(segment)
+
+
+CONVERTERS: Dict[str, Converter] = {
+    'int': Converter('int', _int, priority=0),
+    'float': Converter('float', _float, priority=1),
+    'uuid': Converter('uuid', _uuid, priority=2),
+    'str': Converter('str', _str, priority=3),
+    'path': Converter('path', str, rest=True, priority=4),
+}
+
+
+class Param:
+    """A `{name}` or `{name:type}` segment of a route path."""
+
+    __slots__ = ('name', 'converter')
+
+    def __init__(self, name: str, converter: Converter) -> None:
+        self.name: str = name
+        self.converter: Converter = converter
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Param):
+            return NotImplemented
+        return self.name == other.name and self.converter is other.converter
+
+    def __hash__(self) -> int:
+        return hash((self.name, self.converter.name))
+
+    def __repr__(self) -> str:
+        return f'{{{self.name}:{self.converter.name}}}'
+
+
+Segment = Union[str, Param]
+
+_PARAM = re.compile(r'\{([A-Za-z_][A-Za-z0-9_]*)(?::([A-Za-z_]+))?\}')
+
+
+def parse_path(path: str) -> List[Segment]:
+    """
+    "/posts/{id:int}/files/{rest:path}" -> ['posts', {id:int}, 'files', {rest:path}]
+
+    The path is split at every `/`, the leading one dropped: "/" is [''],
+    and a trailing slash is an empty last segment, as it is in a request.
+    A parameter is a whole segment; `{name}` is `{name:str}`.
+    """
+    segments: List[Segment] = []
+    names = set()
+    parts = path.split('/')[1:]
+    for i, part in enumerate(parts):
+        if '{' not in part and '}' not in part:
+            segments.append(part)
+            continue
+        match = _PARAM.fullmatch(part)
+        if match is None:
+            raise ValueError(f'Invalid path parameter `{part}` in {path!r}; expected {{name}} or {{name:type}}')
+        name, kind = match.group(1), match.group(2) or 'str'
+        if kind not in CONVERTERS:
+            raise ValueError(f'Unknown path parameter type `{kind}` in {path!r}; expected one of {", ".join(CONVERTERS)}')
+        if name in names:
+            raise ValueError(f'Path parameter `{name}` appears twice in {path!r}')
+        converter = CONVERTERS[kind]
+        if converter.rest and i != len(parts) - 1:
+            raise ValueError(f'A `{kind}` parameter must be the last part of the path: {path!r}')
+        names.add(name)
+        segments.append(Param(name, converter))
+    return segments
+
+
+def convert(param: Param, segments: List[str], index: int) -> Any:
+    """The value of param for the request segments from index on. Raises
+    ValueError if they are not of its type."""
+    if param.converter.rest:
+        value = '/'.join(segments[index:])
+    else:
+        value = segments[index]
+    if '%' in value:
+        value = urllib.parse.unquote(value)
+    return param.converter.convert(value)
+
+
+def match_segments(pattern: List[Segment], path: str) -> Optional[Dict[str, Any]]:
+    """The parameters of path if it matches pattern, or None."""
+    segments = path.split('/')[1:]
+    params: Dict[str, Any] = {}
+    for i, part in enumerate(pattern):
+        if i >= len(segments):
+            return None
+        if isinstance(part, str):
+            if part != segments[i]:
+                return None
+            continue
+        try:
+            params[part.name] = convert(part, segments, i)
+        except ValueError:
+            return None
+        if part.converter.rest:
+            return params
+    return params if len(segments) == len(pattern) else None
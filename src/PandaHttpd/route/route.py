@@ -1,18 +1,34 @@
-from ..filehandler import FileHandler
-from ..http import FileResponse, HttpStatus, JsonResponse, Response
+from ..filehandler import FileHandler, StaticCache, StaticEntry
+from ..http import FileResponse, HttpStatus, JsonResponse, Request, Response
+from ..http.response import not_modified
+from ..middleware import BaseMiddleware, DefaultMiddleware, Middleware
 from .._typing import UserFunc, HasPrefix
 from ..utils import MappingStr
+from .binder import Binder, compile_binder
+from .params import Segment, match_segments, parse_path
 
 import mimetypes
-from typing import Optional, Type
+import os
+import stat
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Type
 from pathlib import Path
 
 
 mimetypes.add_type("application/x-yaml", ".yaml")
 mimetypes.add_type("application/x-yaml", ".yml")
 
+_FORWARDED_REQUEST_HEADERS: FrozenSet[str] = frozenset(DefaultMiddleware.FORWARDED_REQUEST_HEADERS)
+
+
+def _response_headers(dict_headers: Optional[MappingStr]) -> Optional[MappingStr]:
+    """dict_headers without the request headers DefaultMiddleware forwards:
+    those are the client's own, for the handlers to read, not something to
+    send back to it."""
+    if not dict_headers:
+        return dict_headers
+    return {name: value for name, value in dict_headers.items() if name.lower() not in _FORWARDED_REQUEST_HEADERS}
+
 
-# TODO: MUST SUPPORT MIDDLEWARE
 class BaseRoute:
     
     def __init__(self,
@@ -20,15 +36,47 @@ class BaseRoute:
         method: str,
         endpoint: UserFunc,
         response_class: Type[Response] = JsonResponse,
+        body_limit: Optional[int] = None,
+        content_types: Optional[Iterable[str]] = None,
+        middleware: Optional[Sequence[BaseMiddleware]] = None,
     ):
         self.path: str = path
         self.method: str = method.upper()
         self.endpoint: UserFunc = endpoint
         self._response_class: Type[Response] = response_class
+        # The most body a request to this route may carry; None leaves it to
+        # the app's max_body_size.
+        self.body_limit: Optional[int] = body_limit
+        # The media types a request body to this route may have; None takes
+        # any, and a request without a body is never turned away for it.
+        self.content_types: Optional[FrozenSet[str]] = (
+            frozenset(t.lower() for t in content_types) if content_types is not None else None
+        )
+        # Run around this route's endpoint only, inside the app's own; None
+        # for none, so a route without costs nothing.
+        self.middleware: Optional[Middleware] = Middleware(middleware) if middleware else None
         
         assert path.startswith('/'), 'Route path must start with "/"'
+        # The path split into segments, `{name:type}` parameters parsed:
+        # what the Router files the route under.
+        self.segments: List[Segment] = parse_path(path)
         assert callable(self.endpoint) or self.endpoint is None, 'Endpoint must be a callable or None'
         assert issubclass(response_class, Response), 'Response class must be a subclass of Response'
+        # Where the endpoint's arguments come from, worked out once; None if
+        # it takes none.
+        self.binder: Optional[Binder] = self.compile_binder()
+
+    def compile_binder(self) -> Optional[Binder]:
+        if self.endpoint is None:
+            return None
+        return compile_binder(self.endpoint, self.segments)
+
+    def bind(self, request: Request, path_params: Dict[str, Any]) -> Dict[str, Any]:
+        """The keyword arguments to call the endpoint with for request.
+        RequestError if the request does not have what it takes."""
+        if self.binder is None:
+            return {}
+        return self.binder(request, path_params)
 		
     def handle(self, 
         dict_headers: Optional[MappingStr],
@@ -40,7 +88,7 @@ class BaseRoute:
         
         res_ins: Response = self.response_class(
             body=body, 
-            dict_headers=dict_headers, 
+            dict_headers=_response_headers(dict_headers), 
         )
         return res_ins
     
@@ -53,9 +101,16 @@ class BaseRoute:
         assert issubclass(response_class, Response), 'Response class must be a subclass of Response'
         self._response_class = response_class
 
+    def accepts(self, content_type: Optional[str]) -> bool:
+        """Whether a body of this Content-Type is one the route takes."""
+        if self.content_types is None:
+            return True
+        media_type = (content_type or '').split(';', 1)[0].strip().lower()
+        return media_type in self.content_types
+
     def match(self, path: str, method: str) -> bool:
         requested = method.upper()
-        if self.path != path:
+        if self.path != path and match_segments(self.segments, path) is None:
             return False
         if self.method == requested:
             return True
@@ -88,18 +143,35 @@ class Mount(BaseRoute):
         path: str,
         handler: HasPrefix,
         file_handler: FileHandler = FileHandler(),
+        middleware: Optional[Sequence[BaseMiddleware]] = None,
+        cache: Optional[StaticCache] = None,
     ):
         self.file_handler: FileHandler = file_handler
         self.handler = handler
+        # Where files below STREAM_THRESHOLD are kept once read; None reads
+        # them from disk on every request.
+        self.cache: Optional[StaticCache] = cache
         super().__init__(
             path=path,
             method='GET',
             endpoint=file_handler.read_file,
             response_class=Response,
+            middleware=middleware,
         )
         
+    def compile_binder(self) -> Optional[Binder]:
+        # The endpoint is the file handler's, called by handle() itself.
+        return None
+
     def match(self, path: str, method: str) -> bool:
-        return path.startswith(self.path) and method.upper() in ('GET', 'HEAD')
+        # On a segment boundary: `/static` serves `/static/app.js`, not
+        # `/staticfoo`.
+        prefix = self.path.rstrip('/')
+        return (
+            method.upper() in ('GET', 'HEAD')
+            and path.startswith(prefix)
+            and path[len(prefix):len(prefix) + 1] in ('', '/')
+        )
         
     def handle(self,
     	dict_headers: MappingStr,
@@ -113,14 +185,29 @@ class Mount(BaseRoute):
 		file_path = `<physical_path_to_mount>/path/to/file.png`
         """
         
+        wants_range = bool(dict_headers.get('range'))
+        # Keyed by the directory as well as the path: of two mounts, one
+        # inside the other, a path can lead out of one and not the other.
+        cache_key = (self.handler.prefix, dict_headers['path'])
+        if self.cache is not None and not wants_range:
+            entry = self.cache.get(cache_key)
+            if entry is not None:
+                return self.cached_response(entry, dict_headers)
+
         request_path: Path = Path(dict_headers['path'])
         mount_root = Path(self.handler.prefix).resolve()
         file_path = (Path(self.handler.prefix) / request_path.relative_to(self.path)).resolve()
+        try:
+            file_stat: Optional[os.stat_result] = file_path.stat()
+        except OSError:
+            file_stat = None
         if (
             not file_path.is_relative_to(mount_root)
-            or not file_path.exists()
-            or not file_path.is_file()
+            or file_stat is None
+            or not stat.S_ISREG(file_stat.st_mode)
         ):
+            if self.cache is not None:
+                self.cache.forget(cache_key)
             response: Response = self.file_handler.handler(dict_headers, *args, **kwargs)
             return response
         
@@ -131,14 +218,18 @@ class Mount(BaseRoute):
         # matters, is streamed from disk. Everything else keeps the in-memory
         # path, because that is what the compression middleware can act on --
         # and the small text assets are exactly the ones worth compressing.
-        wants_range = bool(dict_headers.get('range'))
-        if wants_range or file_path.stat().st_size >= self.STREAM_THRESHOLD:
+        if wants_range or file_stat.st_size >= self.STREAM_THRESHOLD:
             return FileResponse(
                 file_path,
                 media_type=media_type,
                 request_headers=dict_headers,
             )
 
+        if self.cache is not None:
+            entry = self.cache.put(cache_key, file_path, file_stat, media_type)
+            if entry is not None:
+                return self.cached_response(entry, dict_headers)
+
         conditional = FileResponse(
             file_path, media_type=media_type, request_headers=dict_headers
         )
@@ -162,6 +253,23 @@ class Mount(BaseRoute):
             },
 		)
         return res_ins
+
+    def cached_response(self, entry: StaticEntry, dict_headers: MappingStr) -> Response:
+        """The answer from a cache entry: the gzipped copy if the client takes
+        it, and a 304 if it already holds what would be sent."""
+        body, headers = entry.variant(dict_headers.get('accept-encoding'))
+        if not_modified(dict_headers, headers['ETag'], entry.last_modified):
+            return self.response_class(
+                status_code=HttpStatus.NOT_MODIFIED,
+                media_type=entry.media_type,
+                dict_headers=headers,
+            )
+        return self.response_class(
+            status_code=200,
+            body=body,
+            media_type=entry.media_type,
+            dict_headers=headers,
+        )
     
     def __str__(self) -> str:
         class_name = self.__class__.__name__
@@ -1,19 +1,67 @@
 from .route import BaseRoute, Route, Mount
-from ..filehandler import FileHandler
+from .params import Param, convert
+from ..filehandler import FileHandler, StaticCache
 from ..http import JsonResponse, Response, PlainTextResponse
 from ..utils import MappingStr
+from ..middleware import BaseMiddleware
 from .._typing import GenericHandler, HeaderHandler, UserFunc, HasPrefix
 
-from typing import Optional, Type, List, Sequence
-    
+from typing import Any, Dict, Iterable, Optional, Type, List, Sequence, Tuple
+
+
+class _Node:
+    """A point in the route tree: the path so far, one segment per level."""
+
+    __slots__ = ('static', 'params', 'routes', 'mount')
+
+    def __init__(self) -> None:
+        self.static: Dict[str, _Node] = {}
+        # In the order they are tried: see Converter.priority.
+        self.params: List[Tuple[Param, _Node]] = []
+        self.routes: Dict[str, BaseRoute] = {}
+        self.mount: Optional[Mount] = None
+
+
+def _for_method(routes: Dict[str, BaseRoute], method: str) -> Optional[BaseRoute]:
+    route = routes.get(method)
+    if route is None and method == 'HEAD':
+        # HEAD is answered by whatever answers GET; see BaseRoute.match.
+        route = routes.get('GET')
+    return route
+
 
 class Router:
+    """
+    Finds the route for a request in a tree of the route paths, one level
+    per segment, so that what a lookup costs depends on how deep the path
+    is, not on how many routes there are.
+
+    Where more than one route could answer a path, the most specific does:
+    at every segment, a literal one before a parameter, a narrow parameter
+    type (int, float, uuid) before str, and path last; a route before a
+    mount; and of the mounts, the one with the longest prefix. Paths made
+    only of literals are also kept in a dict, and found with one lookup.
+
+    A route's path parameters come back from resolve() converted to their
+    types, and are passed to its endpoint as keyword arguments.
+
+    Example:
+        router.add_route('/posts/{slug}', 'GET', show_post)
+        router.add_route('/posts/{id:int}', 'GET', show_post_by_id)
+        router.resolve('/posts/42', 'GET')     # (Route(/posts/{id:int}), {'id': 42})
+        router.resolve('/posts/hello', 'GET')  # (Route(/posts/{slug}), {'slug': 'hello'})
+    """
     
     def __init__(self,
         routes: Optional[Sequence[BaseRoute]] = None,
         default_handler: Optional[HeaderHandler] = None,
     ):
-        self.routes: List[BaseRoute] = [] if routes is None else list(routes)
+        self.routes: List[BaseRoute] = []
+        self._root: _Node = _Node()
+        # path -> method -> route, for paths without parameters.
+        self._static: Dict[str, Dict[str, BaseRoute]] = {}
+        for route in routes or ():
+            self.add(route)
         self.default_handler: HeaderHandler = \
             self.set_default_handler(default_handler) \
             if default_handler is not None \
@@ -24,32 +72,120 @@ class Router:
         method: str, 
         endpoint: UserFunc,
         response_class: Type[Response] = JsonResponse,
+        body_limit: Optional[int] = None,
+        content_types: Optional[Iterable[str]] = None,
+        middleware: Optional[Sequence[BaseMiddleware]] = None,
     ) -> None:
-        self.routes.append(Route(
+        self.add(Route(
             path=path, 
             method=method, 
             endpoint=endpoint,
             response_class=response_class,
+            body_limit=body_limit,
+            content_types=content_types,
+            middleware=middleware,
         ))
         
     def add_mount(self,
         path: str,
         handler: HasPrefix,
         file_handler: FileHandler | None = None,
+        middleware: Optional[Sequence[BaseMiddleware]] = None,
+        cache: Optional[StaticCache] = None,
     ) -> None:
         if file_handler is None:
             file_handler = FileHandler(default_handler=self.default_handler)
             
-        self.routes.append(Mount(
+        self.add(Mount(
             path=path,
             handler=handler,
             file_handler=file_handler,
+            middleware=middleware,
+            cache=cache,
         ))
 
+    def add(self, route: BaseRoute) -> None:
+        """File a route in the tree. Of two routes for the same path and
+        method, the first one added answers."""
+        if isinstance(route, Mount):
+            segments = route.path.rstrip('/').split('/')[1:]
+            if any('{' in segment for segment in segments):
+                raise ValueError(f'A mount path cannot have parameters: {route.path!r}')
+        else:
+            segments = route.segments
+
+        node = self._root
+        for segment in segments:
+            if isinstance(segment, str):
+                node = node.static.setdefault(segment, _Node())
+                continue
+            for param, child in node.params:
+                if param == segment:
+                    node = child
+                    break
+            else:
+                child = _Node()
+                node.params.append((segment, child))
+                node.params.sort(key=lambda entry: entry[0].converter.priority)
+                node = child
+
+        if isinstance(route, Mount):
+            if node.mount is None:
+                node.mount = route
+        else:
+            node.routes.setdefault(route.method, route)
+            if all(isinstance(segment, str) for segment in segments):
+                self._static.setdefault(route.path, {}).setdefault(route.method, route)
+        self.routes.append(route)
+
+    def resolve(self, path: str, method: str) -> Tuple[Optional[BaseRoute], Dict[str, Any]]:
+        """The route for a request, and its path parameters; (None, {}) if
+        there is none."""
+        method = method.upper()
+        routes = self._static.get(path)
+        if routes is not None:
+            route = _for_method(routes, method)
+            if route is not None:
+                return route, {}
+        params: Dict[str, Any] = {}
+        route = self._search(self._root, path.split('/')[1:], 0, method, params)
+        return route, params
+
     def find_route(self, path: str, method: str) -> Optional[BaseRoute]:
-        for route in self.routes:
-            if route.match(path, method):
+        return self.resolve(path, method)[0]
+
+    def _search(self,
+        node: _Node,
+        segments: List[str],
+        index: int,
+        method: str,
+        params: Dict[str, Any],
+    ) -> Optional[BaseRoute]:
+        if index == len(segments):
+            route = _for_method(node.routes, method)
+            if route is not None:
                 return route
+        else:
+            child = node.static.get(segments[index])
+            if child is not None:
+                route = self._search(child, segments, index + 1, method, params)
+                if route is not None:
+                    return route
+            for param, child in node.params:
+                try:
+                    value = convert(param, segments, index)
+                except ValueError:
+                    continue
+                if param.converter.rest:
+                    route = _for_method(child.routes, method)
+                else:
+                    route = self._search(child, segments, index + 1, method, params)
+                if route is not None:
+                    params[param.name] = value
+                    return route
+        # Nothing further down: the deepest mount on the way wins.
+        if node.mount is not None and method in ('GET', 'HEAD'):
+            return node.mount
         return None
     
     def set_default_handler(self, handler: GenericHandler) -> HeaderHandler:
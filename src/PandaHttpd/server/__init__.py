@@ -0,0 +1,25 @@
+from . import handover, listeners
+
+from .admission import Admission
+from .intake import Intake
+from .limiter import ConcurrencyLimiter
+from .metrics import Metrics
+from .prefork import Supervisor
+from .protocol import HttpProtocol
+from .sockopts import SocketOptions
+from .timers import Timer, TimerHeap
+
+
+__all__ = [
+    'Admission',
+    'ConcurrencyLimiter',
+    'HttpProtocol',
+    'Intake',
+    'Metrics',
+    'SocketOptions',
+    'Supervisor',
+    'Timer',
+    'TimerHeap',
+    'handover',
+    'listeners',
+]
@@ -0,0 +1,212 @@
+from ..http import PlainTextResponse, HttpStatus
+from .._typing import Socket
+from .limiter import ConcurrencyLimiter
+from .metrics import Metrics
+from .timers import Timer, TimerHeap
+
+import collections
+import socket
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Deque, List, Optional, Set, Tuple
+
+
+class _Job:
+    __slots__ = ('queued_at', 'fn', 'sock', 'args', 'timer')
+
+    def __init__(self, fn: Callable[..., Any], sock: Socket, args: Tuple[Any, ...]) -> None:
+        self.queued_at: float = time.monotonic()
+        self.fn: Callable[..., Any] = fn
+        self.sock: Socket = sock
+        self.args: Tuple[Any, ...] = args
+        # Sheds the job at max_wait if it is still waiting then.
+        self.timer: Optional[Timer] = None
+
+
+class Admission:
+    """Decides when work reaches a worker thread: now, later, or never.
+
+    At most limiter.limit jobs run at once; that limit is what sizes the pool,
+    since the executor only starts a thread when a job is given to it. Beyond
+    the limit, jobs wait here, in order.
+
+    ThreadPoolExecutor would queue without limit. Under a spike that means
+    accepted connections pile up behind the workers for longer than any client
+    will wait, and the server spends the rest of the spike answering requests
+    whose clients have already given up. Past max_queued, or once a connection
+    has waited max_wait seconds, it is answered at once with a 503 and a
+    Retry-After instead -- which costs a single send of bytes rendered once.
+    The wait is timed on `timers`, whoever runs it -- under serve(), the
+    intake's -- so that a connection is shed on time even while every worker
+    is stuck; without it, only when a worker frees up.
+
+    Counters and gauges, in the app's Metrics:
+
+      queue_depth        -- connections waiting for a worker
+      in_flight          -- connections a worker is handling
+      concurrency_limit  -- the limiter's current limit
+      shed               -- connections answered with 503, for either reason
+      shed_queue_full    -- ... because the queue was at max_queued
+      shed_queue_wait    -- ... because they had waited longer than max_wait
+    """
+
+    def __init__(self,
+        executor: Executor,
+        metrics: Metrics,
+        limiter: ConcurrencyLimiter,
+        max_queued: int = 0,
+        max_wait: float = 0.0,
+        retry_after: int = 1,
+        timers: Optional[TimerHeap] = None,
+    ) -> None:
+        self.executor: Executor = executor
+        self.metrics: Metrics = metrics
+        self.limiter: ConcurrencyLimiter = limiter
+        self.max_queued: int = max_queued
+        self.max_wait: float = max_wait
+        self.timers: Optional[TimerHeap] = timers
+
+        self._waiting: Deque[_Job] = collections.deque()
+        self._in_flight: int = 0
+        self._running: Set[Socket] = set()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+        response = PlainTextResponse(
+            status_code=HttpStatus.SERVICE_UNAVAILABLE,
+            body=b'503 Service Unavailable',
+            dict_headers={'Retry-After': str(retry_after)},
+        )
+        self._rejection: bytes = response.encode_head() + response.body
+        self.metrics.set('concurrency_limit', self.limiter.limit)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiting)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def submit(self, fn: Callable[..., Any], sock: Socket, *args: Any) -> bool:
+        """Run fn(sock, *args) on a worker, now or once one is free; or shed
+        sock if too many are already waiting."""
+        job = _Job(fn, sock, args)
+        with self._lock:
+            if self._in_flight < self.limiter.limit:
+                self._in_flight += 1
+                start: Optional[_Job] = job
+            elif self.max_queued and len(self._waiting) >= self.max_queued:
+                start = None
+            else:
+                self._waiting.append(job)
+                self.metrics.set('queue_depth', len(self._waiting))
+                if self.max_wait and self.timers is not None:
+                    job.timer = self.timers.schedule(job.queued_at + self.max_wait, lambda: self._expire(job))
+                return True
+            self.metrics.set('in_flight', self._in_flight)
+
+        if start is None:
+            self.shed(sock, 'shed_queue_full')
+            return False
+        self.executor.submit(self._run, start)
+        return True
+
+    def _run(self, job: _Job) -> None:
+        sock = job.sock
+        with self._lock:
+            self._running.add(sock)
+        started = time.monotonic()
+        try:
+            job.fn(sock, *job.args)
+        finally:
+            with self._lock:
+                in_flight = self._in_flight
+            self.limiter.record(time.monotonic() - started, in_flight)
+            self._finish(sock)
+
+    def _expire(self, job: _Job) -> None:
+        """Shed a job that has waited max_wait, unless it has been started."""
+        with self._lock:
+            try:
+                self._waiting.remove(job)
+            except ValueError:
+                return
+            self.metrics.set('queue_depth', len(self._waiting))
+            if not self._in_flight and not self._waiting:
+                self._idle.notify_all()
+        self.shed(job.sock, 'shed_queue_wait')
+
+    def _finish(self, sock: Socket) -> None:
+        expired: List[Socket] = []
+        runnable: List[_Job] = []
+        with self._lock:
+            self._running.discard(sock)
+            self._in_flight -= 1
+            now = time.monotonic()
+            while self._waiting and self._in_flight < self.limiter.limit:
+                job = self._waiting.popleft()
+                if job.timer is not None:
+                    job.timer.cancel()
+                if self.max_wait and now - job.queued_at > self.max_wait:
+                    expired.append(job.sock)
+                    continue
+                self._in_flight += 1
+                runnable.append(job)
+            self.metrics.set('queue_depth', len(self._waiting))
+            self.metrics.set('in_flight', self._in_flight)
+            self.metrics.set('concurrency_limit', self.limiter.limit)
+            if not self._in_flight and not self._waiting:
+                self._idle.notify_all()
+
+        for sock in expired:
+            self.shed(sock, 'shed_queue_wait')
+        for job in runnable:
+            self.executor.submit(self._run, job)
+
+    def shed(self, sock: Socket, reason: str) -> None:
+        """Answer 503 and close, without blocking on a client that is not reading."""
+        self.metrics.incr('shed')
+        self.metrics.incr(reason)
+        try:
+            sock.setblocking(False)
+            sock.send(self._rejection)
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        finally:
+            sock.close()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until nothing is running or waiting; False if timeout passed first.
+
+        The executor refuses new jobs once it is shutting down, and waiting
+        jobs are only started as running ones finish -- so it must not be shut
+        down before this returns.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._in_flight and not self._waiting, timeout)
+
+    def abort(self) -> None:
+        """Cut off every connection still waiting or being handled.
+
+        Shutting a socket down makes whatever a worker is blocked on with it
+        fail at once, so the worker finishes now rather than when its client
+        does.
+        """
+        with self._lock:
+            waiting = [job.sock for job in self._waiting]
+            for job in self._waiting:
+                if job.timer is not None:
+                    job.timer.cancel()
+            self._waiting.clear()
+            running = list(self._running)
+            self.metrics.set('queue_depth', 0)
+        for sock in waiting:
+            sock.close()
+        for sock in running:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
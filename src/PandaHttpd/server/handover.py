@@ -0,0 +1,65 @@
+"""Handing a running server over to a fresh copy of itself.
+
+A restart here is not stop-then-start, which refuses connections for as long
+as the new process takes to come up. The running process starts its
+successor -- the same interpreter and command line, so whatever code is on
+disk now -- and passes it the listening sockets by file descriptor. Both then
+accept on the very same sockets for a moment, so there is no instant at which
+nothing is listening. Once the successor is serving it sends its predecessor
+SIGTERM, and the predecessor drains and exits.
+"""
+from .._typing import Socket
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+from typing import List, Optional, Sequence
+
+
+#: Comma-separated descriptors of listening sockets a successor inherits.
+ENV_LISTEN_FDS: str = 'PANDAHTTPD_LISTEN_FDS'
+#: Pid of the process a successor retires once it is serving.
+ENV_PREDECESSOR: str = 'PANDAHTTPD_PREDECESSOR'
+
+
+def spawn_successor(listeners: Sequence[Socket] = ()) -> int:
+    """Start a new copy of this process, handing it listeners. Returns its pid."""
+    fds = [sock.fileno() for sock in listeners]
+    env = dict(os.environ)
+    env[ENV_PREDECESSOR] = str(os.getpid())
+    if fds:
+        env[ENV_LISTEN_FDS] = ','.join(str(fd) for fd in fds)
+    else:
+        env.pop(ENV_LISTEN_FDS, None)
+
+    # orig_argv rather than argv: it keeps `-m package` and interpreter flags,
+    # which argv has already consumed.
+    process = subprocess.Popen([sys.executable, *sys.orig_argv[1:]], env=env, pass_fds=fds)
+    return process.pid
+
+
+def take_inherited_listeners() -> List[Socket]:
+    """Adopt the listeners a predecessor handed over, if there were any.
+
+    The variable is removed as it is read, so a later successor of this
+    process is only ever given what this process passes it itself.
+    """
+    fds = os.environ.pop(ENV_LISTEN_FDS, '')
+    return [socket.socket(fileno=int(fd)) for fd in fds.split(',') if fd]
+
+
+def take_predecessor() -> Optional[int]:
+    pid = os.environ.pop(ENV_PREDECESSOR, '')
+    return int(pid) if pid else None
+
+
+def retire(pid: Optional[int]) -> None:
+    """Ask a predecessor to drain and exit; it may already be gone."""
+    if pid is None:
+        return
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
@@ -0,0 +1,487 @@
+from __future__ import annotations
+
+from ..http import HttpStatus, PlainTextResponse, RequestError
+from ..http.request import head_too_large
+from .._typing import Socket
+from .timers import Timer, TimerHeap
+
+import collections
+import re
+import selectors
+import socket
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from ..app import PandaHttpd
+
+
+# Only to know how much body to wait for; the worker parses the head properly.
+_CONTENT_LENGTH = re.compile(rb'\r\ncontent-length[ \t]*:[ \t]*(\d+)', re.IGNORECASE)
+_TRANSFER_ENCODING = re.compile(rb'\r\ntransfer-encoding[ \t]*:', re.IGNORECASE)
+_EXPECT_CONTINUE = re.compile(rb'\r\nexpect[ \t]*:[ \t]*100-continue', re.IGNORECASE)
+
+#: Called with a connection whose next request is fully buffered: the socket,
+#: the client's address, the buffered bytes and how many requests the
+#: connection has already carried. The buffer is the intake's no longer, and
+#: is passed as is rather than copied.
+Handoff = Callable[[Socket, Tuple[str, int], bytearray, int], None]
+
+
+def _prerender(status: HttpStatus) -> bytes:
+    response = PlainTextResponse(status_code=status, body=f'{status.code} {status.phrase}'.encode())
+    return response.encode_head() + response.body
+
+
+#: Sent, as is, to a client that took too long sending its request.
+REQUEST_TIMEOUT_RESPONSE: bytes = _prerender(HttpStatus.REQUEST_TIMEOUT)
+
+#: Sent, as is, for a request refused before it could be parsed in full -- a
+#: RequestError -- by the status that says why. Nothing is routed and no
+#: middleware runs: the point is to answer at the cost of one send().
+REJECTION_RESPONSES: Dict[HttpStatus, bytes] = {
+    status: _prerender(status)
+    for status in (
+        HttpStatus.BAD_REQUEST,
+        HttpStatus.PAYLOAD_TOO_LARGE,
+        HttpStatus.URI_TOO_LONG,
+        HttpStatus.UNSUPPORTED_MEDIA_TYPE,
+        HttpStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+        HttpStatus.NOT_IMPLEMENTED,
+    )
+}
+
+#: After a refusal, how long what the client is still sending is read and
+#: thrown away, and how much of it at most.
+LINGER_SECONDS: float = 1.0
+LINGER_BYTES: int = 1024 * 1024
+
+
+def refuse(sock: Socket, error: RequestError) -> None:
+    """Answer a RequestError on a blocking socket, then linger.
+
+    Closing a socket with unread bytes in it sends a reset, and a reset can
+    reach the client before it has read the response -- which it then never
+    sees, and retries. So the write side is shut and whatever is still
+    coming, a body that was refused for one, is read out for a moment first.
+    """
+    try:
+        sock.settimeout(LINGER_SECONDS)
+        sock.sendall(REJECTION_RESPONSES[error.status])
+        sock.shutdown(socket.SHUT_WR)
+        deadline = time.monotonic() + LINGER_SECONDS
+        drained = 0
+        while drained < LINGER_BYTES and time.monotonic() < deadline:
+            n = len(sock.recv(64 * 1024))
+            if not n:
+                break
+            drained += n
+    except OSError:
+        pass
+
+
+def reject(sock: Socket, response: bytes = REQUEST_TIMEOUT_RESPONSE) -> None:
+    """Answer 408 -- or another pre-rendered response -- without blocking
+    on a client that is not reading."""
+    try:
+        sock.setblocking(False)
+        sock.send(response)
+        sock.shutdown(socket.SHUT_WR)
+    except OSError:
+        pass
+
+
+class _Pending:
+    __slots__ = ('sock', 'addr', 'buffer', 'scanned', 'head_length', 'content_length', 'streamed', 'served', 'body_started', 'timer')
+
+    def __init__(self, sock: Socket, addr: Tuple[str, int], buffer: bytes, served: int) -> None:
+        self.sock: Socket = sock
+        self.addr: Tuple[str, int] = addr
+        self.buffer = bytearray(buffer)
+        # Where the search for the end of the head resumes.
+        self.scanned: int = 0
+        self.head_length: int = 0
+        self.content_length: int = 0
+        # The worker is to read the body itself, whatever its size.
+        self.streamed: bool = False
+        self.served: int = served
+        self.body_started: float = 0.0
+        self.timer: Optional[Timer] = None
+
+    @property
+    def phase(self) -> str:
+        """Which of the timeouts the connection is subject to now."""
+        if not self.buffer:
+            return 'idle' if self.served else 'header'
+        return 'body' if self.head_length else 'header'
+
+
+class BodyDeadline:
+    """The body timeout, for a body a worker reads itself.
+
+    Passed to Request.handle() as on_receive: it is armed when the worker
+    first has to wait for the body, and pushed back as bytes arrive. If it
+    passes, the intake shuts the reading side of the socket, which wakes the
+    worker up with the body cut short -- and the response side still open
+    for the 408.
+    """
+
+    __slots__ = ('intake', 'sock', 'started', 'timer')
+
+    def __init__(self, intake: Intake, sock: Socket) -> None:
+        self.intake: Intake = intake
+        self.sock: Socket = sock
+        self.started: float = 0.0
+        self.timer: Optional[Timer] = None
+
+    @property
+    def expired(self) -> bool:
+        return self.timer is not None and self.timer.fired
+
+    def __call__(self, received: int) -> None:
+        app = self.intake.app
+        if self.timer is None:
+            self.started = time.monotonic()
+            self.timer = self.intake.timers.schedule(
+                self.started + app.body_timeout,
+                lambda: self.intake.cut_off(self.sock, 'body', socket.SHUT_RD),
+            )
+        else:
+            self.timer.postpone(self.started + app.body_timeout + received / app.min_transfer_rate)
+
+    def cancel(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+
+
+class Intake:
+    """Collects requests off connections, on one thread, until they are whole.
+
+    Handing a freshly accepted socket straight to a worker lets the client
+    decide how long that worker waits: a client that sends one byte at a time
+    holds a thread per connection for as long as it likes. Here every
+    connection that is waiting to send -- a new one, or a persistent one
+    between requests -- sits in a selector instead, and a worker only gets it
+    once a whole request is buffered. Workers spend their time on routing and
+    responses, and give the connection back with resume() when they are done.
+
+    A body larger than body_limit is the exception: the worker gets the
+    connection as soon as the head is in and reads the rest itself, so that
+    one large upload is not held in this thread's memory. So does a chunked
+    body, whose length is not known until it has ended, and one the client
+    holds back until told to send it -- `Expect: 100-continue` -- which
+    only the worker, with the routes to check it against, can answer.
+
+    Every connection's deadline lives in one TimerHeap, which this thread
+    expires between polls -- including those of connections a worker holds,
+    see body_deadline() and write_deadline(). Each phase has its own:
+
+      idle    -- keep_alive_timeout between requests; closed quietly
+      header  -- header_timeout from the first byte to the end of the head
+      body    -- body_timeout to start, extended by one second for every
+                 min_transfer_rate bytes received; answered with 408
+      write   -- write_timeout, extended the same way by the response size
+
+    A connection that times out counts towards `timeout` and
+    `timeout_<phase>` in the app's Metrics.
+    """
+
+    RECV_SIZE: int = 64 * 1024
+
+    def __init__(self,
+        app: PandaHttpd,
+        listeners: Sequence[Socket],
+        handoff: Handoff,
+        body_limit: int = 1024 * 1024,
+        timers: Optional[TimerHeap] = None,
+    ) -> None:
+        self.app: PandaHttpd = app
+        self.listeners: List[Socket] = list(listeners)
+        self.handoff: Handoff = handoff
+        self.body_limit: int = body_limit
+
+        # Every read lands here first, through recv_into(): a connection's
+        # buffer grows by what arrived, and no bytes object is made per read.
+        self._scratch = bytearray(self.RECV_SIZE)
+        self._scratch_view = memoryview(self._scratch)
+
+        self.selector = selectors.DefaultSelector()
+        for listener in self.listeners:
+            listener.setblocking(False)
+            self.selector.register(listener, selectors.EVENT_READ, None)
+
+        # resume() is called from worker threads; the selector belongs to this
+        # one. Returned connections are queued, and a byte on the socketpair
+        # wakes select() to pick them up.
+        self._returned: Deque[Tuple[Socket, Tuple[str, int], bytes, int]] = collections.deque()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self.selector.register(self._wake_r, selectors.EVENT_READ, self._wake_r)
+
+        self._pending: Dict[int, _Pending] = {}
+        # Shared with whatever else needs deadlines run on this thread: the
+        # Admission's queue waits.
+        self.timers: TimerHeap = timers if timers is not None else TimerHeap()
+        self._draining: bool = False
+        self._closed: bool = False
+        self._lock = threading.Lock()
+
+    def run(self, stopping: threading.Event, poll_interval: float, drain_timeout: float = 0.0) -> None:
+        """Accept and read until stopping is set, then drain.
+
+        Draining stops accepting and lets every connection that has begun a
+        request finish sending it -- those were accepted, and dropping them
+        now would be a failed request for nothing -- for up to drain_timeout
+        seconds, if that is set. Connections idle between requests are simply
+        closed.
+        """
+        try:
+            while not stopping.is_set():
+                self._poll(poll_interval)
+
+            # Take whatever is already queued, then close the listeners at
+            # once: with SO_REUSEPORT, connections the kernel queues on one
+            # after this point are reset when it closes, so the window is kept
+            # minimal.
+            for listener in self.listeners:
+                self._accept(listener)
+                self.selector.unregister(listener)
+                listener.close()
+            self._draining = True
+            for pending in [p for p in self._pending.values() if p.served and not p.buffer]:
+                self._drop(pending)
+            deadline = time.monotonic() + drain_timeout if drain_timeout else float('inf')
+            while self._pending and time.monotonic() < deadline:
+                self._poll(min(poll_interval, max(0.0, deadline - time.monotonic())))
+        finally:
+            self.close()
+
+    def _poll(self, poll_interval: float) -> None:
+        timeout = poll_interval
+        deadline = self.timers.next_deadline()
+        if deadline is not None:
+            timeout = max(0.0, min(timeout, deadline - time.monotonic()))
+        for key, _ in self.selector.select(timeout):
+            if key.data is None:
+                self._accept(key.fileobj)
+            elif key.data is self._wake_r:
+                self._adopt()
+            else:
+                self._read(key.data)
+        self.timers.run_expired()
+
+    def resume(self, sock: Socket, addr: Tuple[str, int], leftover: bytes, served: int) -> None:
+        """Take a persistent connection back to wait for its next request."""
+        with self._lock:
+            if self._closed:
+                sock.close()
+                return
+            self._returned.append((sock, addr, leftover, served))
+        try:
+            self._wake_w.send(b'\0')
+        except BlockingIOError:
+            # Already enough wake-ups queued to get the loop's attention.
+            pass
+
+    def body_deadline(self, sock: Socket) -> BodyDeadline:
+        """A body timeout for a worker about to read a body off sock itself."""
+        return BodyDeadline(self, sock)
+
+    def write_deadline(self, sock: Socket, size: int) -> Timer:
+        """Arm the write timeout for a worker about to send size bytes on sock.
+
+        Past it, the socket is shut down, and the worker's send fails.
+        """
+        app = self.app
+        return self.timers.schedule(
+            time.monotonic() + app.write_timeout + size / app.min_transfer_rate,
+            lambda: self.cut_off(sock, 'write', socket.SHUT_RDWR),
+        )
+
+    def cut_off(self, sock: Socket, phase: str, how: int) -> None:
+        """Time out a connection a worker is blocked on."""
+        self._count_timeout(phase)
+        try:
+            sock.shutdown(how)
+        except OSError:
+            pass
+
+    def reject(self, sock: Socket, response: bytes = REQUEST_TIMEOUT_RESPONSE) -> None:
+        reject(sock, response)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            returned = list(self._returned)
+            self._returned.clear()
+        for sock, *_ in returned:
+            sock.close()
+        for pending in list(self._pending.values()):
+            self._drop(pending)
+        self.selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _accept(self, listener: Socket) -> None:
+        # Everything already queued, not one per wake-up: under a burst the
+        # backlog is drained in one pass.
+        while True:
+            try:
+                sock, addr = listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            if not addr:
+                # A Unix socket's client has no address; the name of the one
+                # it connected to stands in, so the request can still be told
+                # where it came from.
+                addr = (listener.getsockname(), 0)
+            try:
+                self.app.socket_options.apply_connection(sock)
+            except OSError:
+                # Reset before it could be set up: nothing to serve.
+                sock.close()
+                continue
+            self._watch(_Pending(sock, addr, b'', 0))
+
+    def _adopt(self) -> None:
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        while True:
+            with self._lock:
+                if not self._returned:
+                    return
+                sock, addr, leftover, served = self._returned.popleft()
+            if self._draining and not leftover:
+                sock.close()
+                continue
+            self._watch(_Pending(sock, addr, leftover, served))
+
+    def _watch(self, pending: _Pending) -> None:
+        try:
+            ready = bool(pending.buffer) and self._is_ready(pending)
+        except RequestError as e:
+            # A pipelined leftover can break a limit as well as anything read
+            # here; raised, it would take this thread, and every connection
+            # with it, down.
+            self._refuse(pending, e)
+            return
+        if ready:
+            # A pipelined request that arrived along with the previous one.
+            self._handoff(pending)
+            return
+        pending.sock.setblocking(False)
+        self._pending[pending.sock.fileno()] = pending
+        self.selector.register(pending.sock, selectors.EVENT_READ, pending)
+        now = time.monotonic()
+        if pending.head_length:
+            pending.body_started = now
+        seconds = {
+            'idle': self.app.keep_alive_timeout,
+            'header': self.app.header_timeout,
+            'body': self.app.body_timeout,
+        }[pending.phase]
+        pending.timer = self.timers.schedule(now + seconds, lambda: self._time_out(pending))
+
+    def _read(self, pending: _Pending) -> None:
+        try:
+            n = pending.sock.recv_into(self._scratch_view)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self._drop(pending)
+            return
+        if not n:
+            self._drop(pending)
+            return
+
+        if not pending.buffer and pending.served:
+            # The next request has begun; it gets the header timeout rather
+            # than what is left of the keep-alive one.
+            self.timers.move(pending.timer, time.monotonic() + self.app.header_timeout)
+        pending.buffer += self._scratch_view[:n]
+
+        had_head = pending.head_length
+        try:
+            ready = self._is_ready(pending)
+        except RequestError as e:
+            self._refuse(pending, e)
+            return
+        if ready:
+            self._forget(pending)
+            self._handoff(pending)
+        elif pending.head_length:
+            app = self.app
+            if not had_head:
+                pending.body_started = time.monotonic()
+                self.timers.move(pending.timer, pending.body_started + app.body_timeout)
+            else:
+                received = len(pending.buffer) - pending.head_length
+                pending.timer.postpone(pending.body_started + app.body_timeout + received / app.min_transfer_rate)
+
+    def _is_ready(self, pending: _Pending) -> bool:
+        if not pending.head_length:
+            buffer = pending.buffer
+            idx = buffer.find(b'\r\n\r\n', max(0, pending.scanned - 3))
+            if idx < 0:
+                if len(buffer) > self.app.max_header_size:
+                    raise head_too_large(buffer, self.app.max_header_size)
+                pending.scanned = len(buffer)
+                return False
+            if idx + 4 > self.app.max_header_size:
+                raise head_too_large(buffer, self.app.max_header_size)
+            pending.head_length = idx + 4
+            lengths = {int(match.group(1)) for match in _CONTENT_LENGTH.finditer(buffer, 0, idx + 2)}
+            if len(lengths) > 1:
+                # Waiting for one while the worker reads another would leave
+                # the rest of the body to be taken for the next request.
+                raise RequestError(HttpStatus.BAD_REQUEST, 'Conflicting Content-Length values')
+            pending.content_length = lengths.pop() if lengths else 0
+            pending.streamed = (
+                _TRANSFER_ENCODING.search(buffer, 0, idx + 2) is not None
+                or _EXPECT_CONTINUE.search(buffer, 0, idx + 2) is not None
+            )
+
+        if pending.content_length > self.body_limit or pending.streamed:
+            return True
+        return len(pending.buffer) >= pending.head_length + pending.content_length
+
+    def _refuse(self, pending: _Pending, error: RequestError) -> None:
+        self.app.count_rejection(error, pending.addr)
+        self.reject(pending.sock, REJECTION_RESPONSES[error.status])
+        self._drop(pending)
+
+    def _handoff(self, pending: _Pending) -> None:
+        pending.sock.setblocking(True)
+        self.handoff(pending.sock, pending.addr, pending.buffer, pending.served)
+
+    def _time_out(self, pending: _Pending) -> None:
+        phase = pending.phase
+        self._count_timeout(phase)
+        if pending.buffer:
+            # A request was begun; the client is told why it went unanswered.
+            self.reject(pending.sock)
+        self._drop(pending)
+
+    def _count_timeout(self, phase: str) -> None:
+        self.app.metrics.incr('timeout')
+        self.app.metrics.incr(f'timeout_{phase}')
+
+    def _forget(self, pending: _Pending) -> None:
+        if pending.timer is not None:
+            pending.timer.cancel()
+        self._pending.pop(pending.sock.fileno(), None)
+        try:
+            self.selector.unregister(pending.sock)
+        except (KeyError, ValueError):
+            pass
+
+    def _drop(self, pending: _Pending) -> None:
+        self._forget(pending)
+        pending.sock.close()
@@ -0,0 +1,129 @@
+import math
+import threading
+import time
+
+import psutil
+
+
+class ConcurrencyLimiter:
+    """How many requests may run at once, found by watching their latency.
+
+    A fixed worker count is wrong in both directions: too low for endpoints
+    that mostly wait on I/O, too high for ones that burn CPU, where extra
+    threads only add contention. This adjusts the limit between min_limit and
+    max_limit with a gradient rule in the style of Netflix's
+    concurrency-limits:
+
+      * baseline  -- the latency requests have when nothing is contended. It
+                     drops at once to any faster window and creeps up slowly,
+                     so it follows a real change in the work without being
+                     dragged up by a spike.
+      * gradient  -- baseline * tolerance / recent latency, kept within
+                     [0.5, 1]. At 1 the limit is not what is slowing requests
+                     down; below it, queueing is, and the limit shrinks in
+                     proportion.
+
+    The limit grows by sqrt(limit) per window, but only while requests are
+    actually using at least half of it -- an idle server has learned nothing
+    about whether more concurrency would help. CPU saturation stops growth,
+    and memory pressure cuts the limit outright, both read through psutil.
+    psutil gives the CPU use since it was last asked, which is once per
+    window: a reading that spans much more than a window -- the first after
+    a lull -- says little about now, and allows no growth.
+
+    With min_limit == max_limit the limit is fixed and nothing is measured.
+
+    The limit bounds the requests running, not the threads: a
+    ThreadPoolExecutor never stops a thread it has started, so once the
+    limit has been high, that many threads stay alive, idle, after it
+    comes back down.
+    """
+
+    def __init__(self,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        window: float = 0.5,
+        smoothing: float = 0.2,
+        tolerance: float = 1.5,
+        cpu_high: float = 90.0,
+        memory_high: float = 90.0,
+    ) -> None:
+        assert 1 <= min_limit <= max_limit, 'Concurrency limits must satisfy 1 <= min_limit <= max_limit'
+        self.min_limit: int = min_limit
+        self.max_limit: int = max_limit
+        self.window: float = window
+        self.smoothing: float = smoothing
+        self.tolerance: float = tolerance
+        self.cpu_high: float = cpu_high
+        self.memory_high: float = memory_high
+
+        self._limit: float = float(min(max_limit, max(min_limit, initial)))
+        self._baseline: float = 0.0
+        self._count: int = 0
+        self._total: float = 0.0
+        self._peak_in_flight: int = 0
+        self._window_start: float = time.monotonic()
+        self._lock = threading.Lock()
+        # psutil's first reading is a meaningless 0.0: taken here, so that
+        # the first window's is the CPU use over that window.
+        self._cpu_read_at: float = self._window_start
+        if self.adaptive:
+            psutil.cpu_percent(None)
+
+    @property
+    def adaptive(self) -> bool:
+        return self.min_limit < self.max_limit
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def record(self, latency: float, in_flight: int) -> None:
+        """Note one request that took latency seconds with in_flight running."""
+        if not self.adaptive:
+            return
+        with self._lock:
+            self._count += 1
+            self._total += latency
+            self._peak_in_flight = max(self._peak_in_flight, in_flight)
+
+            now = time.monotonic()
+            if now - self._window_start < self.window:
+                return
+            sample = self._total / self._count
+            peak = self._peak_in_flight
+            self._count, self._total, self._peak_in_flight = 0, 0.0, 0
+            self._window_start = now
+            self._update(sample, peak, self._cpu_idle(now))
+
+    def _cpu_idle(self, now: float) -> bool:
+        """Whether the CPU has room to spare, going by its use since the last
+        reading -- if that was recent enough to go by."""
+        cpu = psutil.cpu_percent(None)
+        fresh = now - self._cpu_read_at <= 2 * self.window
+        self._cpu_read_at = now
+        return fresh and cpu < self.cpu_high
+
+    def _update(self, sample: float, peak_in_flight: int, cpu_idle: bool) -> None:
+        if not self._baseline or sample < self._baseline:
+            self._baseline = sample
+        else:
+            self._baseline += (sample - self._baseline) * 0.05
+
+        limit = self._limit
+        gradient = max(0.5, min(1.0, self._baseline * self.tolerance / sample)) if sample > 0 else 1.0
+        target = limit * gradient
+        if peak_in_flight >= limit / 2 and cpu_idle:
+            target += math.sqrt(limit)
+        if psutil.virtual_memory().percent >= self.memory_high:
+            target = min(target, limit * 0.5)
+
+        # Growth is taken whole, so a server that starts small reaches an
+        # I/O-bound workload's concurrency in seconds; cuts are smoothed, so
+        # one slow window does not halve it.
+        limit = target if target > limit else limit * (1 - self.smoothing) + target * self.smoothing
+        self._limit = min(float(self.max_limit), max(float(self.min_limit), limit))
+
+    def __repr__(self) -> str:
+        return f'<ConcurrencyLimiter limit={self.limit} [{self.min_limit}, {self.max_limit}]>'
@@ -0,0 +1,206 @@
+"""Where the server listens: addresses from the config, and sockets handed in.
+
+An address in the `bind` config is one of
+
+  host:port, [v6-host]:port   -- TCP
+  unix:/path/to/server.sock   -- a Unix domain socket, for a proxy on the
+                                 same machine: no checksums, no ports, no
+                                 TIME_WAIT
+  fd://N                      -- a listening socket already open as
+                                 descriptor N
+
+and a service manager may pass listening sockets the way systemd's socket
+activation does -- LISTEN_PID and LISTEN_FDS in the environment, descriptors
+from 3 up -- which are then served in place of whatever `bind` says.
+"""
+from .._typing import Socket
+
+import errno
+import os
+import socket
+import stat
+from typing import Any, Callable, List, Optional
+
+
+#: The first descriptor of a socket-activation set, as sd_listen_fds() has it.
+SD_LISTEN_FDS_START: int = 3
+
+
+class Address:
+    """One parsed `bind` entry."""
+
+    __slots__ = ('kind', 'host', 'port', 'path', 'fd')
+
+    def __init__(self, kind: str, host: str = '', port: int = 0, path: str = '', fd: int = -1) -> None:
+        self.kind: str = kind
+        self.host: str = host
+        self.port: int = port
+        self.path: str = path
+        self.fd: int = fd
+
+    @classmethod
+    def parse(cls, text: str) -> 'Address':
+        text = text.strip()
+        if text.startswith('unix:'):
+            path = text[len('unix:'):]
+            if not path:
+                raise ValueError(f'`{text}` names no socket path')
+            return cls('unix', path=path)
+        if text.startswith('fd://'):
+            fd = text[len('fd://'):]
+            if not fd.isdigit():
+                raise ValueError(f'`{text}` is not a descriptor number')
+            return cls('fd', fd=int(fd))
+
+        host, sep, port = text.rpartition(':')
+        if not sep or not port.isdigit() or not 0 <= int(port) <= 65535:
+            raise ValueError(f'`{text}` is not host:port, unix:/path or fd://N')
+        if host.startswith('[') and host.endswith(']'):
+            host = host[1:-1]
+        return cls('tcp', host=host or '0.0.0.0', port=int(port))
+
+    @property
+    def family(self) -> int:
+        if self.kind == 'unix':
+            return socket.AF_UNIX
+        return socket.AF_INET6 if ':' in self.host else socket.AF_INET
+
+    @property
+    def sockname(self) -> Any:
+        """What getsockname() says on a socket bound to this address."""
+        if self.kind == 'unix':
+            return self.path
+        return (self.host, self.port)
+
+    def __str__(self) -> str:
+        if self.kind == 'unix':
+            return f'unix:{self.path}'
+        if self.kind == 'fd':
+            return f'fd://{self.fd}'
+        return f'[{self.host}]:{self.port}' if ':' in self.host else f'{self.host}:{self.port}'
+
+    def __repr__(self) -> str:
+        return f'<Address {self}>'
+
+
+def describe(sock: Socket) -> str:
+    """A listening socket's address, the way `bind` would write it."""
+    name = sock.getsockname()
+    if sock.family == socket.AF_UNIX:
+        return f'unix:{name.decode() if isinstance(name, bytes) else name}'
+    if sock.family == socket.AF_INET6:
+        return f'[{name[0]}]:{name[1]}'
+    return f'{name[0]}:{name[1]}'
+
+
+def same_address(sock: Socket, address: Address) -> bool:
+    if sock.family != address.family:
+        return False
+    name = sock.getsockname()
+    if address.kind == 'unix':
+        return (name.decode() if isinstance(name, bytes) else name) == address.path
+    return tuple(name[:2]) == address.sockname
+
+
+def bind_tcp(
+    address: Address,
+    backlog: int,
+    reuse_port: bool = False,
+    prepare: Optional[Callable[[Socket], None]] = None,
+) -> Socket:
+    sock = socket.socket(address.family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        if prepare is not None:
+            prepare(sock)
+        sock.bind(address.sockname)
+        sock.listen(backlog)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def bind_unix(
+    address: Address,
+    backlog: int,
+    mode: Optional[int] = None,
+    prepare: Optional[Callable[[Socket], None]] = None,
+) -> Socket:
+    """Bind a Unix socket, replacing a stale socket file left at its path.
+
+    A file that still has a server behind it is not touched: that is an
+    address in use, exactly as it would be for TCP.
+    """
+    path = address.path
+    try:
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(path)
+            else:
+                raise OSError(errno.EADDRINUSE, f'Another server is listening on {path}')
+            finally:
+                probe.close()
+    except FileNotFoundError:
+        pass
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        if prepare is not None:
+            prepare(sock)
+        sock.bind(path)
+        if mode is not None:
+            os.chmod(path, mode)
+        sock.listen(backlog)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def adopt_fd(fd: int) -> Socket:
+    sock = socket.socket(fileno=fd)
+    if sock.type != socket.SOCK_STREAM:
+        sock.detach()
+        raise ValueError(f'Descriptor {fd} is not a stream socket')
+    return sock
+
+
+def take_activated_listeners() -> List[Socket]:
+    """Adopt sockets passed by socket activation, if they are meant for us.
+
+    The variables are removed once read, as sd_listen_fds(1) does, so that
+    nothing this process starts mistakes them for its own.
+    """
+    pid = os.environ.pop('LISTEN_PID', '')
+    count = os.environ.pop('LISTEN_FDS', '')
+    os.environ.pop('LISTEN_FDNAMES', None)
+    if not count.isdigit() or pid != str(os.getpid()):
+        return []
+    return [adopt_fd(fd) for fd in range(SD_LISTEN_FDS_START, SD_LISTEN_FDS_START + int(count))]
+
+
+def parse_mode(value: Any) -> Optional[int]:
+    """A permission mode, from 0o660 or '660'/'0660'/'0o660'."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = int(value.removeprefix('0o'), 8)
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= 0o7777:
+        raise ValueError(f'Invalid permission mode {value!r}')
+    return value
+
+
+def unlink_if_ours(path: str, inode: int) -> None:
+    """Remove a Unix socket's file, unless another server has bound the path
+    since: inode is the file's as it was right after bind_unix()."""
+    try:
+        if os.stat(path).st_ino == inode:
+            os.unlink(path)
+    except OSError:
+        pass
@@ -0,0 +1,37 @@
+import threading
+from typing import Dict
+
+
+class Metrics:
+    """Named counters the server keeps about itself, safe to share between threads.
+
+    Counters only ever go up (requests shed, connections timed out); gauges
+    are set or moved both ways (connections waiting for a worker). Both are
+    plain integers, read all at once with snapshot().
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._values: Dict[str, int] = {}
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def decr(self, name: str, amount: int = 1) -> None:
+        self.incr(name, -amount)
+
+    def set(self, name: str, value: int) -> None:
+        with self._lock:
+            self._values[name] = value
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            return self._values.get(name, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._values)
+
+    def __repr__(self) -> str:
+        return f'<Metrics {self.snapshot()!r}>'
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+from .._typing import Socket
+
+import os
+import random
+import select
+import signal
+import socket
+import time
+import traceback
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Sequence, Set
+
+if TYPE_CHECKING:
+    from ..app import PandaHttpd
+
+
+class Supervisor:
+    """Runs the server in several forked processes, and keeps them running.
+
+    One process serves all of its Python on one core, however many threads it
+    has. This forks `workers` children instead, each of which binds its own
+    listening socket with SO_REUSEPORT, so it is the kernel that spreads new
+    connections across them -- no socket is shared, and there is no accept
+    lock to contend on. Listeners that cannot be bound twice -- Unix sockets,
+    inherited descriptors -- are the exception: the supervisor opens those
+    before forking, and every child accepts on the same one.
+
+    The supervisor itself does nothing but wait on its children. One that
+    crashes is replaced. One that has served `max_requests` says so over a
+    pipe, and is replaced too -- but only sent SIGTERM once its replacement is
+    listening, so that whatever memory it accumulated is handed back without
+    the port going unserved.
+
+    Signals are for the supervisor, which passes them on as needed:
+
+      SIGTERM         -- every child stops accepting and drains, within
+                         graceful_timeout; then the supervisor exits.
+      SIGHUP/SIGUSR2  -- a new supervisor is started from the code on disk.
+                         Once its children are listening it sends this one
+                         SIGTERM, so the port is never without a listener.
+    """
+
+    #: A child that dies sooner than this after starting is crashing on start,
+    #: not under load; waiting before the next fork keeps that from spinning.
+    MIN_CHILD_LIFETIME_SECONDS: float = 1.0
+    #: How often the supervisor looks for children that have exited.
+    REAP_INTERVAL_SECONDS: float = 0.2
+    #: How long a new child gets to start listening before the supervisor
+    #: stops waiting for it to say so.
+    READY_TIMEOUT_SECONDS: float = 10.0
+
+    def __init__(self, app: PandaHttpd, serve: Callable[[Sequence[Socket]], None]) -> None:
+        if not hasattr(socket, 'SO_REUSEPORT'):
+            raise RuntimeError('`workers` needs SO_REUSEPORT, which this platform does not have')
+
+        self.app: PandaHttpd = app
+        self.serve: Callable[[Sequence[Socket]], None] = serve
+        self.workers: int = app.workers
+        self.max_requests: int = int(app.config.get('max_requests', 0))
+        # Spread over children started together, so they do not all retire,
+        # and all pay for starting a replacement, at the same moment.
+        self.max_requests_jitter: int = int(app.config.get('max_requests_jitter', 0))
+        self.children: Dict[int, float] = {}
+        # Children that announced their retirement, and have a replacement.
+        self._retired: Set[int] = set()
+        self._retiring_r: int = -1
+        self._retiring_w: int = -1
+        self._stopping: bool = False
+
+    def run(self) -> None:
+        logger = self.app.logger
+        signal.signal(signal.SIGTERM, self._on_term)
+        # Ctrl-C too is only noted, never raised: a KeyboardInterrupt that
+        # lands while the supervisor is forking is swallowed by the fork hooks,
+        # and the supervisor would carry on as if it had never been asked.
+        signal.signal(signal.SIGINT, self._on_term)
+        logger.info(f'Supervisor {os.getpid()} forking {self.workers} workers')
+
+        self.app.listen_shared()
+        self._retiring_r, self._retiring_w = os.pipe()
+        ready_r, ready_w = os.pipe()
+        for _ in range(self.workers):
+            self.spawn(ready_w)
+        os.close(ready_w)
+        self._await_ready(ready_r, self.workers)
+        self.app._retire_predecessor()
+
+        try:
+            while self.children and not self._stopping:
+                if select.select([self._retiring_r], [], [], self.REAP_INTERVAL_SECONDS)[0]:
+                    for pid in os.read(self._retiring_r, 4096).split():
+                        self._replace(int(pid))
+                self._reap()
+            if self._stopping:
+                logger.warning('Stopping workers...')
+        finally:
+            self.stop()
+            os.close(self._retiring_r)
+            os.close(self._retiring_w)
+
+    def spawn(self, ready_fd: Optional[int] = None) -> int:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return pid
+
+        code = 0
+        try:
+            # The child drains on SIGTERM like a single process does; restarts
+            # are the supervisor's business, not each child's.
+            self.app._predecessor = None
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.app.stop())
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            signal.signal(signal.SIGUSR2, signal.SIG_IGN)
+
+            os.close(self._retiring_r)
+            if self.max_requests:
+                retiring_w = self._retiring_w
+                self.app.retire_after(
+                    self.max_requests + random.randint(0, self.max_requests_jitter),
+                    announce=lambda: os.write(retiring_w, b'%d\n' % os.getpid()),
+                )
+            server_listeners = self.app.listen(reuse_port=True)
+            if ready_fd is not None:
+                os.write(ready_fd, b'.')
+                os.close(ready_fd)
+            self.serve(server_listeners)
+        except KeyboardInterrupt:
+            pass
+        except BaseException as e:
+            tb_list = traceback.extract_tb(e.__traceback__)
+            filename, line, func, text = tb_list[-1] if tb_list else ('?', 0, '?', '')
+            self.app.logger.critical(f'Worker {os.getpid()} failed in {filename}:{line} \n\t {text} -> {e}')
+            code = 1
+        finally:
+            # Never return into the supervisor's own stack.
+            os._exit(code)
+
+    def stop(self) -> None:
+        """Have every child drain and exit, killing any still there after the
+        graceful timeout."""
+        self._stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+
+        deadline = time.monotonic() + self.app.graceful_timeout + self.MIN_CHILD_LIFETIME_SECONDS
+        while self.children:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            except KeyboardInterrupt:
+                continue
+            if pid:
+                self.children.pop(pid, None)
+                continue
+            if time.monotonic() >= deadline:
+                for pid in list(self.children):
+                    self.app.logger.error(f'Worker {pid} did not drain in time, killing it')
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        self.children.pop(pid, None)
+                deadline = float('inf')
+            time.sleep(self.REAP_INTERVAL_SECONDS)
+
+    def _on_term(self, signum: int, frame: object) -> None:
+        self._stopping = True
+
+    def _replace(self, pid: int) -> None:
+        """Retire a child that has used up its request budget.
+
+        Its replacement is started and listening before the child is told to
+        stop, so there is no moment at which neither accepts -- even when
+        every child reaches its budget together.
+        """
+        if pid not in self.children or pid in self._retired:
+            return
+        self._retired.add(pid)
+        ready_r, ready_w = os.pipe()
+        self.spawn(ready_w)
+        os.close(ready_w)
+        self._await_ready(ready_r, 1)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self) -> None:
+        """Collect every child that has exited, replacing those that should
+        not have."""
+        logger = self.app.logger
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            started = self.children.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+            if pid in self._retired:
+                self._retired.discard(pid)
+                logger.info(f'Worker {pid} retired')
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            if code == 0:
+                logger.info(f'Worker {pid} exited, starting a replacement')
+            else:
+                logger.error(f'Worker {pid} exited with {code}, starting a replacement')
+                if time.monotonic() - started < self.MIN_CHILD_LIFETIME_SECONDS:
+                    time.sleep(self.MIN_CHILD_LIFETIME_SECONDS)
+            self.spawn()
+
+    def _await_ready(self, ready_r: int, expected: int) -> None:
+        """Wait until `expected` children have started listening, or died."""
+        deadline = time.monotonic() + self.READY_TIMEOUT_SECONDS
+        try:
+            while expected > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([ready_r], [], [], remaining)[0]:
+                    self.app.logger.warning(f'{expected} worker(s) not listening after {self.READY_TIMEOUT_SECONDS}s')
+                    break
+                chunk = os.read(ready_r, expected)
+                if not chunk:
+                    # Every write end is closed: all children are either
+                    # listening already or gone.
+                    break
+                expected -= len(chunk)
+        finally:
+            os.close(ready_r)
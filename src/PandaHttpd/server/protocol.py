@@ -0,0 +1,433 @@
+from __future__ import annotations
+
+from ..http import HttpStatus, Request, RequestError, Response
+from ..http.request import CONTINUE_RESPONSE, BodyBuffer, head_too_large
+from ..utils import ChunkedDecoder
+from .intake import LINGER_BYTES, LINGER_SECONDS, REJECTION_RESPONSES, REQUEST_TIMEOUT_RESPONSE
+
+import asyncio
+import tempfile
+import traceback
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Dict, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from ..app import PandaHttpd
+
+
+class HttpProtocol(asyncio.Protocol):
+    """One client connection, served on the event loop.
+
+    The threaded engine gives every connection a worker thread for its whole
+    life, so a client that is slow to send -- or idle between keep-alive
+    requests -- holds one for as long as it likes. Here the bytes are collected
+    by the loop as they arrive, and a thread is only borrowed, from the same
+    kind of pool, once a request is complete: dispatch() runs there, so the
+    routes, middleware and responses are exactly the ones the threaded engine
+    uses and none of them need to know which engine is calling.
+
+    A body over the app's body_spool_threshold is not collected in memory:
+    once its head is in, what arrives goes to a temporary file instead. A
+    chunked body is decoded as it arrives, into memory and then, should it
+    grow past the threshold, into a temporary file the same way.
+
+    Requests on one connection are answered strictly in order. Reading pauses
+    while one is being handled, which is also what keeps a pipelining client
+    from queueing unbounded work.
+
+    Timeouts are the threaded engine's -- idle, header, body and write, see
+    Intake -- kept on the loop's own timer heap: one timer per connection,
+    which progress moves by updating a deadline rather than re-arming it.
+    """
+
+    def __init__(self, app: PandaHttpd, executor: Executor, connections: Set[HttpProtocol]) -> None:
+        self.app: PandaHttpd = app
+        self.executor: Executor = executor
+        # Every open connection of the server, so that a draining server can
+        # find the idle ones to close and wait for the rest.
+        self.connections: Set[HttpProtocol] = connections
+        self.loop = asyncio.get_running_loop()
+
+        self.transport: Optional[asyncio.Transport] = None
+        self.peer: Tuple[str, int] = ('', 0)
+
+        self._buffer = bytearray()
+        # Where the search for the end of the head resumes, so a header that
+        # arrives in many pieces is not rescanned from the start each time.
+        self._scanned: int = 0
+        self._request: Optional[Request] = None
+        self._head_length: int = 0
+        # The body of the request being received, if it is being spooled.
+        self._spool: Optional[IO[bytes]] = None
+        self._spooled: int = 0
+        # Or, if it is chunked, decoded into here.
+        self._decoder: Optional[ChunkedDecoder] = None
+        self._chunked: Optional[BodyBuffer] = None
+        self._busy: bool = False
+        self._served: int = 0
+        # Refused, answered, and reading out what the client still sends
+        # before closing; see intake.refuse.
+        self._lingering: int = -1
+
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._phase: str = 'header'
+        self._deadline: float = 0.0
+        self._body_started: float = 0.0
+        self._writable = asyncio.Event()
+        self._writable.set()
+
+    # Transport callbacks
+
+    @property
+    def idle(self) -> bool:
+        """Between requests: nothing being handled, nothing half-received."""
+        return not self._busy and not self._buffer and self._request is None
+
+    def close(self) -> None:
+        """Close the connection; a response being written is cut short."""
+        self._close()
+
+    def abort(self) -> None:
+        self._cancel_timer()
+        if self.transport is not None:
+            self.transport.abort()
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.connections.add(self)
+        self.transport = transport  # type: ignore[assignment]
+        self.peer = transport.get_extra_info('peername') or ('', 0)
+        sock = transport.get_extra_info('socket')
+        if sock is not None:
+            try:
+                self.app.socket_options.apply_connection(sock)
+            except OSError:
+                pass
+        self._arm_timer('header', self.app.header_timeout)
+
+    def data_received(self, data: bytes) -> None:
+        if self._lingering >= 0:
+            self._lingering += len(data)
+            if self._lingering > LINGER_BYTES:
+                self._close()
+            return
+        if not self._buffer and not self._busy and self._request is None and self._served:
+            # The next request has started: it gets the header timeout, not
+            # what is left of the keep-alive one.
+            self._arm_timer('header', self.app.header_timeout)
+        self._buffer.extend(data)
+        if not self._busy:
+            self._process()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.connections.discard(self)
+        self._cancel_timer()
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        if self._chunked is not None:
+            self._chunked.close()
+            self._chunked = None
+        self.transport = None
+        # Anything waiting to write must wake up and find the transport gone.
+        self._writable.set()
+
+    def pause_writing(self) -> None:
+        self._writable.clear()
+
+    def resume_writing(self) -> None:
+        self._writable.set()
+
+    # Framing
+
+    def _process(self) -> None:
+        if self.transport is None:
+            return
+
+        if self._request is None:
+            idx = self._buffer.find(b'\r\n\r\n', max(0, self._scanned - 3))
+            if idx < 0:
+                if len(self._buffer) > self.app.max_header_size:
+                    self._refuse(head_too_large(self._buffer, self.app.max_header_size))
+                    return
+                self._scanned = len(self._buffer)
+                return
+
+            request = self.app.new_request(None)
+            try:
+                request.load_head(self._buffer, idx + 4)
+                chunked = request.chunked
+                if len(self._buffer) == idx + 4 and request.expects_continue:
+                    # The client waits to be told to send its body. If it
+                    # would be refused, the refusal goes out at once, from
+                    # dispatch(), and the body is never read.
+                    if not self.app.expect_continue(request):
+                        del self._buffer[:idx + 4]
+                        self._start(request, b'')
+                        return
+                    self.transport.write(CONTINUE_RESPONSE)
+                if not chunked and request.content_length and request.content_length > self.app.body_limit(request):
+                    raise RequestError(HttpStatus.PAYLOAD_TOO_LARGE, 'Request body too large')
+            except RequestError as e:
+                self._refuse(e)
+                return
+            self._request = request
+            self._head_length = idx + 4
+            if chunked:
+                self._decoder = ChunkedDecoder(self.app.body_limit(request))
+                self._chunked = BodyBuffer(self.app.body_spool_threshold)
+                del self._buffer[:self._head_length]
+                self._head_length = 0
+            elif request.content_length > self.app.body_spool_threshold:
+                self._spool = tempfile.SpooledTemporaryFile(max_size=self.app.body_spool_threshold)
+                self._spooled = 0
+                del self._buffer[:self._head_length]
+                self._head_length = 0
+
+        trailers: Optional[Dict[str, str]] = None
+        content_length = self._request.content_length
+        if self._decoder is not None:
+            try:
+                consumed = self._decoder.feed(self._buffer, self._chunked.write)
+            except ValueError as e:
+                status = HttpStatus.PAYLOAD_TOO_LARGE if self._decoder.over_limit else HttpStatus.BAD_REQUEST
+                self._refuse(RequestError(status, str(e)))
+                return
+            del self._buffer[:consumed]
+            if not self._decoder.done:
+                self._receiving_body(self._decoder.size)
+                return
+            trailers = self._decoder.trailers
+            body, self._chunked, self._decoder = self._chunked.result(), None, None
+        elif self._spool is not None:
+            take = min(len(self._buffer), content_length - self._spooled)
+            with memoryview(self._buffer) as view:
+                self._spool.write(view[:take])
+            del self._buffer[:take]
+            self._spooled += take
+            if self._spooled < content_length:
+                self._receiving_body(self._spooled)
+                return
+            body, self._spool = self._spool, None
+        else:
+            end = self._head_length + content_length
+            if len(self._buffer) < end:
+                self._receiving_body(len(self._buffer) - self._head_length)
+                return
+            with memoryview(self._buffer) as view:
+                body = bytes(view[self._head_length:end])
+            del self._buffer[:end]
+
+        request, self._request = self._request, None
+        self._start(request, body, trailers)
+
+    def _start(self,
+        request: Request,
+        body: bytes | bytearray | IO[bytes],
+        trailers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self._scanned = 0
+        self._busy = True
+        self._cancel_timer()
+        self.transport.pause_reading()
+        self.loop.create_task(self._respond(request, body, trailers))
+
+    async def _respond(self,
+        request: Request,
+        body: bytes | bytearray | IO[bytes],
+        trailers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        app = self.app
+        try:
+            # Body parsing is CPU work on arbitrary input, so it goes to the
+            # pool along with everything else the request costs.
+            response: Response = await self.loop.run_in_executor(
+                self.executor, self._dispatch, request, body, trailers
+            )
+        except RequestError as e:
+            # Found while reading the body: one that would not decompress.
+            request.close()
+            self._refuse(e)
+            return
+        except Exception as e:
+            request.close()
+            tb_list = traceback.extract_tb(e.__traceback__)
+            filename, line, func, text = tb_list[-1]
+            app.logger.error(f'Error handling client {self.peer} in {filename}:{line} \n\t {text} -> {e}')
+            self._close()
+            return
+
+        self._served += 1
+        keep_alive = (
+            request.keep_alive
+            and request.complete
+            and response.has_framed_body
+            and self._served < app.keep_alive_max_requests
+            and not app.stopping
+        )
+        response.declare_connection(
+            keep_alive,
+            timeout=app.keep_alive_timeout,
+            max_requests=app.keep_alive_max_requests - self._served,
+        )
+
+        written = await self._write(response)
+        request.close()
+        if not written:
+            return
+        if not keep_alive:
+            self._close()
+            return
+
+        self._busy = False
+        if self._buffer:
+            self._arm_timer('header', app.header_timeout)
+        else:
+            self._arm_timer('idle', app.keep_alive_timeout)
+        self.transport.resume_reading()
+        if self._buffer:
+            self._process()
+
+    def _dispatch(self,
+        request: Request,
+        body: bytes | bytearray | IO[bytes],
+        trailers: Optional[Dict[str, str]] = None,
+    ) -> Response:
+        request.load_body(body, trailers)
+        return self.app.dispatch(request, self.peer)
+
+    async def _write(self, response: Response) -> bool:
+        """Write a response, waiting whenever the transport's buffer is full.
+
+        Without the wait, a large file would be read into the transport's
+        buffer in full, faster than any client could take it. The last wait,
+        after the last chunk, keeps the write timeout running until the
+        client has taken nearly all of it.
+
+        A body Response holds in memory is written from here. Any other --
+        a file not sent with sendfile(), whatever a subclass yields -- may
+        block to produce, so each chunk of it is pulled on the pool: a disk
+        read on the loop would stall every other connection.
+        """
+        if self.transport is None:
+            return False
+        app = self.app
+        size = 0 if response.suppress_body else int(response.header.get(b'content-length', 0))
+        self._arm_timer('write', app.write_timeout + size / app.min_transfer_rate)
+        # The head goes out with the first chunk, as in Response.__call__.
+        head = response.encode_head()
+        file_range = response.sendfile_range()
+        if file_range is not None:
+            self.transport.write(head)
+            return await self._sendfile(*file_range)
+        chunks = response.iter_body()
+        in_memory = type(response).iter_body is Response.iter_body
+        try:
+            while True:
+                if in_memory:
+                    chunk = next(chunks, None)
+                else:
+                    chunk = await self.loop.run_in_executor(self.executor, next, chunks, None)
+                    if self.transport is None:
+                        return False
+                if chunk is None:
+                    break
+                if head and len(chunk) <= response.COALESCE_LIMIT:
+                    chunk = head + chunk
+                elif head:
+                    self.transport.write(head)
+                head = b''
+                await self._writable.wait()
+                if self.transport is None:
+                    return False
+                self.transport.write(chunk)
+        finally:
+            # A file being read is closed now, not whenever the generator
+            # is collected.
+            chunks.close()
+        if head:
+            self.transport.write(head)
+        await self._writable.wait()
+        return self.transport is not None
+
+    async def _sendfile(self, path: Path, offset: int, count: int) -> bool:
+        """Send part of a file with loop.sendfile(): os.sendfile on a plain
+        socket, once what the transport has buffered is out; reading and
+        writing, with flow control, where that is not available."""
+        try:
+            with path.open('rb') as handle:
+                await asyncio.get_running_loop().sendfile(self.transport, handle, offset, count)
+        except (OSError, RuntimeError):
+            # The client went, or the write timer closed the transport.
+            if self.transport is not None:
+                self.transport.abort()
+            return False
+        return self.transport is not None
+
+    # Lifetime
+
+    def _refuse(self, error: RequestError) -> None:
+        """Answer a RequestError, and linger -- as intake.refuse does --
+        until the client closes, LINGER_SECONDS pass or LINGER_BYTES more
+        arrive."""
+        self.app.count_rejection(error, self.peer)
+        if self.transport is None:
+            return
+        self.transport.write(REJECTION_RESPONSES[error.status])
+        if not self.transport.can_write_eof():
+            self._close()
+            return
+        self.transport.write_eof()
+        self._lingering = 0
+        self._buffer.clear()
+        self.transport.resume_reading()
+        self._arm_timer('linger', LINGER_SECONDS)
+
+    def _close(self) -> None:
+        self._cancel_timer()
+        if self.transport is not None:
+            self.transport.close()
+
+    def _receiving_body(self, received: int) -> None:
+        app = self.app
+        if self._phase != 'body':
+            self._body_started = self.loop.time()
+            self._arm_timer('body', app.body_timeout)
+            return
+        deadline = self._body_started + app.body_timeout + received / app.min_transfer_rate
+        if deadline > self._deadline:
+            self._deadline = deadline
+
+    def _arm_timer(self, phase: str, seconds: float) -> None:
+        self._phase = phase
+        self._deadline = self.loop.time() + seconds
+        if self._timer is not None and self._timer.when() <= self._deadline:
+            # Fires early, finds the deadline moved, and waits out the rest.
+            return
+        self._cancel_timer()
+        self._timer = self.loop.call_at(self._deadline, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        if self.loop.time() < self._deadline:
+            self._timer = self.loop.call_at(self._deadline, self._on_timer)
+            return
+
+        phase = self._phase
+        if phase == 'linger':
+            self._close()
+            return
+        self.app.metrics.incr('timeout')
+        self.app.metrics.incr(f'timeout_{phase}')
+        if phase == 'write':
+            self.abort()
+            return
+        if (self._buffer or self._request is not None) and self.transport is not None:
+            # A request was begun; the client is told why it went unanswered.
+            self.transport.write(REQUEST_TIMEOUT_RESPONSE)
+        self._close()
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -0,0 +1,114 @@
+from .._typing import Socket
+
+import socket
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+
+def _non_negative(value: Any) -> int:
+    if isinstance(value, bool) or int(value) != value or value < 0:
+        raise ValueError(f'expected a whole number >= 0, got {value!r}')
+    return int(value)
+
+
+def _positive(value: Any) -> int:
+    if _non_negative(value) == 0:
+        raise ValueError(f'expected a whole number > 0, got {value!r}')
+    return int(value)
+
+
+#: name -> (level, option constant name, where it applies, value check)
+#:
+#: Options marked for connections are set again on every accepted socket:
+#: whether one is inherited from the listener differs between platforms.
+_OPTIONS: Dict[str, Tuple[int, str, Tuple[str, ...], Callable[[Any], int]]] = {
+    'tcp_nodelay': (socket.IPPROTO_TCP, 'TCP_NODELAY', ('listener', 'connection'), lambda v: int(bool(v))),
+    'tcp_defer_accept': (socket.IPPROTO_TCP, 'TCP_DEFER_ACCEPT', ('listener',), _non_negative),
+    'tcp_fastopen': (socket.IPPROTO_TCP, 'TCP_FASTOPEN', ('listener',), _non_negative),
+    'sndbuf': (socket.SOL_SOCKET, 'SO_SNDBUF', ('listener', 'connection'), _positive),
+    'rcvbuf': (socket.SOL_SOCKET, 'SO_RCVBUF', ('listener', 'connection'), _positive),
+}
+
+
+class SocketOptions:
+    """The `socket_options` section of the config, checked once and applied
+    to every socket the server opens or accepts.
+
+      tcp_nodelay       -- send small writes at once instead of waiting for
+                           the ACK of the previous one (Nagle). On by default:
+                           with delayed ACKs on the client's side, a response
+                           written in two parts otherwise waits ~40ms.
+      tcp_defer_accept  -- seconds the kernel holds a new connection until its
+                           first data arrives, so accept() never wakes the
+                           server for a client that has nothing to say yet.
+      tcp_fastopen      -- length of the queue of TFO connections pending
+                           accept; lets a returning client send its request
+                           in the SYN, saving a round trip.
+      sndbuf, rcvbuf    -- kernel send and receive buffer sizes, in bytes.
+
+    Options the platform does not have are skipped, with a warning through
+    the app's logger; anything else that is wrong -- an unknown name, a value
+    of the wrong kind -- is a ValueError when the app is created.
+    """
+
+    DEFAULTS: Dict[str, Any] = {'tcp_nodelay': True}
+
+    def __init__(self, options: Optional[Mapping[str, Any]] = None) -> None:
+        merged = dict(self.DEFAULTS)
+        merged.update(options or {})
+        self.values: Dict[str, int] = {}
+        self.unsupported: List[str] = []
+        for name, value in merged.items():
+            if name not in _OPTIONS:
+                raise ValueError(f'Unknown socket option `{name}`; expected one of {", ".join(_OPTIONS)}')
+            if value is None:
+                continue
+            level, constant, _, check = _OPTIONS[name]
+            try:
+                self.values[name] = check(value)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f'Invalid value for socket option `{name}`: {e}') from None
+            if not hasattr(socket, constant):
+                self.unsupported.append(name)
+                del self.values[name]
+
+        self._listener: List[Tuple[int, int, int]] = self._resolve('listener')
+        self._connection: List[Tuple[int, int, int]] = self._resolve('connection')
+
+    def _resolve(self, where: str) -> List[Tuple[int, int, int]]:
+        return [
+            (_OPTIONS[name][0], getattr(socket, _OPTIONS[name][1]), value)
+            for name, value in self.values.items()
+            if where in _OPTIONS[name][2]
+        ]
+
+    @staticmethod
+    def _applicable(sock: Socket, options: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+        # A Unix socket has no TCP to tune; only the buffer sizes apply.
+        if sock.family == socket.AF_UNIX:
+            return [option for option in options if option[0] == socket.SOL_SOCKET]
+        return options
+
+    def apply_listener(self, sock: Socket) -> None:
+        """Set every option on a listening socket; before listen(), since the
+        receive buffer size decides the window scale offered in the SYN-ACK."""
+        for level, option, value in self._applicable(sock, self._listener):
+            sock.setsockopt(level, option, value)
+
+    def apply_connection(self, sock: Socket) -> None:
+        for level, option, value in self._applicable(sock, self._connection):
+            sock.setsockopt(level, option, value)
+
+    def effective(self, sock: Socket) -> Dict[str, int]:
+        """What the kernel made of the options on sock -- it rounds some, and
+        doubles the buffer sizes."""
+        result: Dict[str, int] = {}
+        for name, (level, constant, _, _) in _OPTIONS.items():
+            if not hasattr(socket, constant):
+                continue
+            if sock.family == socket.AF_UNIX and level != socket.SOL_SOCKET:
+                continue
+            try:
+                result[name] = sock.getsockopt(level, getattr(socket, constant))
+            except OSError:
+                pass
+        return result
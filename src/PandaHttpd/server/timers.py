@@ -0,0 +1,93 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+
+class Timer:
+    """One deadline in a TimerHeap, and what to do when it passes.
+
+    `when` may be moved: later through postpone(), which costs no more than an
+    assignment, or earlier through TimerHeap.move(). A connection that makes
+    progress pushes its deadline back on every read without touching the heap.
+    """
+
+    __slots__ = ('when', 'callback', 'cancelled', 'fired')
+
+    def __init__(self, when: float, callback: Callable[[], None]) -> None:
+        self.when: float = when
+        self.callback: Callable[[], None] = callback
+        self.cancelled: bool = False
+        self.fired: bool = False
+
+    def postpone(self, when: float) -> None:
+        if when > self.when:
+            self.when = when
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class TimerHeap:
+    """Every deadline of a server, kept in one place and expired in one pass.
+
+    Setting a timeout on each socket costs a system call per change, and a
+    sweep over all connections costs time proportional to how many there are,
+    expired or not. Here a deadline is an entry in a binary heap: arming or
+    moving one is O(log n), and expiry only ever looks at the deadlines that
+    have actually passed. The thread that owns the heap calls run_expired()
+    between polls, and sleeps no longer than next_deadline().
+
+    Cancelled and postponed timers are not searched for: they stay where they
+    are, and are dropped or put back when their old deadline comes up.
+
+    Safe to arm from any thread; callbacks run on the thread calling
+    run_expired().
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, Timer]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, when: float, callback: Callable[[], None]) -> Timer:
+        timer = Timer(when, callback)
+        with self._lock:
+            heapq.heappush(self._heap, (when, next(self._sequence), timer))
+        return timer
+
+    def move(self, timer: Timer, when: float) -> None:
+        """Change a timer's deadline, earlier or later."""
+        if when >= timer.when:
+            timer.when = when
+            return
+        timer.when = when
+        with self._lock:
+            heapq.heappush(self._heap, (when, next(self._sequence), timer))
+
+    def next_deadline(self) -> Optional[float]:
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def run_expired(self, now: Optional[float] = None) -> int:
+        """Fire every timer whose deadline has passed; return how many fired."""
+        now = time.monotonic() if now is None else now
+        due: List[Timer] = []
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                _, _, timer = heapq.heappop(heap)
+                if timer.cancelled or timer.fired:
+                    continue
+                if timer.when > now:
+                    heapq.heappush(heap, (timer.when, next(self._sequence), timer))
+                    continue
+                timer.fired = True
+                due.append(timer)
+        for timer in due:
+            timer.callback()
+        return len(due)
@@ -1,7 +1,10 @@
 from .datastructures import (
     MappingStr,
     CaseInsensitiveDict, 
+    HeaderMap,
     CookieDict,
+    MultiDict,
+    BufferPool,
 )
 from .logger import (
     PandaLogger, 
@@ -16,13 +19,24 @@ from .parser import (
     UrlParser,
     RequestBodyParser,
 )
+from .chunked import ChunkedDecoder
+from .decompress import BodyDecoder
+from .multipart import (
+    MultipartParser,
+    MultipartForm,
+    FormField,
+    UploadFile,
+)
 
 
 __all__ = [
     # Data Structures
     'MappingStr',
     'CaseInsensitiveDict',
+    'HeaderMap',
     'CookieDict',
+    'MultiDict',
+    'BufferPool',
     
     # Logger
     'PandaLogger',
@@ -36,4 +50,16 @@ __all__ = [
     # Parser
     'UrlParser',
     'RequestBodyParser',
+
+    # Chunked
+    'ChunkedDecoder',
+
+    # Decompression
+    'BodyDecoder',
+
+    # Multipart
+    'MultipartParser',
+    'MultipartForm',
+    'FormField',
+    'UploadFile',
 ]
@@ -0,0 +1,134 @@
+import string
+
+from typing import Callable, Dict
+
+
+_HEX_DIGITS = frozenset(string.hexdigits.encode())
+
+
+class ChunkedDecoder:
+    """
+    An incremental decoder for `Transfer-Encoding: chunked` bodies.
+
+    feed() it whatever has arrived; it hands the payload of every chunk to a
+    callback as it goes and says how many bytes it consumed. What it leaves
+    is the start of a line it cannot parse yet -- a chunk size or a trailer
+    -- to be fed again once more has arrived, or, when done, whatever
+    follows the body on the connection.
+
+    Limits are checked as soon as they can be: a chunk that would take the
+    body past `limit` is refused on its size line, before any of it is read.
+    Trailer fields are collected into `trailers`, with lower-cased names.
+
+    Malformed input raises ValueError; a body too large says so, as the
+    other body limits do, and sets over_limit to tell the two apart.
+
+    Example:
+        decoder = ChunkedDecoder(limit=1 << 20)
+        consumed = decoder.feed(buffer, body.extend)
+        del buffer[:consumed]
+        if decoder.done:
+            ...
+    """
+
+    #: A chunk-size line, extensions included.
+    MAX_LINE_SIZE: int = 4096
+    #: All trailer lines together.
+    MAX_TRAILER_SIZE: int = 16 * 1024
+
+    _SIZE, _DATA, _DATA_END, _TRAILER, _DONE = range(5)
+
+    def __init__(self, limit: int) -> None:
+        self.limit: int = limit
+        #: Payload bytes decoded so far.
+        self.size: int = 0
+        self.trailers: Dict[str, str] = {}
+        self.over_limit: bool = False
+        self._state: int = self._SIZE
+        self._remaining: int = 0
+        self._trailer_size: int = 0
+
+    @property
+    def done(self) -> bool:
+        return self._state == self._DONE
+
+    def feed(self, data: bytes | bytearray, write: Callable[[memoryview], object]) -> int:
+        """Decode as much of data as is complete; return how much that was.
+
+        write is given views into data, valid only until it returns.
+        """
+        pos, end = 0, len(data)
+        with memoryview(data) as view:
+            while pos < end:
+                state = self._state
+                if state == self._DATA:
+                    take = min(self._remaining, end - pos)
+                    write(view[pos:pos + take])
+                    pos += take
+                    self._remaining -= take
+                    if not self._remaining:
+                        self._state = self._DATA_END
+
+                elif state == self._DATA_END:
+                    if end - pos < 2:
+                        break
+                    if data[pos:pos + 2] != b'\r\n':
+                        raise ValueError('Malformed chunked body: chunk not followed by CRLF')
+                    pos += 2
+                    self._state = self._SIZE
+
+                elif state == self._SIZE:
+                    line_end = data.find(b'\r\n', pos, pos + self.MAX_LINE_SIZE + 2)
+                    if line_end < 0:
+                        if end - pos > self.MAX_LINE_SIZE:
+                            raise ValueError('Malformed chunked body: chunk size line too long')
+                        break
+                    size = self._chunk_size(data[pos:line_end])
+                    pos = line_end + 2
+                    if size == 0:
+                        self._state = self._TRAILER
+                        continue
+                    if self.size + size > self.limit:
+                        self.over_limit = True
+                        raise ValueError('Request body too large')
+                    self.size += size
+                    self._remaining = size
+                    self._state = self._DATA
+
+                elif state == self._TRAILER:
+                    line_end = data.find(b'\r\n', pos)
+                    if line_end < 0:
+                        if self._trailer_size + end - pos > self.MAX_TRAILER_SIZE:
+                            raise ValueError('Malformed chunked body: trailer too large')
+                        break
+                    self._trailer_size += line_end + 2 - pos
+                    if self._trailer_size > self.MAX_TRAILER_SIZE:
+                        raise ValueError('Malformed chunked body: trailer too large')
+                    line = bytes(data[pos:line_end])
+                    pos = line_end + 2
+                    if not line:
+                        self._state = self._DONE
+                        break
+                    self._add_trailer(line)
+
+                else:
+                    break
+        return pos
+
+    @staticmethod
+    def _chunk_size(line: bytes | bytearray) -> int:
+        # Extensions, after a `;`, carry nothing this server uses.
+        digits = bytes(line).split(b';', 1)[0].strip(b' \t')
+        if not digits or len(digits) > 16 or not _HEX_DIGITS.issuperset(digits):
+            raise ValueError('Malformed chunked body: invalid chunk size')
+        return int(digits, 16)
+
+    def _add_trailer(self, line: bytes) -> None:
+        try:
+            text = line.decode('utf-8')
+        except UnicodeDecodeError:
+            text = line.decode('iso-8859-1')
+        key, colon, value = text.partition(':')
+        if not colon or not key.strip():
+            raise ValueError('Malformed chunked body: invalid trailer field')
+        self.trailers[key.strip().lower()] = value.strip()
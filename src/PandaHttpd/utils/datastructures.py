@@ -1,39 +1,88 @@
+import sys
 from typing import (
     Any, 
+    Iterable,
+    ItemsView,
+    KeysView,
     Mapping, 
     MutableMapping, 
     Iterator, 
-    Optional
+    Optional,
+    Tuple,
+    ValuesView,
 )
 
 
 MappingStr = MutableMapping[str, str]
 
 
+#: Header names nearly every request or response carries, interned and
+#: keyed by the spellings they usually arrive in -- as sent by browsers and
+#: as written in code -- so that the name a lookup finds is already lower
+#: case and the very object the store holds: no lower() call, and the dict
+#: compares the key by identity.
+_LOWER_NAMES: dict[str, str] = {}
+for _name in (
+    'host', 'user-agent', 'accept', 'accept-encoding', 'accept-language',
+    'accept-ranges', 'authorization', 'cache-control', 'connection',
+    'content-encoding', 'content-length', 'content-type', 'cookie', 'date',
+    'etag', 'expect', 'if-modified-since', 'if-none-match', 'if-range',
+    'keep-alive', 'last-modified', 'location', 'origin', 'range', 'referer',
+    'set-cookie', 'transfer-encoding', 'upgrade', 'vary', 'x-forwarded-for',
+    'x-forwarded-proto', 'x-real-ip', 'x-requested-with', 'cf-connecting-ip',
+    # What DefaultMiddleware puts in dict_headers.
+    'method', 'path', 'protocol',
+):
+    _name = sys.intern(_name)
+    _LOWER_NAMES[_name] = _name
+    _LOWER_NAMES[_name.title()] = _name
+    _LOWER_NAMES[_name.upper()] = _name
+_LOWER_NAMES['ETag'] = _LOWER_NAMES['etag']
+del _name
+
+
 class CaseInsensitiveDict(MappingStr):
     """
     A case-insensitive dictionary optimized for HTTP headers.
     
     Stores all keys in lowercase but preserves original casing if needed 
     (though this specific implementation normalizes to lowercase for storage).
+
+    Slotted, and every method a lookup goes through is its own rather than
+    one of MutableMapping's, which would reach __getitem__ -- and lower() --
+    once per key. The common header names are not lower-cased at all: see
+    _LOWER_NAMES.
     
     Example:
         headers = CaseInsensitiveDict({"Content-Type": "application/json"})
         headers["content-type"]  # Returns "application/json"
     """
 
+    __slots__ = ('_store',)
+
     def __init__(self, data: Optional[MappingStr] = None, **kwargs: str) -> None:
         self._store: dict[str, str] = {}
-        self.update(data or {}, **kwargs)
+        if data:
+            self.update(data)
+        if kwargs:
+            self.update(kwargs)
+
+    def update(self, data: Mapping[str, str] | Iterable[Tuple[str, str]] = (), **kwargs: str) -> None:
+        store = self._store
+        lower = _LOWER_NAMES.get
+        for key, value in (data.items() if isinstance(data, Mapping) else data):
+            store[lower(key) or key.lower()] = value
+        for key, value in kwargs.items():
+            store[lower(key) or key.lower()] = value
 
     def __setitem__(self, key: str, value: str) -> None:
-        self._store[key.lower()] = value
+        self._store[_LOWER_NAMES.get(key) or key.lower()] = value
 
     def __getitem__(self, key: str) -> str:
-        return self._store[key.lower()]
+        return self._store[_LOWER_NAMES.get(key) or key.lower()]
 
     def __delitem__(self, key: str) -> None:
-        del self._store[key.lower()]
+        del self._store[_LOWER_NAMES.get(key) or key.lower()]
 
     def __iter__(self) -> Iterator[str]:
         return iter(self._store)
@@ -43,17 +92,26 @@ class CaseInsensitiveDict(MappingStr):
 
     def __contains__(self, key: object) -> bool:
         if isinstance(key, str):
-            return key.lower() in self._store
+            return (_LOWER_NAMES.get(key) or key.lower()) in self._store
         return False
 
     def get(self, key: str, default: Any = None) -> Any:
-        return self._store.get(key.lower(), default)
+        return self._store.get(_LOWER_NAMES.get(key) or key.lower(), default)
 
     def pop(self, key: str, default: Any = None) -> Any:
-        return self._store.pop(key.lower(), default)
+        return self._store.pop(_LOWER_NAMES.get(key) or key.lower(), default)
+
+    def keys(self) -> KeysView[str]:
+        return self._store.keys()
+
+    def values(self) -> ValuesView[str]:
+        return self._store.values()
+
+    def items(self) -> ItemsView[str, str]:
+        return self._store.items()
 
     def __repr__(self) -> str:
-        return f"CaseInsensitiveDict({self._store!r})"
+        return f"{self.__class__.__name__}({self._store!r})"
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, Mapping):
@@ -66,6 +124,121 @@ class CaseInsensitiveDict(MappingStr):
         return dict(self._store)
 
 
+class HeaderMap(CaseInsensitiveDict):
+    """
+    The headers of a request: to look up, a CaseInsensitiveDict -- one value
+    per name, the last one sent -- and besides, every field as it came, in
+    order, duplicates and the sender's spelling of each name included, for
+    whatever has to pass them on unchanged or needs all of a repeated one.
+
+    Built from a request head with parse(), only the lookup side is made up
+    front; the fields are split out of the head, which the request holds
+    anyway, the first time they are asked for. Until then a map costs what a
+    CaseInsensitiveDict does, and less than one filled by __setitem__ did:
+    the common names are stored as the interned strings of _LOWER_NAMES, not
+    as a lower-cased copy per request.
+
+    Example:
+        headers = HeaderMap.parse(b'Accept: text/html\\r\\naccept: application/json\\r\\n')
+        headers["Accept"]           # "application/json"
+        headers.getlist("accept")   # ["text/html", "application/json"]
+        headers.fields              # [("Accept", "text/html"), ("accept", "application/json")]
+    """
+
+    __slots__ = ('_fields', '_head')
+
+    def __init__(self, data: Optional[MappingStr] = None, **kwargs: str) -> None:
+        self._fields: Optional[list[tuple[str, str]]] = []
+        self._head: bytes = b''
+        super().__init__(data, **kwargs)
+
+    @classmethod
+    def parse(cls, head: bytes) -> 'HeaderMap':
+        """The header lines of a head, CRLF-separated, the request line not
+        included. Lines without a colon are skipped."""
+        headers = cls.__new__(cls)
+        headers._fields = None
+        headers._head = head
+        headers._store = store = {}
+        lower = _LOWER_NAMES.get
+        for line in _decode(head).split('\r\n'):
+            key, colon, value = line.partition(':')
+            if colon:
+                key = key.strip()
+                store[lower(key) or key.lower()] = value.strip()
+        return headers
+
+    def add(self, name: str, value: str) -> None:
+        """Add a field, keeping those of the same name already there."""
+        self._load_fields().append((name, value))
+        self._store[_LOWER_NAMES.get(name) or name.lower()] = value
+
+    def getlist(self, name: str) -> list[str]:
+        lowered = _LOWER_NAMES.get(name) or name.lower()
+        if lowered not in self._store:
+            return []
+        return [value for key, value in self._load_fields() if (_LOWER_NAMES.get(key) or key.lower()) == lowered]
+
+    @property
+    def fields(self) -> list[tuple[str, str]]:
+        """Every field, in the order and spelling it came in."""
+        return list(self._load_fields())
+
+    def update(self, data: Mapping[str, str] | Iterable[Tuple[str, str]] = (), **kwargs: str) -> None:
+        for key, value in (data.items() if isinstance(data, Mapping) else data):
+            self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def __setitem__(self, key: str, value: str) -> None:
+        # Replaces every field of the name, as a dict would.
+        self._load_fields()
+        self._discard(key)
+        self.add(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        super().__delitem__(key)
+        self._discard(key)
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        value = super().pop(key, default)
+        self._discard(key)
+        return value
+
+    def _load_fields(self) -> list[tuple[str, str]]:
+        fields = self._fields
+        if fields is None:
+            # Fields whose name has since been removed are left out.
+            store, lower = self._store, _LOWER_NAMES.get
+            fields = self._fields = [
+                (key, value) for key, value in _split_fields(self._head)
+                if (lower(key) or key.lower()) in store
+            ]
+            self._head = b''
+        return fields
+
+    def _discard(self, name: str) -> None:
+        # Not yet split out of the head, the fields need no change: what
+        # is no longer in the store will be left out of them.
+        if self._fields is not None:
+            lowered = _LOWER_NAMES.get(name) or name.lower()
+            self._fields = [field for field in self._fields if (_LOWER_NAMES.get(field[0]) or field[0].lower()) != lowered]
+
+
+def _decode(head: bytes) -> str:
+    try:
+        return str(head, 'utf-8')
+    except UnicodeDecodeError:
+        return str(head, 'iso-8859-1')
+
+
+def _split_fields(head: bytes) -> Iterator[Tuple[str, str]]:
+    for line in _decode(head).split('\r\n'):
+        key, colon, value = line.partition(':')
+        if colon:
+            yield key.strip(), value.strip()
+
+
 class CookieDict(MappingStr):
     """
     A strictly typed dictionary for HTTP Cookies.
@@ -108,4 +281,116 @@ class CookieDict(MappingStr):
     def to_dict(self) -> dict[str, str]:
         """Returns a standard dictionary representation of the cookies."""
         return dict(self._store)
-    
\ No newline at end of file
+
+
+class MultiDict(MappingStr):
+    """
+    A dictionary for query strings and forms, where a key may come more than
+    once: `?tag=a&tag=b`.
+
+    Looking a key up gives its last value, as a plain dict built from the
+    same pairs would; getlist() gives all of them, in order. Only keys that
+    do repeat keep a list, so the usual query string costs a dict.
+
+    Example:
+        params = MultiDict([('tag', 'a'), ('tag', 'b'), ('page', '2')])
+        params['tag']           # 'b'
+        params.getlist('tag')   # ['a', 'b']
+    """
+
+    def __init__(self, pairs: Iterable[Tuple[str, str]] = ()) -> None:
+        pairs = pairs if isinstance(pairs, (list, tuple)) else list(pairs)
+        # Built by dict() in one go, last value winning; only if that lost
+        # some pairs are the values of the repeated keys collected.
+        self._store: dict[str, str] = dict(pairs)
+        self._lists: dict[str, list[str]] = {}
+        if len(self._store) != len(pairs):
+            values: dict[str, list[str]] = {}
+            for key, value in pairs:
+                values.setdefault(key, []).append(value)
+            self._lists = {key: found for key, found in values.items() if len(found) > 1}
+
+    def add(self, key: str, value: str) -> None:
+        """Add a value for key, keeping those it already has."""
+        store = self._store
+        if key in store:
+            values = self._lists.get(key)
+            if values is None:
+                self._lists[key] = [store[key], value]
+            else:
+                values.append(value)
+        store[key] = value
+
+    def getlist(self, key: str) -> list[str]:
+        values = self._lists.get(key)
+        if values is not None:
+            return list(values)
+        return [self._store[key]] if key in self._store else []
+
+    def __setitem__(self, key: str, value: str) -> None:
+        self._lists.pop(key, None)
+        self._store[key] = value
+
+    def __getitem__(self, key: str) -> str:
+        return self._store[key]
+
+    def __delitem__(self, key: str) -> None:
+        del self._store[key]
+        self._lists.pop(key, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store)
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._store
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._store.get(key, default)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, MultiDict):
+            return self._store == other._store and self._lists == other._lists
+        if isinstance(other, Mapping):
+            return self._store == dict(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"MultiDict({[(k, v) for k in self._store for v in self.getlist(k)]!r})"
+
+    def to_dict(self) -> dict[str, str]:
+        """Returns a standard dictionary of the last value of every key."""
+        return dict(self._store)
+    
+
+class BufferPool:
+    """
+    Fixed-size bytearrays, lent out and taken back for reuse.
+
+    A socket read into a buffer from the pool with recv_into() allocates
+    nothing: recv() would create a new bytes object per call, sized for the
+    largest read and then shrunk, only for it to be copied again into
+    whatever accumulates the request.
+
+    Safe to share between threads: taking and returning a buffer are single
+    list operations. At most `keep` buffers are held on to; beyond that, a
+    returned buffer is left to the garbage collector.
+    """
+
+    def __init__(self, size: int, keep: int = 16) -> None:
+        self.size: int = size
+        self.keep: int = keep
+        self._free: list[bytearray] = []
+
+    def acquire(self) -> bytearray:
+        try:
+            return self._free.pop()
+        except IndexError:
+            return bytearray(self.size)
+
+    def release(self, buffer: bytearray) -> None:
+        # One that was resized meanwhile is not the size asked for any more.
+        if len(buffer) == self.size and len(self._free) < self.keep:
+            self._free.append(buffer)
@@ -0,0 +1,102 @@
+import zlib
+
+from typing import Iterator
+
+
+class BodyDecoder:
+    """
+    Undoes a request body's Content-Encoding -- gzip or deflate -- a chunk at
+    a time, within limits on what it may grow to.
+
+    Nothing is ever decompressed in one go. Every call to zlib is bounded by
+    `max_length`, and what a chunk would not yield within it is kept as the
+    decompressor's unconsumed tail for the next round, so a small chunk that
+    inflates to gigabytes is found out after OUTPUT_CHUNK_SIZE bytes of it,
+    not after they have all been allocated.
+
+    Two limits, both checked as output is produced:
+
+      max_size   -- the most the body may decompress to.
+      max_ratio  -- the most it may decompress to per byte received, once
+                    past RATIO_FLOOR: a bomb compresses a thousandfold, and
+                    ordinary JSON rarely better than twentyfold.
+
+    Going over either raises ValueError and sets over_limit; a body that is
+    not validly compressed, or ends before its compressed stream does,
+    raises ValueError without it.
+
+    Example:
+        decoder = BodyDecoder('gzip', max_size=16 << 20, max_ratio=100)
+        for chunk in request_chunks:
+            for piece in decoder.decompress(chunk):
+                ...
+        decoder.finish()
+    """
+
+    ENCODINGS = ('gzip', 'x-gzip', 'deflate')
+    #: The most a single step of decompression produces.
+    OUTPUT_CHUNK_SIZE: int = 64 * 1024
+    #: Output below this is never held against the ratio: a tiny body of
+    #: repeated bytes compresses extremely well and is no threat.
+    RATIO_FLOOR: int = 1024 * 1024
+
+    def __init__(self, encoding: str, max_size: int, max_ratio: float) -> None:
+        if encoding not in self.ENCODINGS:
+            raise ValueError(f'Unsupported Content-Encoding: {encoding}')
+        self.encoding: str = encoding
+        self.max_size: int = max_size
+        self.max_ratio: float = max_ratio
+        self.size_in: int = 0
+        self.size_out: int = 0
+        self.over_limit: bool = False
+        self._decompressor = None
+        self._head: bytes = b''
+
+    def decompress(self, data: bytes | bytearray) -> Iterator[bytes]:
+        self.size_in += len(data)
+        if self._decompressor is None:
+            # Which decompressor depends on the first two bytes.
+            self._head += data
+            if len(self._head) < 2:
+                return
+            data, self._head = bytes(self._head), b''
+            self._decompressor = self._start(data)
+        decompressor = self._decompressor
+        while True:
+            try:
+                out = decompressor.decompress(data, self.OUTPUT_CHUNK_SIZE)
+            except zlib.error as e:
+                raise ValueError(f'Malformed compressed body: {e}') from None
+            if decompressor.unused_data:
+                raise ValueError('Malformed compressed body: data after the end of the stream')
+            data = decompressor.unconsumed_tail
+            if out:
+                self._count(len(out))
+                yield out
+            # A full step may have left output inside zlib even with all of
+            # the input taken; only a short one says there is none.
+            if not data and len(out) < self.OUTPUT_CHUNK_SIZE:
+                return
+
+    def finish(self) -> None:
+        """Check that the compressed stream has ended, as the body has."""
+        if self._head or (self._decompressor is not None and not self._decompressor.eof):
+            raise ValueError('Malformed compressed body: ended before the compressed stream did')
+
+    def _start(self, data: bytes | bytearray):
+        if self.encoding != 'deflate':
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        # `deflate` is meant to be the zlib format, and some clients send raw
+        # deflate instead; the zlib header tells the two apart.
+        if data[0] & 0x0F == 8 and (data[0] << 8 | data[1]) % 31 == 0:
+            return zlib.decompressobj(zlib.MAX_WBITS)
+        return zlib.decompressobj(-zlib.MAX_WBITS)
+
+    def _count(self, n: int) -> None:
+        self.size_out += n
+        if self.size_out > self.max_size:
+            self.over_limit = True
+            raise ValueError('Decompressed body too large')
+        if self.size_out > self.RATIO_FLOOR and self.size_out > self.size_in * self.max_ratio:
+            self.over_limit = True
+            raise ValueError('Compression ratio too high')
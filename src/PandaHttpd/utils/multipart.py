@@ -0,0 +1,350 @@
+import re
+import shutil
+import tempfile
+import urllib.parse
+
+from typing import IO, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+
+# `; name=value` or `; name="quoted \"value\""`, as in Content-Type and
+# Content-Disposition.
+_PARAM = re.compile(r';\s*([^=;\s]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;]*)')
+
+
+def parse_header_params(value: str) -> Tuple[str, Dict[str, str]]:
+    """
+    'form-data; name="a"; filename="b.txt"' -> ('form-data', {'name': 'a', 'filename': 'b.txt'})
+    """
+    main, _, rest = value.partition(';')
+    params: Dict[str, str] = {}
+    for match in _PARAM.finditer(';' + rest):
+        key, raw = match.group(1).lower(), match.group(2).strip()
+        if len(raw) >= 2 and raw[0] == raw[-1] == '"':
+            raw = raw[1:-1]
+            if '\\' in raw:
+                raw = re.sub(r'\\(.)', r'\1', raw)
+        params[key] = raw
+    return main.strip().lower(), params
+
+
+class FormField:
+    """A part of a multipart body that is not a file: a form field, whose
+    value is held in memory and decoded the first time it is asked for."""
+
+    __slots__ = ('name', 'headers', 'raw', '_value')
+
+    def __init__(self, name: str, headers: Dict[str, str], raw: bytes) -> None:
+        self.name: str = name
+        self.headers: Dict[str, str] = headers
+        self.raw: bytes = raw
+        self._value: Optional[str] = None
+
+    @property
+    def value(self) -> str:
+        if self._value is None:
+            self._value = self.raw.decode('utf-8', 'replace')
+        return self._value
+
+    def close(self) -> None:
+        pass
+
+    def __repr__(self) -> str:
+        return f'<FormField {self.name}={self.raw[:32]!r}>'
+
+
+class UploadFile:
+    """A file part of a multipart body, in the temporary file it was written
+    to as it arrived -- in memory while small, on disk past the threshold
+    given to MultipartParser. Positioned at its start, ready for read()."""
+
+    __slots__ = ('name', 'filename', 'content_type', 'headers', 'size', 'file')
+
+    def __init__(self,
+        name: str,
+        filename: str,
+        content_type: str,
+        headers: Dict[str, str],
+        file: IO[bytes],
+    ) -> None:
+        self.name: str = name
+        self.filename: str = filename
+        self.content_type: str = content_type
+        self.headers: Dict[str, str] = headers
+        self.size: int = 0
+        self.file: IO[bytes] = file
+
+    def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self.file.seek(offset, whence)
+
+    def save(self, path: str) -> None:
+        """Copy the file to path, a chunk at a time."""
+        self.file.seek(0)
+        with open(path, 'wb') as target:
+            shutil.copyfileobj(self.file, target, 64 * 1024)
+        self.file.seek(0)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __repr__(self) -> str:
+        return f'<UploadFile {self.name}={self.filename!r} ({self.size} bytes)>'
+
+
+Part = Union[FormField, UploadFile]
+
+
+class MultipartForm(Mapping[str, Part]):
+    """The parts of a multipart/form-data body, by name.
+
+    Looking a name up gives its first part; getlist() gives all of them, for
+    fields sent more than once -- `<input type="file" multiple>`.
+    """
+
+    def __init__(self, parts: List[Part]) -> None:
+        self.parts: List[Part] = parts
+        self._by_name: Dict[str, Part] = {}
+        for part in parts:
+            self._by_name.setdefault(part.name, part)
+
+    def __getitem__(self, name: str) -> Part:
+        return self._by_name[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._by_name)
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def getlist(self, name: str) -> List[Part]:
+        return [part for part in self.parts if part.name == name]
+
+    @property
+    def fields(self) -> Dict[str, str]:
+        return {name: part.value for name, part in self._by_name.items() if isinstance(part, FormField)}
+
+    @property
+    def files(self) -> Dict[str, UploadFile]:
+        return {name: part for name, part in self._by_name.items() if isinstance(part, UploadFile)}
+
+    def close(self) -> None:
+        for part in self.parts:
+            part.close()
+
+    def __repr__(self) -> str:
+        return f'MultipartForm({self.parts!r})'
+
+
+class MultipartParser:
+    """
+    An incremental multipart/form-data parser: feed() it the body in chunks
+    of any size, as they arrive, then finish().
+
+    The body is read once. Each chunk is searched for the next boundary with
+    bytearray.find -- a two-way/Horspool search in C -- and whatever comes
+    before it goes straight to the current part: a file part into its own
+    SpooledTemporaryFile, a field into memory, up to MAX_FIELD_SIZE. Only
+    the bytes that may be the start of a boundary split across two chunks
+    are held back, so what parsing costs in memory does not depend on the
+    size of the body.
+
+    Malformed input -- no boundary, a part without a name, a part head or
+    field that is too large, too many parts, a body that ends before its
+    closing boundary -- raises ValueError, and the files of the parts read
+    so far are closed on the way out.
+
+    Example:
+        parser = MultipartParser(MultipartParser.boundary(content_type))
+        for chunk in request.stream():
+            parser.feed(chunk)
+        form = parser.finish()
+        form['avatar'].save('/srv/uploads/avatar.png')
+    """
+
+    #: The head of a single part: Content-Disposition, Content-Type.
+    MAX_PART_HEADER_SIZE: int = 16 * 1024
+    #: A field, unlike a file, is held in memory.
+    MAX_FIELD_SIZE: int = 1024 * 1024
+    MAX_PARTS: int = 1000
+    #: File parts larger than this are moved from memory to disk.
+    SPOOL_THRESHOLD: int = 1024 * 1024
+
+    _PREAMBLE, _DELIMITER, _HEADERS, _BODY, _DONE = range(5)
+
+    def __init__(self, boundary: bytes, spool_threshold: Optional[int] = None) -> None:
+        if not boundary or len(boundary) > 70:
+            raise ValueError('Malformed multipart body: invalid boundary')
+        self._dash_boundary: bytes = b'--' + boundary
+        # Every boundary but the first is preceded by the CRLF that ends the
+        # part before it; that CRLF belongs to the boundary, not the part.
+        self._delimiter: bytes = b'\r\n--' + boundary
+        self._spool_threshold: int = self.SPOOL_THRESHOLD if spool_threshold is None else spool_threshold
+        self._buffer = bytearray()
+        self._state: int = self._PREAMBLE
+        self._parts: List[Part] = []
+        self._current: Optional[Part] = None
+        self._field: Optional[bytearray] = None
+
+    @staticmethod
+    def boundary(content_type: str) -> bytes:
+        """The boundary of a multipart/form-data Content-Type."""
+        kind, params = parse_header_params(content_type)
+        if kind != 'multipart/form-data' or not params.get('boundary'):
+            raise ValueError(f'Not a multipart/form-data body: {content_type!r}')
+        return params['boundary'].encode('latin-1')
+
+    def feed(self, data: bytes | bytearray | memoryview) -> None:
+        try:
+            self._feed(data)
+        except BaseException:
+            # Nothing will call finish(): the parts spooled so far would be
+            # left for the garbage collector, files on disk and all.
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Close every part read so far, for a body that is not to be
+        finished."""
+        for part in self._parts:
+            part.close()
+
+    def _feed(self, data: bytes | bytearray | memoryview) -> None:
+        buffer = self._buffer
+        buffer += data
+        while True:
+            state = self._state
+            if state == self._BODY:
+                idx = buffer.find(self._delimiter)
+                if idx < 0:
+                    # All but what could be the start of a delimiter split
+                    # across this chunk and the next.
+                    safe = len(buffer) - len(self._delimiter) + 1
+                    if safe > 0:
+                        self._write(buffer, safe)
+                        del buffer[:safe]
+                    return
+                self._write(buffer, idx)
+                self._end_part()
+                del buffer[:idx + len(self._delimiter)]
+                self._state = self._DELIMITER
+
+            elif state == self._DELIMITER:
+                # After a boundary: `--` closes the body, and otherwise the
+                # line ends -- after optional whitespace -- and a part begins.
+                if len(buffer) < 2:
+                    return
+                if buffer.startswith(b'--'):
+                    self._state = self._DONE
+                    continue
+                idx = buffer.find(b'\r\n')
+                if idx < 0:
+                    if len(buffer) > self.MAX_PART_HEADER_SIZE:
+                        raise ValueError('Malformed multipart body: boundary line too long')
+                    return
+                if buffer[:idx].strip(b' \t'):
+                    raise ValueError('Malformed multipart body: junk after boundary')
+                del buffer[:idx + 2]
+                self._state = self._HEADERS
+
+            elif state == self._HEADERS:
+                if buffer.startswith(b'\r\n'):
+                    idx = 0
+                else:
+                    idx = buffer.find(b'\r\n\r\n')
+                    if idx < 0:
+                        if len(buffer) > self.MAX_PART_HEADER_SIZE:
+                            raise ValueError('Malformed multipart body: part head too large')
+                        return
+                    idx += 2
+                self._begin_part(bytes(buffer[:idx]))
+                del buffer[:idx + 2]
+                self._state = self._BODY
+
+            elif state == self._PREAMBLE:
+                idx = buffer.find(self._dash_boundary)
+                if idx < 0:
+                    keep = len(self._dash_boundary) - 1
+                    if len(buffer) > keep:
+                        del buffer[:len(buffer) - keep]
+                    return
+                del buffer[:idx + len(self._dash_boundary)]
+                self._state = self._DELIMITER
+
+            else:
+                # The epilogue, after the closing boundary, is ignored.
+                buffer.clear()
+                return
+
+    def finish(self) -> MultipartForm:
+        """The parts, once the whole body has been fed."""
+        if self._state != self._DONE:
+            self.close()
+            raise ValueError('Malformed multipart body: ended before the closing boundary')
+        for part in self._parts:
+            if isinstance(part, UploadFile):
+                part.file.seek(0)
+        return MultipartForm(self._parts)
+
+    def _begin_part(self, head: bytes) -> None:
+        if len(self._parts) >= self.MAX_PARTS:
+            raise ValueError('Malformed multipart body: too many parts')
+        try:
+            text = head.decode('utf-8')
+        except UnicodeDecodeError:
+            text = head.decode('iso-8859-1')
+        # Names lower-cased: a part has two or three headers, and a plain
+        # dict is all they need.
+        headers: Dict[str, str] = {}
+        for line in text.split('\r\n'):
+            key, colon, value = line.partition(':')
+            if colon:
+                headers[key.strip().lower()] = value.strip()
+
+        disposition, params = parse_header_params(headers.get('content-disposition', ''))
+        if disposition != 'form-data' or 'name' not in params:
+            raise ValueError('Malformed multipart body: part without a form-data name')
+
+        filename = params.get('filename')
+        if 'filename*' in params:
+            # RFC 5987: charset'language'percent-encoded
+            charset, _, encoded = params['filename*'].partition("'")
+            _, _, encoded = encoded.partition("'")
+            try:
+                filename = urllib.parse.unquote(encoded, encoding=charset or 'utf-8', errors='strict')
+            except (LookupError, UnicodeDecodeError):
+                pass
+
+        if filename is None:
+            self._field = bytearray()
+            self._current = FormField(params['name'], headers, b'')
+        else:
+            spool = tempfile.SpooledTemporaryFile(max_size=self._spool_threshold)
+            self._current = UploadFile(
+                params['name'], filename,
+                headers.get('content-type', 'application/octet-stream'),
+                headers, spool,
+            )
+        self._parts.append(self._current)
+
+    def _write(self, buffer: bytearray, end: int) -> None:
+        if not end:
+            return
+        part = self._current
+        if isinstance(part, UploadFile):
+            with memoryview(buffer) as view:
+                part.file.write(view[:end])
+            part.size += end
+        else:
+            if len(self._field) + end > self.MAX_FIELD_SIZE:
+                raise ValueError('Malformed multipart body: field too large')
+            with memoryview(buffer) as view:
+                self._field += view[:end]
+
+    def _end_part(self) -> None:
+        part = self._current
+        if isinstance(part, FormField):
+            part.raw = bytes(self._field)
+            self._field = None
+        self._current = None
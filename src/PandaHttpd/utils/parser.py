@@ -1,84 +1,116 @@
 import enum
+import functools
 import json
+import string
 
-from typing import Any, Tuple, Dict
+from typing import Any, List, Tuple, Dict
+
+from .datastructures import MultiDict
+from .multipart import MultipartParser
+
+
+#: Every two-digit hex escape, in either case, and the byte it stands for.
+_HEX_PAIRS: Dict[bytes, bytes] = {
+    (high + low).encode(): bytes.fromhex(high + low)
+    for high in string.hexdigits
+    for low in string.hexdigits
+}
 
 
 class UrlParser:
+
+    #: How many distinct query strings are kept decoded, most recent first.
+    CACHE_SIZE: int = 1024
+    #: Longer query strings -- and form bodies -- are decoded every time:
+    #: they are rarely repeated, and would make the cache large.
+    CACHEABLE_LENGTH: int = 1024
     
     @staticmethod
     def unquote(s: str) -> str:
         """
         "Nguy%C3%AAn+H%C3%A0" -> "Nguyên Hà"
+
+        A string with no escape in it -- most keys and values -- comes back
+        as it is. Otherwise it is split at every `%`, and the two characters
+        after each are looked up in a table of all 484 hex pairs: whatever
+        is not one is kept as it was, `%` included.
         """
-        if not s:
-            return ""
-        
-        res_bytes = bytearray()
-        i = 0
-        n = len(s)
-        
-        while i < n:
-            char = s[i]
-            if char == '%':
-                if i + 2 < n:
-                    try:
-                        hex_val = int(s[i+1:i+3], 16)
-                        res_bytes.append(hex_val)
-                        i += 3
-                        continue
-                    except ValueError:
-                        res_bytes.append(ord('%'))
-                        i += 1
-                else:
-                    res_bytes.append(ord('%'))
-                    i += 1
-            elif char == '+':
-                res_bytes.append(ord(' '))
-                i += 1
+        if '+' in s:
+            s = s.replace('+', ' ')
+        if '%' not in s:
+            return s
+
+        pieces = s.encode().split(b'%')
+        out = [pieces[0]]
+        hex_pairs = _HEX_PAIRS
+        for i in range(1, len(pieces)):
+            piece = pieces[i]
+            byte = hex_pairs.get(piece[:2])
+            if byte is None:
+                out.append(b'%')
+                out.append(piece)
             else:
-                res_bytes.append(ord(char))
-                i += 1
-        
-        return res_bytes.decode('utf-8', 'ignore')
+                out.append(byte)
+                out.append(piece[2:])
+        return b''.join(out).decode('utf-8', 'ignore')
 
     @staticmethod
-    def parse_qs(query_string: str) -> Dict[str, str]:
+    def parse_pairs(query_string: str) -> List[Tuple[str, str]]:
         """
-        "id=1&name=A" -> {'id': '1', 'name': 'A'}
+        "id=1&tag=a&tag=b" -> [('id', '1'), ('tag', 'a'), ('tag', 'b')]
         """
-        query_params = {}
-        if not query_string:
-            return query_params
-            
-        pairs = query_string.split('&')
-        for pair in pairs:
+        if '%' not in query_string and '+' not in query_string:
+            # Nothing to decode anywhere: the whole string says so at once.
+            return [pair.partition('=')[::2] for pair in query_string.split('&') if pair]
+
+        unquote = UrlParser.unquote
+        pairs = []
+        for pair in query_string.split('&'):
             if not pair:
                 continue
-            
-            if '=' in pair:
-                key, value = pair.split('=', 1)
-                decoded_key = UrlParser.unquote(key)
-                decoded_val = UrlParser.unquote(value)
-                query_params[decoded_key] = decoded_val
-            else:
-                decoded_key = UrlParser.unquote(pair)
-                query_params[decoded_key] = ''
-                
-        return query_params
+            key, _, value = pair.partition('=')
+            pairs.append((unquote(key), unquote(value)))
+        return pairs
 
     @staticmethod
-    def parse_url(raw_path: str) -> Tuple[str, Dict[str, str]]:
+    def parse_qs(query_string: str) -> MultiDict:
+        """
+        "id=1&name=A&name=B" -> MultiDict: ['id'] == '1', ['name'] == 'B',
+        .getlist('name') == ['A', 'B']
+
+        A short query string is decoded once and remembered: the same ones
+        -- `?page=2`, a tracking tag -- arrive over and over. What is kept
+        is the decoded pairs, and every call gets a MultiDict of its own.
+        """
+        if not query_string:
+            return MultiDict()
+        if len(query_string) <= UrlParser.CACHEABLE_LENGTH:
+            return MultiDict(_cached_pairs(query_string))
+        return MultiDict(UrlParser.parse_pairs(query_string))
+
+    @staticmethod
+    def split_url(raw_path: str) -> Tuple[str, str]:
+        """
+        "/items?id=1#top" -> ("/items", "id=1")
+        """
         if '?' in raw_path:
             path_part, query_part = raw_path.split('?', 1)
             if '#' in query_part:
                 query_part = query_part.split('#', 1)[0]
-            return path_part, UrlParser.parse_qs(query_part)
-        else:
-            if '#' in raw_path:
-                path_part = raw_path.split('#', 1)[0]
-                return path_part, {}
-            return raw_path, {}
+            return path_part, query_part
+        if '#' in raw_path:
+            return raw_path.split('#', 1)[0], ''
+        return raw_path, ''
+
+    @staticmethod
+    def parse_url(raw_path: str) -> Tuple[str, MultiDict]:
+        path_part, query_part = UrlParser.split_url(raw_path)
+        return path_part, UrlParser.parse_qs(query_part)
+
+
+@functools.lru_cache(maxsize=UrlParser.CACHE_SIZE)
+def _cached_pairs(query_string: str) -> Tuple[Tuple[str, str], ...]:
+    return tuple(UrlParser.parse_pairs(query_string))
         
 
 class RequestBodyParser:
@@ -88,6 +120,7 @@ class RequestBodyParser:
         FORM = 'application/x-www-form-urlencoded'
         JSON = 'application/json'
         XML = 'application/xml'
+        MULTIPART = 'multipart/form-data'
 
     @staticmethod
     def parse(content_type: str, content: bytes) -> Dict[str, Any]:
@@ -98,6 +131,8 @@ class RequestBodyParser:
             return RequestBodyParser.parse_json(content)
         elif content_type.startswith(_t.XML):
             return RequestBodyParser.parse_xml(content)
+        elif content_type.startswith(_t.MULTIPART):
+            return RequestBodyParser.parse_multipart(content_type, content)
         else:
             raise TypeError(f'Unsupported Content-Type: {content_type}')
         
@@ -112,6 +147,12 @@ class RequestBodyParser:
         except Exception:
             raise ValueError('Invalid JSON body')
 
+    @staticmethod
+    def parse_multipart(content_type: str, content: bytes) -> Dict[str, Any]:
+        parser = MultipartParser(MultipartParser.boundary(content_type))
+        parser.feed(content)
+        return parser.finish()
+
     @staticmethod
     def parse_xml(content: bytes) -> Dict[str, Any]:
         raise NotImplementedError('XML parsing not implemented')
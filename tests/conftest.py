@@ -0,0 +1,163 @@
+import json
+import logging
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+import pytest
+
+SRC = str(Path(__file__).resolve().parent.parent / 'src')
+sys.path.insert(0, SRC)
+
+from PandaHttpd import PandaHttpd, PandaLogger
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def exchange(port: int, data: bytes, timeout: float = 2.0) -> bytes:
+    """Send data on a new connection and read until the server closes it."""
+    with socket.create_connection(('127.0.0.1', port), timeout=timeout) as sock:
+        sock.sendall(data)
+        received = b''
+        try:
+            while chunk := sock.recv(65536):
+                received += chunk
+        except OSError:
+            pass
+    return received
+
+
+def read_response(sock: socket.socket, buffered: bytearray) -> bytes:
+    """One response off a keep-alive connection; what follows stays in
+    buffered."""
+    while b'\r\n\r\n' not in buffered:
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise ConnectionError('closed')
+        buffered += chunk
+    head_end = buffered.index(b'\r\n\r\n') + 4
+    length = 0
+    for line in bytes(buffered[:head_end]).split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    while len(buffered) < head_end + length:
+        chunk = sock.recv(65536)
+        if not chunk:
+            raise ConnectionError('closed')
+        buffered += chunk
+    response = bytes(buffered[:head_end + length])
+    del buffered[:head_end + length]
+    return response
+
+
+@pytest.fixture
+def make_app(tmp_path: Path) -> Iterator[Callable[..., PandaHttpd]]:
+    """An app on a free port, with its log in tmp_path; config overrides by
+    keyword."""
+    def make(**config: Any) -> PandaHttpd:
+        return PandaHttpd(
+            config={'ip': '127.0.0.1', 'port': free_port(), **config},
+            logger=PandaLogger(save_dir=str(tmp_path / 'logs'), level=logging.CRITICAL),
+        )
+    yield make
+
+
+@pytest.fixture
+def serve() -> Iterator[Callable[..., PandaHttpd]]:
+    """Run an app on a thread until the test ends: with run(), or with the
+    engine named."""
+    started = []
+
+    def start(app: PandaHttpd, engine: str = 'run') -> PandaHttpd:
+        thread = threading.Thread(target=getattr(app, engine), daemon=True)
+        thread.start()
+        started.append((app, thread))
+        for _ in range(100):
+            try:
+                socket.create_connection(('127.0.0.1', app.port), timeout=0.2).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+        return app
+
+    yield start
+    for app, thread in started:
+        app.stop()
+        thread.join(timeout=5)
+
+
+SERVER_SCRIPT = '''
+import logging, os, sys, time
+sys.path.insert(0, {src!r})
+from PandaHttpd import PandaHttpd, PandaLogger
+
+app = PandaHttpd(
+    config={config!r},
+    logger=PandaLogger(save_dir={logs!r}, level=logging.CRITICAL),
+)
+
+@app.route('/pid')
+def pid():
+    return {{'pid': os.getpid()}}
+
+@app.route('/slow')
+def slow(seconds: float = 0.5):
+    time.sleep(seconds)
+    return {{'pid': os.getpid()}}
+
+@app.route('/crash')
+def crash():
+    os._exit(3)
+
+app.{engine}()
+'''
+
+
+def pid_of(port: int) -> Optional[int]:
+    """The pid of the process that answered, or None if none did."""
+    try:
+        answer = exchange(port, b'GET /pid HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n')
+    except OSError:
+        return None
+    if not answer.startswith(b'HTTP/1.1 200'):
+        return None
+    return json.loads(answer.split(b'\r\n\r\n', 1)[1])['pid']
+
+
+@pytest.fixture
+def supervisor(tmp_path: Path) -> Iterator[Callable[..., Tuple[int, subprocess.Popen]]]:
+    """Start an app in a process of its own, with the engine named and
+    config by keyword; the port it serves on, and the process."""
+    started = []
+
+    def start(engine: str = 'run', **config: Any) -> Tuple[int, subprocess.Popen]:
+        port = free_port()
+        config = {'ip': '127.0.0.1', 'port': port, **config}
+        script = tmp_path / 'server.py'
+        script.write_text(SERVER_SCRIPT.format(src=SRC, config=config, logs=str(tmp_path / 'logs'), engine=engine))
+        process = subprocess.Popen([sys.executable, str(script)])
+        started.append(process)
+        for _ in range(200):
+            if pid_of(port) is not None:
+                return port, process
+            time.sleep(0.05)
+        pytest.fail('server did not start')
+
+    yield start
+    for process in started:
+        # SIGTERM, so a supervisor stops its workers too, rather than
+        # leaving them orphaned.
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
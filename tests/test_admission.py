@@ -0,0 +1,34 @@
+import socket
+import threading
+import time
+
+from conftest import exchange
+
+
+def test_queued_connection_is_shed_while_workers_are_stuck(make_app, serve):
+    app = make_app(max_workers=1, min_workers=1, max_queue_wait=0.3)
+    release = threading.Event()
+
+    @app.route('/slow')
+    def slow():
+        release.wait(10)
+        return {'ok': True}
+
+    serve(app)
+    busy = socket.create_connection(('127.0.0.1', app.port))
+    try:
+        busy.sendall(b'GET /slow HTTP/1.1\r\nHost: x\r\n\r\n')
+        time.sleep(0.2)
+
+        started = time.monotonic()
+        answer = exchange(app.port, b'GET /slow HTTP/1.1\r\nHost: x\r\n\r\n', timeout=5)
+        waited = time.monotonic() - started
+
+        assert answer.startswith(b'HTTP/1.1 503 ')
+        assert b'retry-after: 1' in answer.lower()
+        # Shed at max_queue_wait, not once the stuck worker is done.
+        assert waited < 2
+        assert app.metrics.snapshot()['shed_queue_wait'] == 1
+    finally:
+        release.set()
+        busy.close()
@@ -0,0 +1,85 @@
+import dataclasses
+import json
+from typing import List, Optional
+
+import pytest
+
+from conftest import exchange
+
+
+@dataclasses.dataclass
+class Post:
+    title: str
+    score: int = 0
+
+
+@pytest.fixture
+def app(make_app, serve):
+    app = serve(make_app())
+
+    @app.route('/search')
+    def search(q: str, page: int = 1, exact: bool = False, tag: Optional[str] = None, ids: List[int] = []):
+        return {'q': q, 'page': page, 'exact': exact, 'tag': tag, 'ids': ids}
+
+    @app.route('/posts/{id}', method='PUT')
+    def update(id: int, post: Post):
+        return {'id': id, 'title': post.title, 'score': post.score}
+
+    return app
+
+
+def call(app, method: str, target: str, body: bytes = b'', content_type: str = 'application/json'):
+    head = f'{method} {target} HTTP/1.1\r\nHost: x\r\nConnection: close\r\n'
+    if body:
+        head += f'Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n'
+    answer = exchange(app.port, head.encode() + b'\r\n' + body)
+    status = int(answer.split(b' ', 2)[1])
+    return status, answer.split(b'\r\n\r\n', 1)[1]
+
+
+def test_query_params(app):
+    status, body = call(app, 'GET', '/search?q=cats&page=2&exact=yes&ids=1&ids=2')
+    assert status == 200
+    assert json.loads(body) == {'q': 'cats', 'page': 2, 'exact': True, 'tag': None, 'ids': [1, 2]}
+
+
+@pytest.mark.parametrize('target', [
+    '/search',
+    '/search?page=2',
+    '/search?q=cats&page=two',
+    '/search?q=cats&exact=maybe',
+    '/search?q=cats&ids=1&ids=x',
+])
+def test_bad_query_params(app, target):
+    assert call(app, 'GET', target)[0] == 400
+
+
+def test_body(app):
+    status, body = call(app, 'PUT', '/posts/7', b'{"title": "hi", "extra": 1}')
+    assert status == 200
+    assert json.loads(body) == {'id': 7, 'title': 'hi', 'score': 0}
+
+
+def test_form_body(app):
+    status, body = call(app, 'PUT', '/posts/7', b'title=hi', 'application/x-www-form-urlencoded')
+    assert status == 200
+    assert json.loads(body)['title'] == 'hi'
+
+
+@pytest.mark.parametrize('target, body, expected', [
+    ('/posts/x', b'{"title": "hi"}', 400),
+    ('/posts/7', b'{"title": ', 400),
+    ('/posts/7', b'', 422),
+    ('/posts/7', b'[1, 2]', 422),
+    ('/posts/7', b'{"score": 3}', 422),
+])
+def test_bad_body(app, target, body, expected):
+    assert call(app, 'PUT', target, body)[0] == expected
+
+
+def test_unsupported_annotation(make_app):
+    app = make_app()
+    with pytest.raises(ValueError):
+        @app.route('/')
+        def index(when: dict):
+            return {}
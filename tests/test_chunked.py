@@ -0,0 +1,59 @@
+import pytest
+
+from PandaHttpd.utils import ChunkedDecoder
+
+
+def decode(data: bytes, limit: int = 1 << 20, step: int = 0) -> tuple:
+    decoder = ChunkedDecoder(limit)
+    body, buffer = bytearray(), bytearray()
+    for i in range(0, len(data), step or len(data)):
+        buffer += data[i:i + (step or len(data))]
+        del buffer[:decoder.feed(buffer, body.extend)]
+    return decoder, bytes(body), bytes(buffer)
+
+
+@pytest.mark.parametrize('step', [0, 1, 3])
+def test_chunks_and_trailers(step):
+    data = b'5;ext=1\r\nhello\r\n6\r\n world\r\n0\r\nX-Checksum: abc\r\nX-Other:  v \r\n\r\nGET / HTTP/1.1'
+    decoder, body, rest = decode(data, step=step)
+    assert decoder.done
+    assert body == b'hello world'
+    assert decoder.trailers == {'x-checksum': 'abc', 'x-other': 'v'}
+    assert rest == b'GET / HTTP/1.1'
+
+
+@pytest.mark.parametrize('size', [b'1' + b'0' * 16, b'f' * 17])
+def test_chunk_size_overflow(size):
+    decoder = ChunkedDecoder(1 << 20)
+    with pytest.raises(ValueError, match='invalid chunk size'):
+        decoder.feed(size + b'\r\n', bytearray().extend)
+    assert not decoder.over_limit
+
+
+def test_chunk_over_limit_refused_on_size_line():
+    decoder = ChunkedDecoder(limit=10)
+    body = bytearray()
+    decoder.feed(b'8\r\n12345678\r\n', body.extend)
+    with pytest.raises(ValueError, match='too large'):
+        decoder.feed(b'3\r\n', body.extend)
+    assert decoder.over_limit
+    assert body == b'12345678'
+
+
+@pytest.mark.parametrize('data', [
+    b'x\r\n',
+    b'-1\r\n',
+    b'3\r\nabcX\r\n',
+    b'0\r\nno-colon\r\n\r\n',
+    b'0\r\n: empty-name\r\n\r\n',
+])
+def test_malformed(data):
+    with pytest.raises(ValueError, match='Malformed'):
+        ChunkedDecoder(1 << 20).feed(data, bytearray().extend)
+
+
+def test_trailer_too_large():
+    decoder = ChunkedDecoder(1 << 20)
+    line = b'X-Pad: ' + b'a' * 1000 + b'\r\n'
+    with pytest.raises(ValueError, match='trailer too large'):
+        decoder.feed(b'0\r\n' + line * (ChunkedDecoder.MAX_TRAILER_SIZE // len(line) + 1), bytearray().extend)
@@ -0,0 +1,31 @@
+import gzip
+
+import pytest
+
+from PandaHttpd.http import JsonResponse
+from PandaHttpd.middleware import GZipMiddleware
+from PandaHttpd.utils import CaseInsensitiveDict
+
+BODY = {'items': [{'id': i, 'name': f'item {i}'} for i in range(100)]}
+
+
+def post(accept_encoding):
+    dict_headers = CaseInsensitiveDict()
+    if accept_encoding is not None:
+        dict_headers['accept-encoding'] = accept_encoding
+    return GZipMiddleware().post(dict_headers, JsonResponse(body=BODY))
+
+
+@pytest.mark.parametrize('accept_encoding', ['gzip', 'br, gzip;q=0.5', '*', '*;q=0, gzip'])
+def test_compressed(accept_encoding):
+    response = post(accept_encoding)
+    assert response.header.get(b'content-encoding') == b'gzip'
+    assert response.header.get(b'vary') == b'Accept-Encoding'
+    assert gzip.decompress(response.body) == JsonResponse(body=BODY).body
+
+
+@pytest.mark.parametrize('accept_encoding', [None, '', 'gzip;q=0', 'GZIP; q=0.000', 'br', 'gzip;q=0, *'])
+def test_not_compressed(accept_encoding):
+    response = post(accept_encoding)
+    assert response.header.get(b'content-encoding') is None
+    assert response.body == JsonResponse(body=BODY).body
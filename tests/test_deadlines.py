@@ -0,0 +1,62 @@
+import socket
+import struct
+import time
+
+from conftest import exchange
+
+from PandaHttpd.http import BinaryResponse, Request
+
+
+def armed(app):
+    return [timer for _, _, timer in app._intake.timers._heap if not (timer.cancelled or timer.fired)]
+
+
+def test_failed_send_disarms_write_deadline(make_app, serve):
+    app = serve(make_app())
+
+    @app.route('/big')
+    def big():
+        return BinaryResponse(body=b'x' * (32 * 1024 * 1024))
+
+    sock = socket.create_connection(('127.0.0.1', app.port))
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.sendall(b'GET /big HTTP/1.1\r\nHost: x\r\n\r\n')
+    sock.recv(1024)
+    # Reset, so that the server's send fails.
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+    sock.close()
+
+    for _ in range(50):
+        if not armed(app):
+            break
+        time.sleep(0.05)
+    assert not armed(app)
+    assert app.metrics.snapshot().get('timeout_write', 0) == 0
+
+
+def test_worker_body_read_timeout_answered(make_app, serve, monkeypatch):
+    # A body over intake_body_limit is read by the worker; with body_timeout
+    # far off, the socket's own timeout is what ends the wait.
+    monkeypatch.setattr(Request, 'SOCKET_TIMEOUT_SECONDS', 0.3)
+    app = serve(make_app(intake_body_limit=1024, body_timeout=60))
+
+    @app.route('/upload', method='POST')
+    def upload(request):
+        return {'size': len(request.raw_body)}
+
+    answer = exchange(app.port, b'POST /upload HTTP/1.1\r\nHost: x\r\nContent-Length: 4096\r\n\r\n' + b'x' * 2048, timeout=5)
+    assert answer.startswith(b'HTTP/1.1 408 ')
+    assert app.metrics.snapshot()['timeout_body'] == 1
+
+
+def test_worker_head_read_timeout_answered(make_app, monkeypatch):
+    # Outside serve(), handle_client reads heads itself.
+    monkeypatch.setattr(Request, 'SOCKET_TIMEOUT_SECONDS', 0.3)
+    app = make_app()
+    server, client = socket.socketpair()
+    with client:
+        client.sendall(b'GET / HTTP/1.1\r\nHost: x\r\n')
+        app.handle_client(server, ('127.0.0.1', 0))
+        client.settimeout(2)
+        assert client.recv(65536).startswith(b'HTTP/1.1 408 ')
+    assert app.metrics.snapshot()['timeout_header'] == 1
@@ -0,0 +1,59 @@
+import gzip
+import os
+import zlib
+
+import pytest
+
+from PandaHttpd.utils import BodyDecoder
+
+
+def decode(decoder: BodyDecoder, data: bytes, step: int = 4096) -> bytes:
+    out = bytearray()
+    for i in range(0, len(data), step):
+        for piece in decoder.decompress(data[i:i + step]):
+            out += piece
+    decoder.finish()
+    return bytes(out)
+
+
+@pytest.mark.parametrize('encoding, compress', [
+    ('gzip', gzip.compress),
+    ('deflate', zlib.compress),
+    ('deflate', lambda d: zlib.compress(d, wbits=-zlib.MAX_WBITS)),
+])
+def test_round_trip(encoding, compress):
+    payload = os.urandom(100_000) + b'{"a": 1}' * 10_000
+    decoder = BodyDecoder(encoding, max_size=1 << 20, max_ratio=100)
+    assert decode(decoder, compress(payload), step=1000) == payload
+
+
+def test_ratio_limit():
+    bomb = gzip.compress(b'\0' * (8 << 20))
+    decoder = BodyDecoder('gzip', max_size=64 << 20, max_ratio=100)
+    with pytest.raises(ValueError, match='ratio'):
+        decode(decoder, bomb)
+    assert decoder.over_limit
+    # Found out after a step past the floor, not after inflating it all.
+    assert decoder.size_out <= BodyDecoder.RATIO_FLOOR + BodyDecoder.OUTPUT_CHUNK_SIZE
+
+
+def test_ratio_floor():
+    # Compresses far beyond max_ratio, but stays under the floor.
+    payload = b'\0' * (BodyDecoder.RATIO_FLOOR // 2)
+    decoder = BodyDecoder('gzip', max_size=1 << 20, max_ratio=2)
+    assert decode(decoder, gzip.compress(payload)) == payload
+
+
+def test_size_limit():
+    decoder = BodyDecoder('gzip', max_size=1000, max_ratio=1e9)
+    with pytest.raises(ValueError, match='too large'):
+        decode(decoder, gzip.compress(os.urandom(2000)))
+    assert decoder.over_limit
+
+
+@pytest.mark.parametrize('data', [b'not gzip at all', gzip.compress(b'abc')[:-4], gzip.compress(b'abc') + b'x'])
+def test_malformed(data):
+    decoder = BodyDecoder('gzip', max_size=1 << 20, max_ratio=100)
+    with pytest.raises(ValueError, match='Malformed'):
+        decode(decoder, data)
+    assert not decoder.over_limit
@@ -0,0 +1,85 @@
+import os
+import signal
+import socket
+import threading
+import time
+
+import pytest
+
+from conftest import exchange, pid_of, read_response
+
+SLOW = b'GET /slow?seconds=%s HTTP/1.1\r\nHost: x\r\n\r\n'
+
+
+def gone(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    return False
+
+
+@pytest.mark.parametrize('engine', ['run', 'run_async'])
+def test_sigterm_finishes_request_in_flight(supervisor, engine):
+    port, process = supervisor(engine)
+    answers = []
+    client = threading.Thread(target=lambda: answers.append(exchange(port, SLOW % b'0.5', timeout=5)))
+    client.start()
+    time.sleep(0.2)
+    process.send_signal(signal.SIGTERM)
+    client.join()
+    assert answers[0].startswith(b'HTTP/1.1 200')
+    assert b'connection: close' in answers[0].lower()
+    assert process.wait(timeout=10) == 0
+    assert pid_of(port) is None
+
+
+@pytest.mark.parametrize('engine', ['run', 'run_async'])
+def test_sigterm_closes_idle_connections(supervisor, engine):
+    port, process = supervisor(engine, keep_alive_timeout=30)
+    with socket.create_connection(('127.0.0.1', port), timeout=5) as sock:
+        sock.sendall(b'GET /pid HTTP/1.1\r\nHost: x\r\n\r\n')
+        read_response(sock, bytearray())
+        started = time.monotonic()
+        process.send_signal(signal.SIGTERM)
+        # Closed by the drain, not by the keep-alive timeout.
+        assert sock.recv(1) == b''
+    assert process.wait(timeout=10) == 0
+    assert time.monotonic() - started < 5
+
+
+@pytest.mark.parametrize('signum', [signal.SIGHUP, signal.SIGUSR2])
+@pytest.mark.parametrize('engine', ['run', 'run_async'])
+def test_restart_hands_the_port_over(supervisor, engine, signum):
+    port, process = supervisor(engine)
+    answered, refused = [], []
+    stopping = threading.Event()
+
+    def load():
+        while not stopping.is_set():
+            pid = pid_of(port)
+            (answered if pid is not None else refused).append(pid)
+
+    client = threading.Thread(target=load)
+    client.start()
+    successor = None
+    try:
+        time.sleep(0.3)
+        process.send_signal(signum)
+        # The predecessor leaves once its successor is serving.
+        assert process.wait(timeout=10) == 0
+        successor = pid_of(port)
+        time.sleep(0.3)
+    finally:
+        stopping.set()
+        client.join()
+        if successor is not None:
+            os.kill(successor, signal.SIGTERM)
+    assert successor not in (None, process.pid)
+    assert refused == []
+    assert set(answered) <= {process.pid, successor}
+    for _ in range(100):
+        if gone(successor):
+            break
+        time.sleep(0.05)
+    assert gone(successor)
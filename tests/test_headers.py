@@ -0,0 +1,81 @@
+import pytest
+
+from PandaHttpd.utils import CaseInsensitiveDict, HeaderMap
+
+HEAD = (
+    b'\r\nHost: example.com'
+    b'\r\nAccept: text/html'
+    b'\r\nX-Trace:  one '
+    b'\r\nnot a header'
+    b'\r\naccept: application/json'
+    b'\r\nCookie: a=1'
+    b'\r\n'
+)
+
+
+def test_lookup_case_insensitive_last_wins():
+    headers = HeaderMap.parse(HEAD)
+    assert headers['ACCEPT'] == headers.get('accept') == 'application/json'
+    assert headers['x-trace'] == 'one'
+    assert 'Host' in headers and 'host' in headers
+    assert headers.get('referer') is None
+    assert len(headers) == 4
+
+
+def test_fields_in_order_and_spelling():
+    headers = HeaderMap.parse(HEAD)
+    assert headers.fields == [
+        ('Host', 'example.com'), ('Accept', 'text/html'), ('X-Trace', 'one'),
+        ('accept', 'application/json'), ('Cookie', 'a=1'),
+    ]
+    assert headers.getlist('Accept') == ['text/html', 'application/json']
+    assert headers.getlist('x-missing') == []
+
+
+@pytest.mark.parametrize('load_first', [False, True])
+def test_removed_before_or_after_fields_split(load_first):
+    headers = HeaderMap.parse(HEAD)
+    if load_first:
+        headers.fields
+    headers.pop('cookie')
+    del headers['Accept']
+    assert [name for name, _ in headers.fields] == ['Host', 'X-Trace']
+    assert headers.getlist('accept') == []
+
+
+def test_add_and_set():
+    headers = HeaderMap.parse(HEAD)
+    headers.add('Accept', 'text/plain')
+    assert headers['accept'] == 'text/plain'
+    assert headers.getlist('accept') == ['text/html', 'application/json', 'text/plain']
+    headers['ACCEPT'] = '*/*'
+    assert headers.getlist('accept') == ['*/*']
+    assert headers.fields[-1] == ('ACCEPT', '*/*')
+
+
+def test_built_like_a_dict():
+    headers = HeaderMap({'Content-Type': 'text/plain'}, Vary='Accept')
+    headers.update([('X-One', '1')])
+    assert dict(headers.items()) == {'content-type': 'text/plain', 'vary': 'Accept', 'x-one': '1'}
+    assert headers.fields == [('Content-Type', 'text/plain'), ('Vary', 'Accept'), ('X-One', '1')]
+
+
+def test_common_names_interned():
+    headers = HeaderMap.parse(b'\r\nContent-Type: text/plain\r\nX-Custom: 1\r\n')
+    keys = list(headers)
+    assert keys == ['content-type', 'x-custom']
+    # The very object every map holds, not a lower-cased copy.
+    assert keys[0] is list(HeaderMap.parse(b'\r\nCONTENT-TYPE: a\r\n'))[0]
+
+
+def test_latin1_head():
+    headers = HeaderMap.parse(b'\r\nX-Name: Andr\xe9\r\n')
+    assert headers['x-name'] == 'André'
+
+
+def test_case_insensitive_dict():
+    headers = CaseInsensitiveDict({'Content-Type': 'a'})
+    headers['CONTENT-TYPE'] = 'b'
+    assert dict(headers.items()) == {'content-type': 'b'}
+    assert headers.pop('Content-type') == 'b'
+    assert 'content-type' not in headers
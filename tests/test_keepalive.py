@@ -0,0 +1,105 @@
+import socket
+import time
+
+import pytest
+
+from conftest import exchange, read_response
+
+
+@pytest.fixture
+def app(make_app, serve):
+    def start(**config):
+        app = make_app(**config)
+
+        @app.route('/echo/{word}')
+        def echo(word: str):
+            return {'word': word}
+
+        @app.route('/form', method='POST')
+        def form(request):
+            return dict(request.form().to_dict())
+
+        return serve(app)
+    return start
+
+
+def get(word: str, extra: bytes = b'') -> bytes:
+    return b'GET /echo/%s HTTP/1.1\r\nHost: x\r\n%s\r\n' % (word.encode(), extra)
+
+
+def test_requests_share_a_connection(app):
+    app = app()
+    with socket.create_connection(('127.0.0.1', app.port), timeout=2) as sock:
+        buffered = bytearray()
+        for word in ('one', 'two'):
+            sock.sendall(get(word))
+            response = read_response(sock, buffered)
+            assert response.startswith(b'HTTP/1.1 200 OK')
+            assert b'connection: keep-alive' in response.lower()
+            assert response.endswith(b'{"word":"%s"}' % word.encode())
+        body = b'a=1&b=2'
+        sock.sendall(
+            b'POST /form HTTP/1.1\r\nHost: x\r\nContent-Type: application/x-www-form-urlencoded\r\n'
+            b'Content-Length: %d\r\n\r\n%s' % (len(body), body)
+        )
+        assert read_response(sock, buffered).endswith(b'{"a":"1","b":"2"}')
+
+
+def test_pipelined_requests_answered_in_order(app):
+    app = app()
+    answer = exchange(app.port, get('one') + get('two') + get('three', b'Connection: close\r\n'))
+    assert answer.count(b'HTTP/1.1 200 OK') == 3
+    assert answer.index(b'"one"') < answer.index(b'"two"') < answer.index(b'"three"')
+
+
+def test_max_requests_per_connection(app):
+    app = app(keep_alive_max_requests=2)
+    with socket.create_connection(('127.0.0.1', app.port), timeout=2) as sock:
+        buffered = bytearray()
+        sock.sendall(get('one'))
+        assert b'max=1' in read_response(sock, buffered).lower()
+        sock.sendall(get('two'))
+        assert b'connection: close' in read_response(sock, buffered).lower()
+        assert sock.recv(1) == b''
+
+
+@pytest.mark.parametrize('request_line, extra', [
+    (b'GET /echo/a HTTP/1.1', b'Connection: close\r\n'),
+    (b'GET /echo/a HTTP/1.0', b''),
+])
+def test_connection_closed_when_asked(app, request_line, extra):
+    app = app()
+    started = time.monotonic()
+    answer = exchange(app.port, request_line + b'\r\nHost: x\r\n' + extra + b'\r\n', timeout=5)
+    assert answer.startswith(b'HTTP/1.')
+    assert b'connection: close' in answer.lower()
+    assert time.monotonic() - started < 1
+
+
+def test_http10_keep_alive(app):
+    app = app()
+    with socket.create_connection(('127.0.0.1', app.port), timeout=2) as sock:
+        buffered = bytearray()
+        for word in ('one', 'two'):
+            sock.sendall(b'GET /echo/%s HTTP/1.0\r\nConnection: keep-alive\r\n\r\n' % word.encode())
+            assert b'connection: keep-alive' in read_response(sock, buffered).lower()
+
+
+def test_idle_connection_closed(app):
+    app = app(keep_alive_timeout=0.3)
+    with socket.create_connection(('127.0.0.1', app.port), timeout=3) as sock:
+        sock.sendall(get('one'))
+        read_response(sock, bytearray())
+        started = time.monotonic()
+        # Closed quietly: no 408 for a request never begun.
+        assert sock.recv(65536) == b''
+        assert time.monotonic() - started < 2
+
+
+def test_head_has_no_body(app):
+    app = app()
+    answer = exchange(app.port, b'HEAD /echo/a HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n')
+    head, body = answer.split(b'\r\n\r\n', 1)
+    assert head.startswith(b'HTTP/1.1 200 OK')
+    assert b'content-length: 12' in head.lower()
+    assert body == b''
@@ -0,0 +1,81 @@
+import time
+from types import SimpleNamespace
+
+import psutil
+import pytest
+
+from PandaHttpd import PandaHttpd
+from PandaHttpd.server import ConcurrencyLimiter
+
+
+def test_concurrency_adapts_by_default(make_app):
+    app = make_app()
+    cores = psutil.cpu_count(False) or 1
+    assert app.min_workers == cores
+    assert app.max_workers == cores * PandaHttpd.MAX_WORKERS_PER_CORE
+    assert ConcurrencyLimiter(initial=cores, min_limit=app.min_workers, max_limit=app.max_workers).adaptive
+
+
+def test_fixed_pool_when_configured(make_app):
+    app = make_app(max_workers=4, min_workers=4)
+    assert not ConcurrencyLimiter(initial=4, min_limit=app.min_workers, max_limit=app.max_workers).adaptive
+    assert make_app(max_workers=1).min_workers == 1
+
+
+class FakeCpu:
+    """psutil.cpu_percent(None) as it behaves: 0.0 the first time it is
+    asked, then the use since the last call."""
+
+    def __init__(self, percent: float) -> None:
+        self.percent = percent
+        self.calls = 0
+
+    def __call__(self, interval=None) -> float:
+        self.calls += 1
+        return 0.0 if self.calls == 1 else self.percent
+
+
+@pytest.fixture
+def cpu(monkeypatch):
+    def install(percent: float) -> FakeCpu:
+        fake = FakeCpu(percent)
+        monkeypatch.setattr(psutil, 'cpu_percent', fake)
+        monkeypatch.setattr(psutil, 'virtual_memory', lambda: SimpleNamespace(percent=10.0))
+        return fake
+    return install
+
+
+def close_window(limiter: ConcurrencyLimiter, in_flight: int) -> None:
+    time.sleep(limiter.window)
+    limiter.record(0.01, in_flight)
+
+
+def test_first_window_respects_busy_cpu(cpu):
+    cpu(99.0)
+    limiter = ConcurrencyLimiter(initial=4, min_limit=1, max_limit=64, window=0.05)
+    close_window(limiter, in_flight=4)
+    assert limiter.limit == 4
+
+
+def test_grows_while_cpu_idle(cpu):
+    cpu(10.0)
+    limiter = ConcurrencyLimiter(initial=4, min_limit=1, max_limit=64, window=0.05)
+    close_window(limiter, in_flight=4)
+    assert limiter.limit == 6
+
+
+def test_no_growth_on_a_reading_spanning_a_lull(cpu):
+    cpu(10.0)
+    limiter = ConcurrencyLimiter(initial=4, min_limit=1, max_limit=64, window=0.05)
+    time.sleep(0.2)
+    close_window(limiter, in_flight=4)
+    assert limiter.limit == 4
+    close_window(limiter, in_flight=4)
+    assert limiter.limit == 6
+
+
+def test_fixed_limit_reads_nothing(cpu):
+    fake = cpu(10.0)
+    limiter = ConcurrencyLimiter(initial=4, min_limit=4, max_limit=4, window=0.05)
+    close_window(limiter, in_flight=4)
+    assert fake.calls == 0 and limiter.limit == 4
@@ -0,0 +1,118 @@
+import errno
+import os
+import socket
+import stat
+import time
+
+import pytest
+
+from PandaHttpd.server.listeners import Address, adopt_fd, bind_unix, parse_mode
+
+from conftest import free_port
+
+GET = b'GET /where HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n'
+
+
+@pytest.mark.parametrize('text, kind, expected', [
+    ('127.0.0.1:8080', 'tcp', ('127.0.0.1', 8080)),
+    (':8080', 'tcp', ('0.0.0.0', 8080)),
+    ('[::1]:8080', 'tcp', ('::1', 8080)),
+    ('unix:/run/app.sock', 'unix', '/run/app.sock'),
+])
+def test_address_parse(text, kind, expected):
+    address = Address.parse(text)
+    assert address.kind == kind
+    assert address.sockname == expected
+    assert str(Address.parse(str(address))) == str(address)
+
+
+def test_address_parse_fd():
+    address = Address.parse('fd://7')
+    assert (address.kind, address.fd) == ('fd', 7)
+
+
+@pytest.mark.parametrize('text', ['unix:', 'fd://', 'fd://three', 'localhost', '127.0.0.1:65536', '127.0.0.1:http'])
+def test_address_parse_rejects(text):
+    with pytest.raises(ValueError):
+        Address.parse(text)
+
+
+@pytest.mark.parametrize('value, mode', [(None, None), (0o660, 0o660), ('660', 0o660), ('0660', 0o660), ('0o600', 0o600)])
+def test_parse_mode(value, mode):
+    assert parse_mode(value) == mode
+
+
+@pytest.mark.parametrize('value', ['rw', 0o10000, True, 6.6])
+def test_parse_mode_rejects(value):
+    with pytest.raises(ValueError):
+        parse_mode(value)
+
+
+def test_adopt_fd_refuses_datagram_socket():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        with pytest.raises(ValueError):
+            adopt_fd(sock.fileno())
+        # Left open for its owner.
+        assert sock.fileno() != -1
+
+
+def test_bind_unix_replaces_stale_file(tmp_path):
+    path = str(tmp_path / 'app.sock')
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(path)
+    stale.close()
+    sock = bind_unix(Address.parse(f'unix:{path}'), 8)
+    sock.close()
+
+
+def test_bind_unix_refuses_live_socket(tmp_path):
+    path = str(tmp_path / 'app.sock')
+    with bind_unix(Address.parse(f'unix:{path}'), 8):
+        with pytest.raises(OSError) as error:
+            bind_unix(Address.parse(f'unix:{path}'), 8)
+    assert error.value.errno == errno.EADDRINUSE
+
+
+def ask(family, address) -> bytes:
+    with socket.socket(family) as sock:
+        sock.settimeout(2)
+        sock.connect(address)
+        sock.sendall(GET)
+        received = b''
+        while chunk := sock.recv(65536):
+            received += chunk
+    return received
+
+
+@pytest.mark.parametrize('engine', ['run', 'run_async'])
+def test_every_listener_serves(make_app, serve, tmp_path, engine):
+    port, port6 = free_port(), free_port()
+    path = str(tmp_path / 'app.sock')
+    handed = socket.create_server(('127.0.0.1', 0))
+    handed_port = handed.getsockname()[1]
+    app = make_app(
+        port=port,
+        bind=[f'127.0.0.1:{port}', f'[::1]:{port6}', f'unix:{path}', f'fd://{handed.detach()}'],
+        unix_socket_mode='660',
+    )
+
+    @app.route('/where')
+    def where():
+        return {'ok': True}
+
+    serve(app, engine)
+    for family, address in (
+        (socket.AF_INET, ('127.0.0.1', port)),
+        (socket.AF_INET6, ('::1', port6)),
+        (socket.AF_UNIX, path),
+        (socket.AF_INET, ('127.0.0.1', handed_port)),
+    ):
+        assert ask(family, address).startswith(b'HTTP/1.1 200'), address
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o660
+
+    app.stop()
+    for _ in range(100):
+        if not os.path.exists(path):
+            break
+        time.sleep(0.05)
+    assert not os.path.exists(path)
@@ -0,0 +1,110 @@
+import pytest
+
+from PandaHttpd.http import PlainTextResponse, Request
+from PandaHttpd.middleware import BaseMiddleware, Middleware
+
+from conftest import exchange
+
+
+class Recording(BaseMiddleware):
+
+    def __init__(self, name, log, answer=False):
+        self.name, self.log, self.answer = name, log, answer
+
+    def pre(self, dict_headers, request):
+        self.log.append(f'pre {self.name}')
+        if self.answer:
+            return PlainTextResponse(body=self.name.encode())
+        return dict_headers
+
+    def post(self, dict_headers, response):
+        self.log.append(f'post {self.name}')
+        return response
+
+
+class PostOnly(BaseMiddleware):
+
+    def __init__(self, log):
+        self.log = log
+
+    def post(self, dict_headers, response):
+        self.log.append('post only')
+        return response
+
+
+def handler(log):
+    def handle(dict_headers, request):
+        log.append('handler')
+        return PlainTextResponse(body=b'handler')
+    return handle
+
+
+def test_pre_in_order_post_in_reverse():
+    log = []
+    pipeline = Middleware([Recording('a', log), Recording('b', log)])
+    response = pipeline.run({}, Request(None), handler(log))
+    assert response.body == b'handler'
+    assert log == ['pre a', 'pre b', 'handler', 'post b', 'post a']
+
+
+@pytest.mark.parametrize('answering, expected', [
+    (0, ['pre a']),
+    (1, ['pre a', 'pre b', 'post a']),
+    (2, ['pre a', 'pre b', 'pre c', 'post b', 'post a']),
+])
+def test_pre_answering_short_circuits(answering, expected):
+    log = []
+    names = 'abc'
+    pipeline = Middleware([Recording(name, log, answer=i == answering) for i, name in enumerate(names)])
+    response = pipeline.run({}, Request(None), handler(log))
+    assert response.body == names[answering].encode()
+    assert log == expected
+
+
+def test_base_methods_left_out():
+    log = []
+    pipeline = Middleware([BaseMiddleware(), PostOnly(log)])
+    assert len(pipeline._pre) == 0
+    assert [position for position, _ in pipeline._post] == [1]
+    pipeline.run({}, Request(None), handler(log))
+    assert log == ['handler', 'post only']
+
+
+def test_add_middleware_recompiles():
+    log = []
+    pipeline = Middleware()
+    pipeline.add_middleware(Recording('late', log, answer=True))
+    assert pipeline.run({}, Request(None), handler(log)).body == b'late'
+    assert log == ['pre late']
+
+
+def test_route_middleware_answers_before_endpoint(make_app, serve):
+    log = []
+    app = make_app()
+
+    class Health(BaseMiddleware):
+        def pre(self, dict_headers, request):
+            if request.path == '/healthz':
+                return PlainTextResponse(body=b'ok')
+            return dict_headers
+
+    app.middleware(Health())
+
+    @app.route('/healthz')
+    def health():
+        log.append('endpoint')
+        return {'reached': True}
+
+    @app.route('/cached', middleware=[Recording('route', log, answer=True)])
+    def cached():
+        log.append('endpoint')
+        return {'reached': True}
+
+    serve(app)
+    answer = exchange(app.port, b'GET /healthz HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n')
+    assert answer.startswith(b'HTTP/1.1 200') and answer.endswith(b'\r\n\r\nok')
+    # The app's own DefaultMiddleware, added first, still sees it on the way out.
+    assert b'x-processed-by: defaultmiddleware' in answer.lower()
+    answer = exchange(app.port, b'GET /cached HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n')
+    assert answer.endswith(b'\r\n\r\nroute')
+    assert log == ['pre route']
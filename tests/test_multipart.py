@@ -0,0 +1,93 @@
+import pytest
+
+from conftest import exchange
+
+from PandaHttpd.utils import FormField, MultipartParser, UploadFile
+
+BOUNDARY = b'----boundary7MA4YWxk'
+
+
+def body(*parts: bytes) -> bytes:
+    return b''.join(b'--' + BOUNDARY + b'\r\n' + part + b'\r\n' for part in parts) + b'--' + BOUNDARY + b'--\r\n'
+
+
+FIELD = b'Content-Disposition: form-data; name="title"\r\n\r\nhello\r\nworld'
+FILE = (
+    b'Content-Disposition: form-data; name="upload"; filename="a.bin"\r\n'
+    b'Content-Type: application/octet-stream\r\n\r\n'
+    # Almost a delimiter, more than once.
+    + b'\r\n--' + BOUNDARY[:-1] + b'x' + b'\r\n-' * 50
+)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, len(BOUNDARY) + 3, 4096])
+def test_boundary_split_across_reads(chunk_size):
+    data = body(FIELD, FILE)
+    parser = MultipartParser(BOUNDARY, spool_threshold=16)
+    for i in range(0, len(data), chunk_size):
+        parser.feed(data[i:i + chunk_size])
+    form = parser.finish()
+    try:
+        assert isinstance(form['title'], FormField)
+        assert form['title'].value == 'hello\r\nworld'
+        upload = form['upload']
+        assert isinstance(upload, UploadFile)
+        assert upload.filename == 'a.bin'
+        assert upload.read() == FILE.split(b'\r\n\r\n', 1)[1]
+    finally:
+        form.close()
+
+
+def test_spooled_files_closed_when_feed_raises():
+    parser = MultipartParser(BOUNDARY, spool_threshold=16)
+    parser.feed(b'--' + BOUNDARY + b'\r\n' + FILE + b'\r\n--' + BOUNDARY + b'\r\n')
+    upload = parser._parts[0]
+    assert not upload.file.closed
+    with pytest.raises(ValueError):
+        parser.feed(b'Content-Disposition: attachment\r\n\r\n')
+    assert upload.file.closed
+
+
+def test_body_without_closing_boundary():
+    parser = MultipartParser(BOUNDARY)
+    parser.feed(b'--' + BOUNDARY + b'\r\n' + FIELD)
+    with pytest.raises(ValueError):
+        parser.finish()
+
+
+def test_field_too_large():
+    parser = MultipartParser(BOUNDARY)
+    parser.feed(b'--' + BOUNDARY + b'\r\nContent-Disposition: form-data; name="f"\r\n\r\n')
+    with pytest.raises(ValueError):
+        parser.feed(b'x' * (MultipartParser.MAX_FIELD_SIZE + len(BOUNDARY) + 8))
+
+
+@pytest.mark.parametrize('data, status', [
+    # Cut off before the closing boundary.
+    (b'--' + BOUNDARY + b'\r\n' + FIELD, 400),
+    (b'--' + BOUNDARY + b'\r\nContent-Disposition: attachment\r\n\r\nx\r\n--' + BOUNDARY + b'--\r\n', 400),
+])
+def test_malformed_body_answered(make_app, serve, data, status):
+    app = serve(make_app())
+
+    @app.route('/upload', method='POST')
+    def upload(request):
+        return {'fields': len(request.multipart())}
+
+    head = (
+        b'POST /upload HTTP/1.1\r\nHost: x\r\nConnection: close\r\n'
+        b'Content-Type: multipart/form-data; boundary=' + BOUNDARY + b'\r\n'
+        b'Content-Length: ' + str(len(data)).encode() + b'\r\n\r\n'
+    )
+    assert exchange(app.port, head + data).startswith(b'HTTP/1.1 %d ' % status)
+
+
+def test_not_multipart_answered(make_app, serve):
+    app = serve(make_app())
+
+    @app.route('/upload', method='POST')
+    def upload(request):
+        return {'fields': len(request.multipart())}
+
+    answer = exchange(app.port, b'POST /upload HTTP/1.1\r\nHost: x\r\nConnection: close\r\nContent-Type: text/plain\r\nContent-Length: 2\r\n\r\nhi')
+    assert answer.startswith(b'HTTP/1.1 415 ')
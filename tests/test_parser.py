@@ -0,0 +1,74 @@
+import urllib.parse
+
+import pytest
+
+from PandaHttpd.utils import MultiDict, UrlParser
+from PandaHttpd.utils.parser import _cached_pairs
+
+
+@pytest.mark.parametrize('text', [
+    'plain',
+    'Nguy%C3%AAn+H%C3%A0',
+    'a%2Fb%2fc',
+    '100%',
+    '%zz%4',
+    '%%41',
+    'tail%2',
+    '%E2%82%AC+%F0%9F%90%BC',
+    '',
+])
+def test_unquote_as_urllib(text):
+    assert UrlParser.unquote(text) == urllib.parse.unquote_plus(text)
+
+
+def test_parse_pairs():
+    assert UrlParser.parse_pairs('id=1&&flag&name=a+b&x=%3D') == [
+        ('id', '1'), ('flag', ''), ('name', 'a b'), ('x', '='),
+    ]
+
+
+def test_parse_qs_multi_value():
+    params = UrlParser.parse_qs('tag=a&page=2&tag=b&tag=c')
+    assert params['tag'] == 'c'
+    assert params.getlist('tag') == ['a', 'b', 'c']
+    assert params.getlist('page') == ['2']
+    assert params.getlist('missing') == []
+    assert dict(params) == {'tag': 'c', 'page': '2'}
+
+
+def test_parse_qs_cached_but_not_shared():
+    _cached_pairs.cache_clear()
+    first = UrlParser.parse_qs('page=2')
+    first['page'] = '3'
+    second = UrlParser.parse_qs('page=2')
+    assert second['page'] == '2'
+    assert _cached_pairs.cache_info().hits == 1
+
+
+def test_long_query_not_cached():
+    _cached_pairs.cache_clear()
+    query = 'q=' + 'a' * UrlParser.CACHEABLE_LENGTH
+    assert UrlParser.parse_qs(query)['q'] == query[2:]
+    assert _cached_pairs.cache_info().currsize == 0
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('/items', ('/items', '')),
+    ('/items?id=1', ('/items', 'id=1')),
+    ('/items?id=1#top', ('/items', 'id=1')),
+    ('/items#top', ('/items', '')),
+    ('/items?next=/a?b', ('/items', 'next=/a?b')),
+])
+def test_split_url(raw, expected):
+    assert UrlParser.split_url(raw) == expected
+
+
+def test_multidict_add_and_set():
+    params = MultiDict([('tag', 'a')])
+    params.add('tag', 'b')
+    params.add('page', '1')
+    assert params.getlist('tag') == ['a', 'b']
+    params['tag'] = 'c'
+    assert params.getlist('tag') == ['c']
+    del params['page']
+    assert list(params) == ['tag']
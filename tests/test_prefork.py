@@ -0,0 +1,48 @@
+import os
+import signal
+import time
+
+import pytest
+
+from conftest import exchange, pid_of
+
+
+@pytest.mark.parametrize('engine', ['run', 'run_async'])
+def test_workers_share_the_port(supervisor, engine):
+    port, process = supervisor(engine, workers=2)
+    pids = {pid_of(port) for _ in range(40)}
+    assert len(pids) == 2
+    assert process.pid not in pids
+
+
+def test_crashed_worker_replaced(supervisor):
+    port, process = supervisor(workers=2)
+    before = {pid_of(port) for _ in range(40)}
+    assert exchange(port, b'GET /crash HTTP/1.1\r\nHost: x\r\n\r\n') == b''
+    after = set()
+    for _ in range(100):
+        after = {pid_of(port) for _ in range(40)} - {None}
+        if len(after) == 2 and after != before:
+            break
+        time.sleep(0.1)
+    assert len(after) == 2
+    assert len(after & before) == 1
+
+
+def test_worker_retired_after_max_requests(supervisor):
+    port, process = supervisor(workers=2, max_requests=3)
+    pids = [pid_of(port) for _ in range(12)]
+    # No request goes unanswered while a worker is replaced.
+    assert None not in pids
+    assert len(set(pids)) >= 4
+
+
+def test_sigterm_stops_every_process(supervisor):
+    port, process = supervisor(workers=2)
+    children = {pid_of(port) for _ in range(20)}
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=10) == 0
+    for pid in children:
+        with pytest.raises(ProcessLookupError):
+            os.kill(pid, 0)
+    assert pid_of(port) is None
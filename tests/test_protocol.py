@@ -0,0 +1,127 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from conftest import exchange, read_response
+
+from PandaHttpd.http import FileResponse
+
+
+@pytest.fixture
+def app(make_app, serve):
+    def start(**config):
+        app = make_app(**config)
+
+        @app.route('/echo/{word}')
+        def echo(word: str):
+            return {'word': word}
+
+        @app.route('/upload', method='POST')
+        def upload(request):
+            return {'size': len(request.raw_body)}
+
+        return serve(app, 'run_async')
+    return start
+
+
+def test_keep_alive(app):
+    app = app()
+    with socket.create_connection(('127.0.0.1', app.port), timeout=2) as sock:
+        buffered = bytearray()
+        for word in ('one', 'two', 'three'):
+            sock.sendall(b'GET /echo/%s HTTP/1.1\r\nHost: x\r\n\r\n' % word.encode())
+            response = read_response(sock, buffered)
+            assert response.startswith(b'HTTP/1.1 200 OK')
+            assert b'connection: keep-alive' in response.lower()
+            assert response.endswith(b'{"word":"%s"}' % word.encode())
+
+
+def test_pipelining(app):
+    app = app()
+    requests = b''.join(
+        b'GET /echo/%d HTTP/1.1\r\nHost: x\r\n\r\n' % i for i in range(5)
+    ) + b'POST /upload HTTP/1.1\r\nHost: x\r\nContent-Length: 5\r\nConnection: close\r\n\r\nhello'
+    answer = exchange(app.port, requests)
+    assert answer.count(b'HTTP/1.1 200 OK') == 6
+    positions = [answer.index(b'{"word":"%d"}' % i) for i in range(5)] + [answer.index(b'{"size":5}')]
+    assert positions == sorted(positions)
+
+
+def test_header_timeout(app):
+    app = app(header_timeout=0.3)
+    started = time.monotonic()
+    answer = exchange(app.port, b'GET /echo/slow HTTP/1.1\r\nHost: x\r\n', timeout=5)
+    assert answer.startswith(b'HTTP/1.1 408 ')
+    assert time.monotonic() - started < 3
+    assert app.metrics.snapshot()['timeout_header'] == 1
+
+
+def test_body_too_large(app):
+    app = app(max_body_size=1024)
+    answer = exchange(app.port, b'POST /upload HTTP/1.1\r\nHost: x\r\nContent-Length: 4096\r\n\r\n' + b'x' * 4096)
+    assert answer.startswith(b'HTTP/1.1 413 ')
+    assert answer.count(b'HTTP/1.1') == 1
+
+
+def test_shutdown_closes_idle_and_finishes_busy(make_app, serve):
+    app = make_app(graceful_timeout=5)
+    release = threading.Event()
+
+    @app.route('/slow')
+    def slow():
+        release.wait(5)
+        return {'done': True}
+
+    @app.route('/fast')
+    def fast():
+        return {'done': True}
+
+    serve(app, 'run_async')
+    with socket.create_connection(('127.0.0.1', app.port), timeout=3) as idle, \
+         socket.create_connection(('127.0.0.1', app.port), timeout=3) as busy:
+        idle.sendall(b'GET /fast HTTP/1.1\r\nHost: x\r\n\r\n')
+        assert read_response(idle, bytearray()).startswith(b'HTTP/1.1 200 OK')
+        busy.sendall(b'GET /slow HTTP/1.1\r\nHost: x\r\n\r\n')
+        time.sleep(0.2)
+
+        app.stop()
+        # Between requests: closed at once.
+        assert idle.recv(1) == b''
+        # Mid-request: answered, told the connection closes, then closed.
+        release.set()
+        buffered = bytearray()
+        response = read_response(busy, buffered)
+        assert response.startswith(b'HTTP/1.1 200 OK')
+        assert b'connection: close' in response.lower()
+        assert busy.recv(1) == b''
+    with pytest.raises(OSError):
+        socket.create_connection(('127.0.0.1', app.port), timeout=1).close()
+
+
+def test_file_read_off_the_loop(make_app, serve, tmp_path):
+    app = make_app()
+    path = tmp_path / 'notes.txt'
+    path.write_bytes(b'x' * 200_000)
+    readers = []
+
+    class RecordingFileResponse(FileResponse):
+        # Overriding iter_body keeps sendfile() out of it, so the file is
+        # read chunk by chunk, as for a response sendfile() cannot send.
+        def iter_body(self):
+            for chunk in super().iter_body():
+                readers.append(threading.current_thread())
+                yield chunk
+
+    @app.route('/notes')
+    def notes():
+        return RecordingFileResponse(path)
+
+    serve(app, 'run_async')
+    answer = exchange(app.port, b'GET /notes HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n')
+    assert answer.startswith(b'HTTP/1.1 200 OK')
+    assert answer.endswith(b'x' * 200_000)
+    assert readers
+    loop_thread = next(t for t in threading.enumerate() if t.name.endswith('(run_async)'))
+    assert loop_thread not in readers
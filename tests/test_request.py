@@ -0,0 +1,84 @@
+import pytest
+
+from PandaHttpd.http import HttpStatus, Request, RequestError
+
+
+def parse(head: bytes) -> Request:
+    request = Request(None)
+    request.load_head(head)
+    return request
+
+
+def test_content_length_last_of_equal_values():
+    assert parse(b'POST / HTTP/1.1\r\nContent-Length: 7\r\ncontent-length: 07\r\n\r\n').content_length == 7
+
+
+def test_conflicting_content_lengths():
+    request = parse(b'POST / HTTP/1.1\r\nContent-Length: 100\r\nContent-Length: 5\r\n\r\n')
+    with pytest.raises(RequestError) as error:
+        request.content_length
+    assert error.value.status is HttpStatus.BAD_REQUEST
+
+
+def test_invalid_content_length():
+    with pytest.raises(RequestError):
+        parse(b'POST / HTTP/1.1\r\nContent-Length: -1\r\n\r\n').content_length
+
+
+HEAD = (
+    b'GET /articles/42?tag=a&tag=b HTTP/1.1\r\n'
+    b'Host: example.com\r\n'
+    b'X-Host: elsewhere\r\n'
+    b'Accept:  text/html \r\n'
+    b'Cookie: session=abc; theme=dark%20blue\r\n'
+    b'accept: application/json\r\n'
+    b'\r\n'
+)
+
+
+def test_only_request_line_parsed_up_front(monkeypatch):
+    calls = []
+    monkeypatch.setattr(Request, '_parse_headers', lambda self, raw: calls.append(raw))
+    request = parse(HEAD)
+    assert (request.method, request.path, request.protocol) == ('GET', '/articles/42', 'HTTP/1.1')
+    assert request.header('host') == 'example.com'
+    assert calls == []
+
+
+def test_header_without_parsing_the_rest():
+    request = parse(HEAD)
+    assert request.header('HOST') == 'example.com'
+    # The last of repeated headers wins, stripped, as in headers.
+    assert request.header('Accept') == 'application/json' == request.headers['accept']
+    assert request.header('referer', 'none') == 'none'
+    assert request.header('host') != 'elsewhere'
+
+
+def test_parts_worked_out_once():
+    request = parse(HEAD)
+    assert request.headers is request.headers
+    assert request.query_params is request.query_params
+    assert request.cookie is request.cookie
+    assert request.query_params.getlist('tag') == ['a', 'b']
+    assert request.cookie['theme'] == 'dark blue'
+    # The cookie has a view of its own.
+    assert 'cookie' not in request.headers
+
+
+@pytest.mark.parametrize('head, status', [
+    (b'GET\r\n\r\n', HttpStatus.BAD_REQUEST),
+    (b'GET / HTTP/1.1 extra\r\n\r\n', HttpStatus.BAD_REQUEST),
+    (b'G@T / HTTP/1.1\r\n\r\n', HttpStatus.BAD_REQUEST),
+    (b'GET /' + b'a' * 9000 + b' HTTP/1.1\r\n\r\n', HttpStatus.URI_TOO_LONG),
+])
+def test_request_line_refused(head, status):
+    with pytest.raises(RequestError) as error:
+        parse(head)
+    assert error.value.status is status
+
+
+def test_head_over_max_header_size():
+    request = Request(None, max_header_size=64)
+    with pytest.raises(RequestError) as error:
+        request.load_head(b'GET / HTTP/1.1\r\nX-Padding: ' + b'a' * 64 + b'\r\n\r\n')
+    assert error.value.status is HttpStatus.REQUEST_HEADER_FIELDS_TOO_LARGE
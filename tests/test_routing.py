@@ -0,0 +1,115 @@
+import pytest
+
+from conftest import exchange
+
+from PandaHttpd import Router, StaticFiles
+
+
+def test_route_resolved_once_per_request(make_app, serve):
+    app = make_app()
+
+    @app.route('/items/{id:int}', method='PUT', body_limit=1024)
+    def update(id: int, request):
+        return {'id': id, 'size': len(request.raw_body)}
+
+    calls = []
+    resolve = app.router.resolve
+    app.router.resolve = lambda path, method: calls.append(path) or resolve(path, method)
+    serve(app)
+
+    answer = exchange(app.port, (
+        b'PUT /items/7 HTTP/1.1\r\nHost: x\r\nContent-Length: 5\r\n'
+        b'Expect: 100-continue\r\nConnection: close\r\n\r\nhello'
+    ))
+    assert b'HTTP/1.1 200 OK' in answer
+    assert answer.endswith(b'{"id":7,"size":5}')
+    assert calls == ['/items/7']
+
+
+def endpoint():
+    return {}
+
+
+@pytest.fixture
+def router(tmp_path):
+    router = Router()
+    for path in (
+        '/posts/{rest:path}',
+        '/posts/{slug}',
+        '/posts/{id:int}',
+        '/posts/latest',
+        '/posts/{id:int}/edit',
+        '/static/robots.txt',
+    ):
+        router.add_route(path, 'GET', endpoint)
+    router.add_route('/posts/{id:int}', 'DELETE', endpoint)
+    router.add_mount('/static', StaticFiles(str(tmp_path)))
+    router.add_mount('/static/img', StaticFiles(str(tmp_path)))
+    return router
+
+
+@pytest.mark.parametrize('path, method, expected, params', [
+    ('/posts/latest', 'GET', '/posts/latest', {}),
+    ('/posts/42', 'GET', '/posts/{id:int}', {'id': 42}),
+    ('/posts/hello', 'GET', '/posts/{slug}', {'slug': 'hello'}),
+    ('/posts/42/edit', 'GET', '/posts/{id:int}/edit', {'id': 42}),
+    ('/posts/hello/edit', 'GET', '/posts/{rest:path}', {'rest': 'hello/edit'}),
+    ('/posts/a%2Fb', 'GET', '/posts/{slug}', {'slug': 'a/b'}),
+    ('/posts/42', 'HEAD', '/posts/{id:int}', {'id': 42}),
+    ('/posts/42', 'delete', '/posts/{id:int}', {'id': 42}),
+    ('/static/robots.txt', 'GET', '/static/robots.txt', {}),
+    ('/static/app.js', 'GET', '/static', {}),
+    ('/static', 'GET', '/static', {}),
+    ('/static/img/logo.png', 'GET', '/static/img', {}),
+    ('/static/imgs/logo.png', 'GET', '/static', {}),
+])
+def test_precedence(router, path, method, expected, params):
+    route, found = router.resolve(path, method)
+    assert route is not None and route.path == expected
+    assert found == params
+
+
+@pytest.mark.parametrize('path, method', [
+    ('/staticfoo', 'GET'),
+    ('/staticfoo/app.js', 'GET'),
+    ('/static/app.js', 'POST'),
+    ('/posts/hello', 'DELETE'),
+    ('/nowhere', 'GET'),
+])
+def test_no_route(router, path, method):
+    assert router.resolve(path, method) == (None, {})
+
+
+def test_first_added_answers(router):
+    other = lambda: {}
+    router.add_route('/posts/{id:int}', 'GET', other)
+    assert router.resolve('/posts/1', 'GET')[0].endpoint is endpoint
+
+
+@pytest.mark.parametrize('path', ['/a/{x', '/a/{x:nope}', '/a/{x}/{x}', '/a/{rest:path}/b'])
+def test_invalid_route_path(path):
+    with pytest.raises(ValueError):
+        Router().add_route(path, 'GET', endpoint)
+
+
+def test_mount_path_without_parameters(tmp_path):
+    with pytest.raises(ValueError):
+        Router().add_mount('/files/{name}', StaticFiles(str(tmp_path)))
+
+
+def test_forwarded_request_headers_not_echoed(make_app, serve):
+    app = serve(make_app())
+
+    @app.route('/hello')
+    def hello():
+        return {'hello': 'world'}
+
+    answer = exchange(app.port, (
+        b'GET /hello HTTP/1.1\r\nHost: x\r\nAccept-Encoding: gzip\r\nRange: bytes=0-1\r\n'
+        b'If-None-Match: "abc"\r\nIf-Modified-Since: Sat, 01 Jan 2000 00:00:00 GMT\r\nConnection: close\r\n\r\n'
+    ))
+    head, body = answer.split(b'\r\n\r\n', 1)
+    assert head.startswith(b'HTTP/1.1 200 OK')
+    names = {line.split(b':', 1)[0].strip().lower() for line in head.split(b'\r\n')[1:]}
+    assert not names & {b'accept-encoding', b'range', b'if-none-match', b'if-modified-since'}
+    assert body == b'{"hello":"world"}'
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import socket
+
+import pytest
+
+from PandaHttpd import StaticFiles
+from PandaHttpd.http import FileResponse, HttpStatus
+
+from conftest import exchange
+
+DATA = os.urandom(300 * 1024)
+
+
+@pytest.fixture
+def big(tmp_path):
+    path = tmp_path / 'big.bin'
+    path.write_bytes(DATA)
+    return path
+
+
+@pytest.mark.parametrize('asked, status, start, end', [
+    (None, HttpStatus.OK, 0, len(DATA) - 1),
+    ('bytes=0-99', HttpStatus.PARTIAL_CONTENT, 0, 99),
+    ('bytes=100000-', HttpStatus.PARTIAL_CONTENT, 100000, len(DATA) - 1),
+    ('bytes=-500', HttpStatus.PARTIAL_CONTENT, len(DATA) - 500, len(DATA) - 1),
+    ('bytes=1000-999999999', HttpStatus.PARTIAL_CONTENT, 1000, len(DATA) - 1),
+    ('bytes=0-99, 200-299', HttpStatus.PARTIAL_CONTENT, 0, 99),
+    ('bytes=99-0', HttpStatus.OK, 0, len(DATA) - 1),
+    ('items=0-99', HttpStatus.OK, 0, len(DATA) - 1),
+])
+def test_range(big, asked, status, start, end):
+    response = FileResponse(big, request_headers={'Range': asked} if asked else None)
+    assert response.status_code is status
+    headers = dict(response.header.items())
+    assert headers[b'content-length'] == str(end - start + 1).encode()
+    if status is HttpStatus.PARTIAL_CONTENT:
+        assert headers[b'content-range'] == f'bytes {start}-{end}/{len(DATA)}'.encode()
+    assert b''.join(response.iter_body()) == DATA[start:end + 1]
+
+
+def test_range_past_the_end(big):
+    response = FileResponse(big, request_headers={'range': f'bytes={len(DATA)}-'})
+    assert response.status_code is HttpStatus.RANGE_NOT_SATISFIABLE
+    assert dict(response.header.items())[b'content-range'] == f'bytes */{len(DATA)}'.encode()
+    assert response.sendfile_range() is None
+
+
+def test_sendfile_range(big):
+    assert FileResponse(big).sendfile_range() == (big, 0, len(DATA))
+    ranged = FileResponse(big, request_headers={'range': 'bytes=1000-'})
+    assert ranged.sendfile_range() == (big, 1000, len(DATA) - 1000)
+
+
+def test_sendfile_not_used(big, tmp_path):
+    small = tmp_path / 'small.bin'
+    small.write_bytes(b'x' * FileResponse.COALESCE_LIMIT)
+    assert FileResponse(small).sendfile_range() is None
+    # Small enough to go out with the head.
+    assert FileResponse(big, request_headers={'range': 'bytes=0-99'}).sendfile_range() is None
+
+    head = FileResponse(big)
+    head.suppress_body = True
+    assert head.sendfile_range() is None
+
+    class Chunked(FileResponse):
+        def iter_body(self):
+            yield from super().iter_body()
+
+    class Off(FileResponse):
+        use_sendfile = False
+
+    assert Chunked(big).sendfile_range() is None
+    assert Off(big).sendfile_range() is None
+
+
+def body_of(answer: bytes) -> bytes:
+    return answer.split(b'\r\n\r\n', 1)[1]
+
+
+@pytest.mark.parametrize('engine', ['run', 'run_async'])
+def test_ranges_sent_with_sendfile(make_app, serve, big, monkeypatch, engine):
+    sent = []
+    if engine == 'run':
+        original = socket.socket.sendfile
+
+        def sendfile(self, file, offset=0, count=None):
+            sent.append((offset, count))
+            return original(self, file, offset, count)
+        monkeypatch.setattr(socket.socket, 'sendfile', sendfile)
+    else:
+        original_async = asyncio.BaseEventLoop.sendfile
+
+        async def sendfile_async(self, transport, file, offset=0, count=None, **kwargs):
+            sent.append((offset, count))
+            return await original_async(self, transport, file, offset, count, **kwargs)
+        monkeypatch.setattr(asyncio.BaseEventLoop, 'sendfile', sendfile_async)
+
+    app = make_app(static_cache_size=0)
+    app.mount('/files', StaticFiles(str(big.parent)))
+    serve(app, engine)
+
+    get = b'GET /files/big.bin HTTP/1.1\r\nHost: x\r\nConnection: close\r\n%s\r\n'
+    whole = exchange(app.port, get % b'')
+    assert whole.startswith(b'HTTP/1.1 200')
+    assert body_of(whole) == DATA
+    part = exchange(app.port, get % b'Range: bytes=100000-\r\n')
+    assert part.startswith(b'HTTP/1.1 206')
+    assert body_of(part) == DATA[100000:]
+    tail = exchange(app.port, get % b'Range: bytes=-100\r\n')
+    assert tail.startswith(b'HTTP/1.1 206')
+    assert body_of(tail) == DATA[-100:]
+    # The last is small enough to go out with its head instead.
+    assert sent == [(0, len(DATA)), (100000, len(DATA) - 100000)]
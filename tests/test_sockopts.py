@@ -0,0 +1,72 @@
+import socket
+
+import pytest
+
+from PandaHttpd.http import Response
+from PandaHttpd.server import SocketOptions
+
+
+@pytest.mark.parametrize('options', [
+    {'tcp_nodelai': True},
+    {'tcp_defer_accept': -1},
+    {'tcp_defer_accept': 1.5},
+    {'tcp_defer_accept': True},
+    {'tcp_fastopen': 'many'},
+    {'sndbuf': 0},
+])
+def test_invalid_options_rejected(options):
+    with pytest.raises(ValueError):
+        SocketOptions(options)
+
+
+def test_invalid_options_rejected_by_the_app(make_app):
+    with pytest.raises(ValueError):
+        make_app(socket_options={'rcvbuf': -4096})
+
+
+def test_defaults_and_none():
+    assert SocketOptions().values['tcp_nodelay'] == 1
+    assert 'tcp_nodelay' not in SocketOptions({'tcp_nodelay': None}).values
+
+
+def test_applied_to_listener():
+    options = SocketOptions({'tcp_defer_accept': 5, 'rcvbuf': 65536})
+    with socket.socket() as sock:
+        options.apply_listener(sock)
+        effective = options.effective(sock)
+    assert effective['tcp_nodelay'] == 1
+    assert effective['tcp_defer_accept'] > 0
+    # The kernel doubles buffer sizes for its bookkeeping.
+    assert effective['rcvbuf'] >= 65536
+
+
+def test_unix_socket_gets_buffer_sizes_only():
+    options = SocketOptions({'tcp_defer_accept': 5, 'sndbuf': 65536})
+    with socket.socket(socket.AF_UNIX) as sock:
+        options.apply_listener(sock)
+        options.apply_connection(sock)
+        effective = options.effective(sock)
+    assert effective['sndbuf'] >= 65536
+    assert 'tcp_nodelay' not in effective
+
+
+class Recorder:
+    def __init__(self):
+        self.sends = []
+
+    def sendall(self, data):
+        self.sends.append(bytes(data))
+
+
+@pytest.mark.parametrize('size, sends', [
+    (0, 1),
+    (100, 1),
+    (Response.COALESCE_LIMIT, 1),
+    (Response.COALESCE_LIMIT + 1, 2),
+])
+def test_head_and_small_body_in_one_send(size, sends):
+    response = Response(body=b'x' * size, media_type='application/octet-stream')
+    sender = Recorder()
+    response(sender, None)
+    assert len(sender.sends) == sends
+    assert b''.join(sender.sends) == response.encode_head() + b'x' * size
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+
+import pytest
+
+from PandaHttpd.http import Request
+from PandaHttpd.http.request import BodyBuffer
+
+from conftest import exchange
+
+BODY = os.urandom(10000)
+
+
+def receive(data: bytes, spool_threshold: int, close_early: bool = False) -> Request:
+    reader, writer = socket.socketpair()
+    sending = threading.Thread(target=lambda: (writer.sendall(data), close_early and writer.close()))
+    sending.start()
+    try:
+        request = Request(reader, spool_threshold=spool_threshold)
+        request.handle()
+    finally:
+        sending.join()
+        reader.close()
+        writer.close()
+    return request
+
+
+def post(body: bytes) -> bytes:
+    return b'POST /upload HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n' % len(body) + body
+
+
+@pytest.mark.parametrize('threshold, spooled', [(1024, True), (len(BODY), False)])
+def test_body_over_threshold_spooled(threshold, spooled):
+    request = receive(post(BODY), threshold)
+    assert request.complete
+    assert (request._spool is not None) is spooled
+    chunks = list(request.stream(1000))
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert b''.join(chunks) == BODY == request.raw_body
+    # Read again from the start.
+    assert b''.join(request.stream()) == BODY
+    request.close()
+
+
+def test_spool_closed_with_request():
+    request = receive(post(BODY), 1024)
+    spool = request._spool
+    request.close()
+    assert spool.closed
+
+
+def test_spooled_body_cut_short():
+    request = receive(post(BODY)[:-100], 1024, close_early=True)
+    assert not request.complete
+    assert len(request.raw_body) == len(BODY) - 100
+    request.close()
+
+
+def test_body_buffer():
+    buffer = BodyBuffer(threshold=8)
+    buffer.write(b'12345678')
+    assert buffer.result() == b'12345678'
+    buffer.write(b'9')
+    spool = buffer.result()
+    assert spool.tell() == 9
+    spool.seek(0)
+    assert spool.read() == b'123456789'
+    buffer.close()
+    assert spool.closed
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+@pytest.mark.parametrize('engine', ['run', 'run_async'])
+def test_streamed_upload(make_app, serve, engine, chunked):
+    app = make_app(body_spool_threshold=1024)
+
+    @app.route('/upload', 'POST')
+    def upload(request: Request):
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in request.stream(4096):
+            digest.update(chunk)
+            size += len(chunk)
+        return {'size': size, 'sha256': digest.hexdigest()}
+
+    serve(app, engine)
+    if chunked:
+        data = b'POST /upload HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\nConnection: close\r\n\r\n'
+        data += b''.join(b'%x\r\n%s\r\n' % (len(BODY[i:i + 3000]), BODY[i:i + 3000]) for i in range(0, len(BODY), 3000))
+        data += b'0\r\n\r\n'
+    else:
+        data = post(BODY).replace(b'Host: x\r\n', b'Host: x\r\nConnection: close\r\n')
+    answer = exchange(app.port, data)
+    assert answer.startswith(b'HTTP/1.1 200')
+    assert json.loads(answer.split(b'\r\n\r\n', 1)[1]) == {'size': len(BODY), 'sha256': hashlib.sha256(BODY).hexdigest()}
@@ -0,0 +1,48 @@
+import pytest
+
+from PandaHttpd.middleware import GZipMiddleware
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, False),
+    ('', False),
+    ('gzip', True),
+    ('deflate, gzip;q=0.5', True),
+    ('x-gzip', True),
+    ('*', True),
+    ('gzip;q=0', False),
+    ('gzip; q=0.0, br', False),
+    ('*;q=0, gzip', True),
+    ('gzip, *;q=0', True),
+    ('gzip;q=0, *', False),
+    ('br, deflate', False),
+])
+def test_accepts_gzip(value, expected):
+    assert GZipMiddleware.accepts(value) is expected
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    from PandaHttpd import StaticCache
+    cache = StaticCache(max_bytes=250, compress=False)
+    for name in 'abc':
+        path = tmp_path / name
+        path.write_bytes(name.encode() * 100)
+        assert cache.put(name, path, path.stat(), 'application/octet-stream') is not None
+    assert cache.get('a') is None
+    assert cache.get('c').identity[0] == b'c' * 100
+    assert cache.size == 200
+
+
+def test_cache_rereads_a_changed_file(tmp_path):
+    from PandaHttpd import StaticCache
+    cache = StaticCache(revalidate_after=0)
+    path = tmp_path / 'app.css'
+    path.write_text('a { color: red; }\n' * 100)
+    first = cache.put('k', path, path.stat(), 'text/css')
+    assert first.gzip is not None and first.gzip[1]['ETag'] != first.identity[1]['ETag']
+    # Stale at once: the caller stats again and puts.
+    assert cache.get('k') is None
+    assert cache.put('k', path, path.stat(), 'text/css') is first
+    path.write_text('b { color: blue; }\n' * 100)
+    assert cache.put('k', path, path.stat(), 'text/css') is not first
+    assert len(cache) == 1